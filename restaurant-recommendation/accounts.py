@@ -0,0 +1,133 @@
+"""SQLite-backed user accounts and per-user wishlists.
+
+Replaces ``users.json`` / ``wishlist.json``, which were loaded, scanned and
+rewritten whole on every login, signup and wishlist change. Users are keyed
+by username and wishlist rows by (username, restaurant id), both primary
+keys, so every lookup and write is an index probe.
+
+Connections, WAL and transactions come from sqlite_store. Uniqueness
+(username taken, already wishlisted) is enforced by the primary keys, not
+check-then-insert.
+
+The legacy JSON files are imported once, when the database is created.
+Legacy users without a password are skipped: nobody can log in as them.
+The old wishlist was global; its entries go to the ``guest`` user.
+"""
+import datetime
+import json
+import sqlite3
+
+from sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    email    TEXT NOT NULL DEFAULT '',
+    password TEXT NOT NULL,
+    created  TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS wishlist (
+    username      TEXT NOT NULL,
+    restaurant_id TEXT NOT NULL,
+    name          TEXT NOT NULL DEFAULT '',
+    added         TEXT NOT NULL,
+    PRIMARY KEY (username, restaurant_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+"""
+
+GUEST = "guest"
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def _load_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return data if isinstance(data, list) else []
+
+
+class AccountStore(SQLiteStore):
+    SCHEMA = SCHEMA
+
+    def __init__(self, path, legacy_users=None, legacy_wishlist=None, resolve_id=None):
+        """``resolve_id(name)`` maps a legacy wishlist name to a restaurant id (or None)."""
+        super().__init__(path)
+        self._import_legacy(legacy_users, legacy_wishlist, resolve_id)
+
+    def _import_legacy(self, users_path, wishlist_path, resolve_id):
+        with self._tx() as db:
+            if self._imported(db, "legacy_imported", _now()):
+                return
+            users = [u for u in (_load_json(users_path) if users_path else [])
+                     if isinstance(u, dict) and u.get("username")]
+            rows = [(u["username"], u.get("email") or "", u["password"], _now())
+                    for u in users if isinstance(u.get("password"), str) and u["password"]]
+            if len(rows) < len(users):
+                print(f"⚠️ skipped {len(users) - len(rows)} legacy user(s) without a password")
+            db.executemany(
+                "INSERT OR IGNORE INTO users (username, email, password, created) VALUES (?, ?, ?, ?)", rows)
+            items = _load_json(wishlist_path) if wishlist_path else []
+            rows = []
+            for item in items:
+                name = (item.get("name") or item.get("Restaurant Name") or "") if isinstance(item, dict) else ""
+                if name:
+                    rid = resolve_id(name) if resolve_id else None
+                    rows.append((GUEST, str(rid) if rid is not None else name, name, _now()))
+            db.executemany(
+                "INSERT OR IGNORE INTO wishlist (username, restaurant_id, name, added) VALUES (?, ?, ?, ?)", rows)
+
+    # ---------- users ----------
+    def get_user(self, username):
+        row = self._conn().execute(
+            "SELECT username, email, password, created FROM users WHERE username = ?", (username,)).fetchone()
+        return dict(row) if row else None
+
+    def create_user(self, username, email, password):
+        """False if the username is already taken."""
+        try:
+            self._conn().execute(
+                "INSERT INTO users (username, email, password, created) VALUES (?, ?, ?, ?)",
+                (username, email or "", password, _now()))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def check_login(self, username, password):
+        if not password:
+            return False  # also covers accounts imported with an empty password before this check
+        user = self.get_user(username)
+        return user is not None and user["password"] == password
+
+    def count_users(self):
+        return self._conn().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    # ---------- wishlists ----------
+    def wishlist(self, username):
+        """[{id, name, added}] for one user, oldest first."""
+        rows = self._conn().execute(
+            "SELECT restaurant_id, name, added FROM wishlist WHERE username = ? ORDER BY added, restaurant_id",
+            (username,)).fetchall()
+        return [{"id": r["restaurant_id"], "name": r["name"], "added": r["added"]} for r in rows]
+
+    def add_to_wishlist(self, username, restaurant_id, name=""):
+        """False if it was already on the user's wishlist."""
+        cur = self._conn().execute(
+            "INSERT OR IGNORE INTO wishlist (username, restaurant_id, name, added) VALUES (?, ?, ?, ?)",
+            (username, str(restaurant_id), name or "", _now()))
+        return cur.rowcount == 1
+
+    def remove_from_wishlist(self, username, key):
+        """Remove by restaurant id or name; returns the number of rows removed."""
+        cur = self._conn().execute(
+            "DELETE FROM wishlist WHERE username = ? AND (restaurant_id = ? OR name = ?)",
+            (username, str(key), str(key)))
+        return cur.rowcount
@@ -0,0 +1,256 @@
+"""Catalogue-wide aggregates, computed once per dataset from the columnar store.
+
+Everything is a vectorized group-by over ``RestaurantStore`` columns: City
+is one group per row (``bincount`` on the category codes), Cuisines is
+many-to-many, so the cuisine bitsets are exploded once into (row, cuisine)
+pairs and grouped the same way. Per group we keep restaurant counts,
+rating-band histograms, mean rating, sorted costs (for quantiles) and rows
+in rating order (for top-N), plus a sparse city × cuisine cross-tab for
+drill-down. Requests only slice these arrays; nothing walks the catalogue.
+
+User ratings are folded in incrementally: ``add_rating`` moves the per-row
+and per-group counters by the delta of one (user, restaurant) rating.
+"""
+import heapq
+import threading
+from collections import defaultdict
+
+import numpy as np
+from scipy import sparse
+
+CHUNK_ROWS = 65_536
+
+RATING_BANDS = ["Excellent (4.5+)", "Good (3–4.4)", "Average (<3)", "Not rated"]
+N_BANDS = len(RATING_BANDS)
+
+
+def rating_band(rating):
+    """Band index per rating (see RATING_BANDS); 0 / missing is "Not rated"."""
+    rating = np.asarray(rating, dtype=np.float64)
+    return np.where(rating >= 4.5, 0, np.where(rating >= 3.0, 1, np.where(rating > 0, 2, 3)))
+
+
+def _bit_pairs(bits, n_bits):
+    """(rows, bit ids) of every set bit, row-major."""
+    rows, ids = [], []
+    for start in range(0, len(bits), CHUNK_ROWS):
+        chunk = np.ascontiguousarray(bits[start:start + CHUNK_ROWS]).astype("<u8", copy=False)
+        r, b = np.nonzero(np.unpackbits(chunk.view(np.uint8), axis=1, bitorder="little")[:, :n_bits])
+        rows.append(r + start)
+        ids.append(b)
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(rows).astype(np.int64), np.concatenate(ids).astype(np.int64)
+
+
+def _starts(gids, n_groups):
+    return np.concatenate(([0], np.cumsum(np.bincount(gids, minlength=n_groups))))
+
+
+class _Groups:
+    """One group-by (City or Cuisine) over (group id, row) membership pairs."""
+
+    def __init__(self, labels, gids, rows, store, band):
+        g = len(labels)
+        self.labels = list(labels)
+        self.lookup = {str(label).strip().lower(): i for i, label in enumerate(self.labels) if label}
+        rating, cost = store.rating[rows], store.cost[rows]
+
+        self.count = np.bincount(gids, minlength=g)
+        self.bands = np.bincount(gids * N_BANDS + band[rows], minlength=g * N_BANDS).reshape(g, N_BANDS)
+        rated = rating > 0
+        self.rated = np.bincount(gids[rated], minlength=g)
+        self.rating_sum = np.bincount(gids[rated], weights=rating[rated], minlength=g)
+
+        # costs sorted within each group -> quantiles are index lookups
+        priced = cost > 0
+        order = np.lexsort((cost[priced], gids[priced]))
+        self._costs = cost[priced][order]
+        self._cost_start = _starts(gids[priced], g)
+
+        # rows by rating (desc) within each group, catalogue order on ties
+        order = np.lexsort((rows, -rating, gids))
+        self._by_rating = rows[order]
+        self._start = _starts(gids, g)
+
+        # user ratings, maintained by Aggregates.add_rating
+        self.user_count = np.zeros(g, dtype=np.int64)
+        self.user_sum = np.zeros(g)
+        self.user_bands = np.zeros((g, N_BANDS), dtype=np.int64)
+
+    def find(self, label):
+        return self.lookup.get(str(label).strip().lower())
+
+    def top(self, counts, n):
+        """[(label, count)] of the ``n`` largest ``counts`` (array over groups)."""
+        counts = np.asarray(counts)
+        order = np.argsort(-counts, kind="stable")
+        return [(self.labels[i], int(counts[i])) for i in order if self.labels[i] and counts[i] > 0][:n]
+
+    def top_rated(self, g, n):
+        return self._by_rating[self._start[g]:self._start[g] + min(n, self.count[g])]
+
+    def cost_summary(self, g):
+        costs = self._costs[self._cost_start[g]:self._cost_start[g + 1]]
+        return _cost_summary(costs)
+
+    def rating_summary(self, g):
+        return _rating_summary(self.count[g], self.bands[g], self.rated[g], self.rating_sum[g])
+
+    def user_summary(self, g):
+        return _user_summary(self.user_count[g], self.user_sum[g], self.user_bands[g])
+
+
+def _cost_summary(sorted_costs):
+    if not len(sorted_costs):
+        return {"count": 0}
+    q = np.quantile(sorted_costs, [0.0, 0.25, 0.5, 0.75, 1.0])
+    return {"count": int(len(sorted_costs)), "mean": round(float(sorted_costs.mean()), 2),
+            "min": float(q[0]), "p25": float(q[1]), "median": float(q[2]),
+            "p75": float(q[3]), "max": float(q[4])}
+
+
+def _rating_summary(count, bands, rated, rating_sum):
+    return {"restaurants": int(count), "rated": int(rated),
+            "mean": round(float(rating_sum / rated), 3) if rated else None,
+            "bands": {"labels": RATING_BANDS, "counts": [int(b) for b in bands]}}
+
+
+def _user_summary(count, total, bands):
+    return {"count": int(count), "mean": round(float(total / count), 3) if count else None,
+            "bands": {"labels": RATING_BANDS[:3], "counts": [int(b) for b in bands[:3]]}}
+
+
+class Aggregates:
+    def __init__(self, store):
+        self.store = store
+        n = store.size
+        self.band = rating_band(store.rating)
+
+        all_rows = np.arange(n)
+        self.all = _Groups(["All"], np.zeros(n, dtype=np.int64), all_rows, store, self.band)
+        self.cities = _Groups(store.city_names, store.city_codes.astype(np.int64), all_rows, store, self.band)
+        pair_rows, pair_cuisines = _bit_pairs(store.cuisine_bits, len(store.cuisine_tokens))
+        self.cuisines = _Groups(store.cuisine_labels, pair_cuisines, pair_rows, store, self.band)
+        self.city_counts = self.cities.count
+        self.cuisine_counts = self.cuisines.count
+
+        # city x cuisine restaurant counts
+        self.city_cuisine = sparse.csr_matrix(
+            (np.ones(len(pair_rows), dtype=np.int64), (store.city_codes[pair_rows], pair_cuisines)),
+            shape=(len(store.city_names), len(store.cuisine_tokens)))
+        self.cuisine_city = self.city_cuisine.T.tocsr()
+
+        self._lock = threading.Lock()
+        self.reset_ratings()
+
+    # ---------- user ratings (incremental) ----------
+    def reset_ratings(self, ratings=()):
+        """Forget all user ratings, then apply ``[(user, row, rating)]``."""
+        with self._lock:
+            self._user = {}
+            self._row_count = defaultdict(int)
+            self._row_sum = defaultdict(float)
+            for groups in (self.all, self.cities, self.cuisines):
+                groups.user_count[:] = 0
+                groups.user_sum[:] = 0
+                groups.user_bands[:] = 0
+        for user, row, rating in ratings:
+            self.add_rating(user, row, rating)
+
+    def _row_cuisines(self, row):
+        words = self.store.cuisine_bits[row]
+        return [w * 64 + b for w in range(len(words)) for b in range(64) if int(words[w]) >> b & 1]
+
+    def _row_groups(self, row):
+        cuisines = self._row_cuisines(row)
+        return ((self.all, [0]), (self.cities, [int(self.store.city_codes[row])]), (self.cuisines, cuisines))
+
+    def _apply(self, row, rating, sign):
+        band = int(rating_band(rating))
+        self._row_count[row] += sign
+        self._row_sum[row] += sign * rating
+        if not self._row_count[row]:
+            del self._row_count[row], self._row_sum[row]
+        for groups, gids in self._row_groups(row):
+            for g in gids:
+                groups.user_count[g] += sign
+                groups.user_sum[g] += sign * rating
+                groups.user_bands[g, band] += sign
+
+    def add_rating(self, user, row, rating):
+        """Record ``user``'s rating of catalogue row ``row`` (replacing an earlier one)."""
+        if row is None or not 0 <= row < self.store.size:
+            return
+        rating = float(rating)
+        with self._lock:
+            old = self._user.get((user, row))
+            if old is not None:
+                self._apply(row, old, -1)
+            self._user[(user, row)] = rating
+            self._apply(row, rating, +1)
+
+    def _member(self, groups, g, row):
+        if groups is self.cities:
+            return self.store.city_codes[row] == g
+        if groups is self.cuisines:
+            return bool(int(self.store.cuisine_bits[row, g >> 6]) >> (g & 63) & 1)
+        return True
+
+    def most_rated(self, n=10, groups=None, g=0):
+        """[(row, user ratings, mean)] for the most-rated rows, optionally within group ``g``.
+
+        Walks only the rows that have user ratings.
+        """
+        with self._lock:
+            items = list(self._row_count.items())
+            if groups is not None:
+                items = [(r, c) for r, c in items if self._member(groups, g, r)]
+            top = heapq.nlargest(n, items, key=lambda rc: (rc[1], -rc[0]))
+            return [(r, c, self._row_sum[r] / c) for r, c in top]
+
+    # ---------- summaries ----------
+    def top_cities(self, n=5):
+        """[(city, restaurants)], most first."""
+        return self.cities.top(self.city_counts, n)
+
+    def top_cuisines(self, n=5):
+        """[(cuisine, restaurants)], most first."""
+        return self.cuisines.top(self.cuisine_counts, n)
+
+    def top_rated(self, n=5):
+        """Row ids of the ``n`` best-rated restaurants (catalogue order on ties)."""
+        return self.all.top_rated(0, n)
+
+    def summary(self, city=None, cuisine=None, n=10):
+        """Analytics for the whole catalogue, one city or one cuisine.
+
+        Returns None for an unknown city / cuisine.
+        """
+        if city:
+            groups, g = self.cities, self.cities.find(city)
+            if g is None:
+                return None
+            cuisines = self.cuisines.top(self.city_cuisine.getrow(g).toarray().ravel(), n)
+            cities = [(groups.labels[g], int(groups.count[g]))]
+        elif cuisine:
+            groups, g = self.cuisines, self.cuisines.find(cuisine)
+            if g is None:
+                return None
+            cuisines = [(groups.labels[g], int(groups.count[g]))]
+            cities = self.cities.top(self.cuisine_city.getrow(g).toarray().ravel(), n)
+        else:
+            groups, g = self.all, 0
+            cuisines, cities = self.top_cuisines(n), self.top_cities(n)
+
+        return {
+            "scope": {"city": groups.labels[g] if groups is self.cities else None,
+                      "cuisine": groups.labels[g] if groups is self.cuisines else None},
+            "cuisines": {"labels": [c for c, _ in cuisines], "counts": [k for _, k in cuisines]},
+            "cities": {"labels": [c for c, _ in cities], "counts": [k for _, k in cities]},
+            "rating": groups.rating_summary(g),
+            "cost": groups.cost_summary(g),
+            "top_rated": groups.top_rated(g, n),
+            "user_ratings": groups.user_summary(g),
+            "most_rated": self.most_rated(n, groups, g),
+        }
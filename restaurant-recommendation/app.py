@@ -1,12 +1,31 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for, session, flash
+from flask import Flask, render_template, stream_template, jsonify, request, redirect, url_for, session, flash
 import json
+import base64
+import contextlib
+import hmac
 import os
 import datetime
-from collections import Counter
-
-# keep these since you use them elsewhere (hybrid CF)
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
+import threading
+
+import numpy as np
+
+from indexes import intersect
+from store import column
+from trending import load_rules
+from cf import CFEngine
+from mf import MFModel
+from ratings_log import RatingsLog
+from snapshot import load_snapshot, current_version
+from dataset import Catalogue, DatasetManager
+from precompute import Precomputer
+from accounts import AccountStore
+from feedback_store import FeedbackStore
+from response_cache import ResponseCache
+from metrics import Metrics, SlowRequestProfiler
+from images import ImageVariants
+import export
+import neighbors
+import tfidf_store
 
 # ---------- App ----------
 app = Flask(__name__)
@@ -15,13 +34,68 @@ app.secret_key = "your_secret_key_here"  # change to a secure random key in prod
 # ---------- Config ----------
 # Turn off TF-IDF in tight-memory environments (Render free) via env var
 DISABLE_HEAVY_ML = os.getenv("DISABLE_HEAVY_ML", "0") == "1"
+# Share of the matrix-factorization score in hybrid blends (rest is TF-IDF)
+HYBRID_MF_WEIGHT = float(os.getenv("HYBRID_MF_WEIGHT", "0.5"))
+# Load/build the TF-IDF model at startup instead of on the first request
+ML_WARMUP = os.getenv("ML_WARMUP", "1") == "1"
+# Build missing artifacts before serving (gunicorn --preload: the master must be
+# fully loaded before it forks, a background thread would not survive the fork)
+ML_WARMUP_BLOCKING = os.getenv("ML_WARMUP_BLOCKING", "0") == "1"
+# Materialise each rated user's hybrid list on a background thread (per process)
+HYBRID_PRECOMPUTE = os.getenv("HYBRID_PRECOMPUTE", "1") == "1"
+# Seconds between passes (ratings changes also wake the worker right away)
+HYBRID_PRECOMPUTE_INTERVAL = float(os.getenv("HYBRID_PRECOMPUTE_INTERVAL", "30"))
+# Seconds between checks for a new snapshot / data file (0 = only via POST /api/admin/reload)
+DATASET_WATCH_INTERVAL = float(os.getenv("DATASET_WATCH_INTERVAL", "60"))
+# Shared secret for POST /api/admin/reload (X-Reload-Token); unset = endpoint disabled
+RELOAD_TOKEN = os.getenv("RELOAD_TOKEN", "")
+# Per-worker memory bound / client max-age for cached read-only API responses
+RESPONSE_CACHE_MB = float(os.getenv("RESPONSE_CACHE_MB", "32"))
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "60"))
+
+# ETag'd LRU over /api/filters, /api/restaurants, ... (see response_cache.py).
+# Namespaces: "dataset" (catalogue version), "ratings", "model" (TF-IDF ready).
+# "dataset" is keyed on the catalogue the request pinned, not the live one.
+response_cache = ResponseCache(max_bytes=int(RESPONSE_CACHE_MB * 1024 * 1024),
+                               max_age=RESPONSE_CACHE_MAX_AGE,
+                               resolvers={"dataset": lambda: getattr(catalogue(), "version", None)})
+
+# Route + stage latency histograms served at /metrics (METRICS=0: spans are no-ops)
+METRICS_ENABLED = os.getenv("METRICS", "1") == "1"
+# Sampling profiler: dump hot stacks of requests slower than this (ms); 0 = off
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+metrics = Metrics(enabled=METRICS_ENABLED)
+profiler = None
+if PROFILE_SLOW_MS > 0:
+    profiler = SlowRequestProfiler(threshold=PROFILE_SLOW_MS / 1000, interval=PROFILE_INTERVAL_MS / 1000,
+                                   log_path=os.path.join("data", "slow_requests.log"))
+metrics.init_app(app, profiler)
+
+# Resized, content-hashed copies of static/images built by `python images.py`;
+# templates get image_url() / image_srcset(), hashed files are cached immutably
+image_variants = ImageVariants(app.static_folder, app.static_url_path)
+image_variants.init_app(app)
 
 # ---------- File paths ----------
 DATA_PATH = os.path.join("data", "restaurants.json")
-WISHLIST_PATH = os.path.join("data", "wishlist.json")
-USERS_PATH = os.path.join("data", "users.json")
-FEEDBACK_PATH = os.path.join("data", "feedback.json")
-RATINGS_PATH = os.path.join("data", "ratings.json")  # collaborative filtering storage
+SNAPSHOT_DIR = os.path.join("data", "snapshot")  # binary catalogue written by `python ingest.py`
+WISHLIST_PATH = os.path.join("data", "wishlist.json")  # legacy global wishlist, imported once
+USERS_PATH = os.path.join("data", "users.json")  # legacy accounts, imported once
+ACCOUNTS_DB_PATH = os.path.join("data", "accounts.db")  # users + per-user wishlists (SQLite)
+FEEDBACK_PATH = os.path.join("data", "feedback.json")  # legacy feedback, imported once
+FEEDBACK_DB_PATH = os.path.join("data", "feedback.db")  # append-only, time-indexed (SQLite)
+FEEDBACK_PAGE_SIZE = int(os.getenv("FEEDBACK_PAGE_SIZE", "20"))
+RATINGS_PATH = os.path.join("data", "ratings.json")  # legacy ratings, imported into the log once
+RATINGS_LOG_PATH = os.path.join("data", "ratings.jsonl")  # append-only ratings log (CF storage)
+MF_DIR = os.path.join("data", "mf")  # ALS factors written by `python mf.py train`
+MODEL_DIR = os.path.join("data", "model")  # TF-IDF + top-K artifacts, one dir per dataset hash
+NEIGHBORS_K = int(os.getenv("NEIGHBORS_K", neighbors.DEFAULT_K))
+# Most names + ids accepted by one /api/recommend/batch call
+RECOMMEND_BATCH_MAX = int(os.getenv("RECOMMEND_BATCH_MAX", "500"))
+# Optional JSON overriding the weather / time-of-day trending rules and weights
+TRENDING_RULES_PATH = os.getenv("TRENDING_RULES_PATH", os.path.join("data", "trending_rules.json"))
 
 # ---------- Safe JSON helpers ----------
 def load_json(path, default=None):
@@ -30,31 +104,28 @@ def load_json(path, default=None):
     if not os.path.exists(path):
         return default
     try:
-        with open(path, "r", encoding="utf-8") as f:
+        with metrics.span("json.load"), open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception:
         return default
 
 def save_json(path, data):
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
+    with metrics.span("json.save"), open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
-def load_wishlist(): return load_json(WISHLIST_PATH, [])
-def save_wishlist(wishlist): save_json(WISHLIST_PATH, wishlist)
-def load_users(): return load_json(USERS_PATH, [])
-def save_users(users): save_json(USERS_PATH, users)
-def load_feedback(): return load_json(FEEDBACK_PATH, [])
-def save_feedback(feedback): save_json(FEEDBACK_PATH, feedback)
+feedback_store = FeedbackStore(FEEDBACK_DB_PATH, legacy_path=FEEDBACK_PATH)
+
+ratings_log = RatingsLog(RATINGS_LOG_PATH, legacy_path=RATINGS_PATH)
 
 def load_ratings():
-    """Ratings format: [{user, restaurant, rating, date}]"""
-    return load_json(RATINGS_PATH, [])
+    """Ratings format: [{user, restaurant, rating, date}] (latest per user + restaurant)"""
+    return ratings_log.all()
 
-def save_ratings(ratings): save_json(RATINGS_PATH, ratings)
+def save_ratings(ratings): ratings_log.replace(ratings)
 
 # If ratings file missing/empty, seed a tiny sample (won't overwrite real data)
-if not os.path.exists(RATINGS_PATH) or not load_ratings():
+if not load_ratings():
     sample_ratings = [
         {"user": "alice", "restaurant": "Domino's Pizza", "rating": 4.5, "date": "2025-09-19T10:00:00"},
         {"user": "alice", "restaurant": "KFC", "rating": 4.0, "date": "2025-09-19T10:05:00"},
@@ -71,74 +142,498 @@ if not os.path.exists(RATINGS_PATH) or not load_ratings():
     ]
     save_ratings(sample_ratings)
 
-# ---------- Load restaurants ----------
-restaurants = load_json(DATA_PATH, [])
-if not isinstance(restaurants, list):
-    restaurants = []
+# ---------- Collaborative filtering (in-memory, incremental) ----------
+cf = CFEngine(load_ratings())
+
+def _on_rating(entry):
+    response_cache.bump("ratings")
+    # entry=None: the log was reloaded (compaction / replace), start over
+    if entry is None:
+        cf.reset(ratings_log.index.values())
+    else:
+        try:
+            cf.rate(entry["user"], entry["restaurant"], float(entry["rating"]))
+        except (KeyError, TypeError, ValueError):
+            pass
+
+ratings_log.subscribe(_on_rating)
+
+def sync_cf():
+    """Pull ratings other workers appended to the log into the CF engine."""
+    ratings_log.refresh()
+    return cf
+
+# ---------- Matrix factorization (trained offline, memory-mapped) ----------
+_mf = None
+_mf_mtime = None
+
+def mf_model():
+    """Current ALS model, reloaded when `mf.py train` publishes a new one."""
+    global _mf, _mf_mtime
+    try:
+        mtime = os.path.getmtime(os.path.join(MF_DIR, "meta.json"))
+    except OSError:
+        return None
+    if mtime != _mf_mtime:
+        model = MFModel.load(MF_DIR)
+        if model is not None:
+            _mf, _mf_mtime = model, mtime
+    return _mf
+
+# ---------- Catalogue (versioned, swapped in place on reload; see dataset.py) ----------
+# Everything derived from the restaurant list (store, indexes, aggregates,
+# trending scorer, JSON fragments, TF-IDF model) lives on one Catalogue.
+# Requests pin the live one when they start, so a reload never changes the
+# data under a request that is already running.
+def dataset_version():
+    """Version of the dataset on disk: the snapshot named by CURRENT, else the JSON file's stamp."""
+    version = current_version(SNAPSHOT_DIR)
+    if version is not None:
+        return version
+    try:
+        st = os.stat(DATA_PATH)
+        return f"json-{st.st_mtime_ns}-{st.st_size}"
+    except OSError:
+        return "empty"
+
+def build_catalogue(version, warm_ml=False):
+    """Load the snapshot built by ingest.py (or the JSON file) into a new Catalogue."""
+    snap = load_snapshot(SNAPSHOT_DIR)
+    if snap is not None:
+        # rows stay in the mapped columns; a dict is built only for a row being served
+        records, version = snap.records(), snap.version
+        print(f"✅ Loaded snapshot {snap.version} ({snap.rows} restaurants)")
+    else:
+        records = load_json(DATA_PATH, [])
+        if not isinstance(records, list):
+            records = []
+    c = Catalogue(version, records, snapshot=snap, trending_rules=load_rules(TRENDING_RULES_PATH),
+                  dumps=json_dumps, projections={"rows": None, "rec": rec_fields, "trending": trending_fields})
+    if warm_ml:
+        init_ml(c)  # reloads: the model is ready before the catalogue goes live
+    return c
+
+def _rated_rows(c, entries):
+    for e in entries:
+        try:
+            yield e["user"], c.index.row_for_name(e["restaurant"]), float(e["rating"])
+        except (KeyError, TypeError, ValueError):
+            continue
 
-# ---------- ML (content-based) — memory-safe lazy init ----------
-# We avoid building an N×N cosine matrix. We only build the TF-IDF matrix once,
-# and compute similarities for the requested item on the fly.
-df = None
-tfidf_matrix = None
+def _fold_ratings(c):
+    ratings_log.refresh()
+    c.aggregates.reset_ratings(_rated_rows(c, ratings_log.index.values()))
 
-def init_ml():
-    """Lazily build dataframe + TF-IDF matrix (skips if disabled)."""
-    global df, tfidf_matrix
+def _aggregate_rating(entry):
+    # the live catalogue and one being prepared for a swap both count ratings
+    for c in datasets.catalogues():
+        # entry=None: the log was reloaded, recount everything
+        if entry is None:
+            c.aggregates.reset_ratings(_rated_rows(c, ratings_log.index.values()))
+        else:
+            for user, row, rating in _rated_rows(c, [entry]):
+                c.aggregates.add_rating(user, row, rating)
+
+def _on_swap(old, new):
+    response_cache.set_version("dataset", new.version)
+    if old is not None:
+        # precomputed hybrid lists hold row ids of the old catalogue
+        hybrid_store.mark_all()
+
+datasets = DatasetManager(lambda version: build_catalogue(version, warm_ml=ML_WARMUP), dataset_version,
+                          prepare=[_fold_ratings], interval=DATASET_WATCH_INTERVAL)
+datasets.subscribe(_on_swap)
+ratings_log.subscribe(_aggregate_rating)
+
+_pinned = threading.local()
+
+def catalogue():
+    """The catalogue this request (or background job) started with, else the live one."""
+    c = getattr(_pinned, "catalogue", None)
+    return c if c is not None else datasets.current
+
+@contextlib.contextmanager
+def pinned(c):
+    """Run a block against catalogue `c` (background jobs outside a request)."""
+    prev = getattr(_pinned, "catalogue", None)
+    _pinned.catalogue = c
+    try:
+        yield c
+    finally:
+        _pinned.catalogue = prev
+
+@app.before_request
+def _pin_catalogue():
+    if DATASET_WATCH_INTERVAL > 0:
+        datasets.ensure_started()
+    _pinned.catalogue = datasets.current
+
+@app.teardown_request
+def _unpin_catalogue(exc=None):
+    _pinned.catalogue = None
+
+# ---------- ML (content-based) — persisted, memory-mapped model ----------
+# We avoid building an N×N cosine matrix. The TF-IDF matrix and the top-K
+# neighbours of every row (see neighbors.py) are saved under MODEL_DIR keyed by
+# a hash of the dataset and memory-mapped at boot; if they are missing they are
+# built in a background thread, never inside a request. Each Catalogue holds
+# its own model (tfidf_matrix, tfidf_key, neighbor_table, ml_state).
+def model_path(c):
+    return tfidf_store.artifact_dir(MODEL_DIR, c.tfidf_key)
+
+def init_ml(c=None, load_neighbors=True):
+    """Load the TF-IDF artifacts for catalogue `c`, fitting + saving them if missing."""
+    c = c or catalogue()
     if DISABLE_HEAVY_ML:
+        c.ml_state = "disabled"
         print("⚠️ TF-IDF disabled via DISABLE_HEAVY_ML=1")
         return
-    if df is not None and tfidf_matrix is not None:
+    with c.ml_lock:
+        if c.ml_ready:
+            return
+        try:
+            c.ml_state = "loading"
+            with metrics.span("ml.texts"):
+                texts = tfidf_store.tfidf_texts(c.restaurants)
+                c.tfidf_key = tfidf_store.dataset_key(texts)
+            with metrics.span("ml.load"):
+                matrix = tfidf_store.load_matrix(model_path(c))
+            if matrix is None or matrix.shape[0] != len(c.restaurants):
+                c.ml_state = "building"
+                with metrics.span("ml.fit"):
+                    vectorizer, matrix = tfidf_store.fit(texts)
+                with metrics.span("ml.save"):
+                    tfidf_store.save(model_path(c), vectorizer, matrix)
+                tfidf_store.prune(MODEL_DIR, keep=c.tfidf_key)
+                # serve from the mmap'd copy so workers share the page cache
+                saved = tfidf_store.load_matrix(model_path(c))
+                if saved is not None:
+                    matrix = saved
+                print(f"✅ TF-IDF fitted and saved (rows={matrix.shape[0]}, key={c.tfidf_key})")
+            else:
+                print(f"✅ TF-IDF loaded (rows={matrix.shape[0]}, key={c.tfidf_key})")
+        except Exception as e:
+            # If anything goes wrong (memory, etc.), keep it None so we fall back later
+            c.tfidf_matrix = None
+            c.ml_state = "failed"
+            print("⚠️ TF-IDF init failed:", e)
+            return
+
+        if load_neighbors:
+            with metrics.span("ml.neighbors"):
+                load_neighbor_table(c, matrix)
+        # publish only now: until the table exists requests would run cosine
+        # products inline, so they keep falling back to trending instead
+        c.tfidf_matrix = matrix
+        c.ml_state = "ready"
+        # drop the trending fallbacks cached while the model was warming up
+        response_cache.bump("model")
+
+def build_neighbor_table(c=None, k=None, matrix=None):
+    """Compute the top-K table from the catalogue's TF-IDF matrix (or `matrix`) and save it."""
+    c = c or catalogue()
+    matrix = c.tfidf_matrix if matrix is None else matrix
+    indices, scores = neighbors.build_topk(matrix, k=k or NEIGHBORS_K)
+    neighbors.save_topk(model_path(c), indices, scores)
+    c.neighbor_table = (indices, scores)
+
+def load_neighbor_table(c, matrix):
+    """Use the saved top-K table for this dataset, else build it from `matrix`."""
+    table = neighbors.load_topk(model_path(c))
+    if table is not None and len(table[0]) == matrix.shape[0]:
+        c.neighbor_table = table
+        print(f"✅ Neighbour table loaded (k={table[0].shape[1]})")
         return
     try:
-        import numpy as np
-        from sklearn.feature_extraction.text import TfidfVectorizer
+        build_neighbor_table(c, matrix=matrix)
+        print(f"✅ Neighbour table built (k={c.neighbor_table[0].shape[1]})")
+    except Exception as e:
+        c.neighbor_table = None
+        print("⚠️ Neighbour table build failed:", e)
 
-        _df = pd.DataFrame(restaurants)
-        if "Cuisines" not in _df.columns: _df["Cuisines"] = ""
-        if "City" not in _df.columns: _df["City"] = ""
-        if "Restaurant Name" not in _df.columns: _df["Restaurant Name"] = _df.index.astype(str)
+def start_ml(c):
+    """Boot: mmap saved artifacts right away, or build them on a background thread."""
+    if DISABLE_HEAVY_ML:
+        init_ml(c)
+        return
+    texts = tfidf_store.tfidf_texts(c.restaurants)
+    path = tfidf_store.artifact_dir(MODEL_DIR, tfidf_store.dataset_key(texts))
+    if ML_WARMUP_BLOCKING or (tfidf_store.load_matrix(path) is not None
+                              and neighbors.load_topk(path) is not None):
+        init_ml(c)
+    else:
+        threading.Thread(target=init_ml, args=(c,), name="ml-warmup", daemon=True).start()
+
+def resolve_row(name="", restaurant_id=None):
+    """Row of a restaurant by `Restaurant ID` (preferred) or exact name."""
+    c = catalogue()
+    if restaurant_id not in (None, ""):
+        return c.index.row_for_id(restaurant_id)
+    return c.index.row_for_name(name)
+
+def recommend_rows(name, n=5, restaurant_id=None):
+    """Row ids of content-based recommendations: top-K table lookup, cosine on the fly as fallback."""
+    c = catalogue()
+    if not c.ml_ready:
+        return []  # model still warming up / disabled; API falls back to trending
+
+    # matrix rows line up with `restaurants`, so the index gives the row directly
+    with metrics.span("recommend.resolve"):
+        idx = resolve_row(name, restaurant_id)
+    if idx is None or idx >= c.tfidf_matrix.shape[0]:
+        return []
 
-        text = (_df["Cuisines"].fillna("") + " " + _df["City"].fillna("")).astype(str)
+    with metrics.span("recommend.similar"):
+        order, _ = similar_rows(idx, n)
+    return [int(i) for i in order]
+
+def recommend_restaurants(name, n=5, restaurant_id=None):
+    rows = recommend_rows(name, n, restaurant_id)
+    restaurants = catalogue().restaurants
+    with metrics.span("recommend.fields"):
+        return [rec_fields(restaurants[i]) for i in rows]
+
+def similar_rows(idx, n):
+    """(rows, cosine scores) of the `n` restaurants most similar to row `idx`."""
+    c = catalogue()
+    tfidf_matrix, neighbor_table = c.tfidf_matrix, c.neighbor_table
+    if neighbor_table is not None and idx < len(neighbor_table[0]) and n <= neighbor_table[0].shape[1]:
+        return neighbor_table[0][idx, :n], neighbor_table[1][idx, :n]
+    # similarity = (vector of the restaurant) dot (all vectors)^T, skipping itself
+    sim_row = (tfidf_matrix[idx] @ tfidf_matrix.T).toarray()
+    rows, scores = neighbors.top_k(sim_row, n, exclude=[idx])
+    return rows[0], scores[0]
+
+def similar_rows_batch(rows, n):
+    """(indices[len(rows), n], scores) for many rows: one table lookup, or one blocked product."""
+    c = catalogue()
+    tfidf_matrix, neighbor_table = c.tfidf_matrix, c.neighbor_table
+    rows = np.asarray(rows, dtype=np.int64)
+    if neighbor_table is not None and n <= neighbor_table[0].shape[1] and \
+            (not len(rows) or rows.max() < len(neighbor_table[0])):
+        return neighbor_table[0][rows, :n], neighbor_table[1][rows, :n]
+    return neighbors.query_topk(tfidf_matrix, rows, k=n)
+
+def recommend_batch(names=(), ids=(), n=5):
+    """Recommendations for many restaurants at once, keyed by input.
+
+    Returns {"names": {name: [...]}, "ids": {id: [...]}} where each list is
+    what /api/recommend gives for that input: similar restaurants with
+    explanations, or trending picks when the model is not ready or the
+    input is unknown.
+    """
+    c = catalogue()
+    restaurants = c.restaurants
+    inputs = [("names", x, resolve_row(name=x)) for x in names] + \
+             [("ids", x, resolve_row(restaurant_id=x)) for x in ids]
+    out = {"names": {}, "ids": {}}
+    known = []
+    if c.ml_ready:
+        known = sorted({row for _, _, row in inputs if row is not None and row < c.tfidf_matrix.shape[0]})
+    similar = {}
+    if known:
+        indices, _ = similar_rows_batch(known, n)
+        similar = dict(zip(known, indices.tolist()))
+
+    fallback = None
+    for kind, key, row in inputs:
+        if row in similar:
+            results = [rec_fields(restaurants[i]) for i in similar[row]]
+            explain_similar(results, restaurants[row])
+        else:
+            fallback = fallback or trending_fallback()
+            results = [dict(r) for r in fallback]
+        out[kind][key] = results
+    return out
+
+TRENDING_PICK = "Trending pick ⭐"
+
+def trending_fields(r):
+    return {
+        "Restaurant Name": r.get("Restaurant Name", ""),
+        "City": r.get("City", ""),
+        "Cuisines": r.get("Cuisines", ""),
+        "Aggregate rating": safe_float(r.get("Aggregate rating", 0)),
+        "Votes": safe_int(r.get("Votes", 0)),
+    }
+
+def trending_fallback(n=5):
+    """Top trending picks in /api/recommend's shape (model disabled / warming up)."""
+    c = catalogue()
+    return [dict(trending_fields(c.restaurants[i]), explanation=TRENDING_PICK)
+            for i in c.trending.top(k=n).tolist()]
+
+def similar_explanation(r, base):
+    """Explanation text for recommending `r` to someone looking at `base`."""
+    reasons = []
+    if base:
+        if r.get("Cuisines") and base.get("Cuisines") and r["Cuisines"].split(",")[0] in base["Cuisines"]:
+            reasons.append(f"Similar cuisine 🍽 ({r['Cuisines']})")
+        if r.get("City") == base.get("City"):
+            reasons.append(f"Same city 🏙 ({r['City']})")
+    rating = safe_float(r.get("Aggregate rating", 0))
+    if rating >= 4.5:
+        reasons.append(f"Highly rated ⭐ {rating}")
+    elif rating >= 4.0:
+        reasons.append(f"Good rating ⭐ {rating}")
+    if not reasons:
+        reasons.append("Similar restaurant by overall profile")
+    return " | ".join(reasons)
 
-        vectorizer = TfidfVectorizer(stop_words="english", max_features=20000, dtype=np.float32)
-        _tfidf = vectorizer.fit_transform(text)
+def explain_similar(results, base):
+    """Set each result's explanation relative to the `base` restaurant."""
+    for r in results:
+        r["explanation"] = similar_explanation(r, base)
+    return results
+
+def rec_fields(r):
+    cols = ["Restaurant Name", "City", "Cuisines", "Aggregate rating", "Votes"]
+    return {c: r.get(c) for c in cols}
+
+# ---------- Pre-serialised JSON (once per dataset version) ----------
+# List endpoints join these per-row byte fragments (catalogue().json["rows" |
+# "rec" | "trending"]) instead of re-encoding the same dicts on every request;
+# only `explanation` is encoded per request.
+def json_dumps(obj):
+    """What jsonify() would encode `obj` to (sorted keys, compact)."""
+    return app.json.dumps(obj, separators=(",", ":"))
+
+def json_body_response(body):
+    """Response for an already-encoded JSON body."""
+    return app.response_class(body + b"\n", mimetype=app.json.mimetype)
+
+def trending_fallback_json(n=5):
+    """trending_fallback() as an encoded JSON array."""
+    c = catalogue()
+    trending_json = c.json["trending"]
+    return trending_json.array(trending_json.splice(i, explanation=TRENDING_PICK)
+                               for i in c.trending.top(k=n).tolist())
+
+# ---------- Load the catalogue ----------
+datasets.load(build_catalogue)  # model warmed up below, in the background if it has to be built
+if ML_WARMUP:
+    start_ml(datasets.current)
+
+# ---------- Users + wishlists (SQLite, indexed by username / restaurant id) ----------
+def restaurant_id_for(name):
+    c = catalogue()
+    row = c.index.row_for_name(name)
+    return c.restaurants[row].get("Restaurant ID") if row is not None else None
+
+accounts = AccountStore(ACCOUNTS_DB_PATH, legacy_users=USERS_PATH, legacy_wishlist=WISHLIST_PATH,
+                        resolve_id=restaurant_id_for)
 
-        df = _df
-        tfidf_matrix = _tfidf
-        print(f"✅ TF-IDF ready (rows={len(df)}, features≤20000)")
-    except Exception as e:
-        # If anything goes wrong (memory, etc.), keep them None so we fall back later
-        df, tfidf_matrix = None, None
-        print("⚠️ TF-IDF init failed:", e)
+# ---------- Helpers ----------
+# /api/restaurants runs as stages over row ids: filter_restaurants() ->
+# store.top() (partial sort of one page) -> json["rows"].splice() (each row's
+# cached JSON plus its explanation). Nothing touches the shared record dicts.
+def filter_restaurants(search="", cities=None, cuisines=None, min_rating=None):
+    """Row ids matching the filters, in catalogue order (relevance order for a search).
+
+    City / cuisine filters intersect posting lists, rating is a column mask.
+    """
+    c = catalogue()
+    index = c.index
+    rows = None
+    if cities:
+        rows = intersect(rows, index.city_rows(cities))
+    if cuisines:
+        rows = intersect(rows, index.cuisine_rows(cuisines))
+    if rows is None:
+        rows = np.arange(len(c.restaurants))
+    if min_rating is not None:
+        rows = c.store.rating_rows(rows, min_rating)
+    if search:
+        rows, _ = index.search(search, rows)
+    return rows
+
+def query_restaurants(search="", cities=None, cuisines=None, min_rating=None, sort=""):
+    """Filter + fully order the catalogue; returns row ids into its `restaurants`."""
+    rows = filter_restaurants(search, cities, cuisines, min_rating)
+    return catalogue().store.order(rows, sort)
+
+def restaurant_query(args):
+    """(filter_restaurants() kwargs, sort) from /api/restaurants-style parameters in `args`."""
+    search = str(args.get("search", "") or "").strip().lower()
+    cities_raw = str(args.get("city", "") or "").strip()
+    cuisines_raw = str(args.get("cuisine", "") or "").strip()
+    rating = str(args.get("rating", "") or "").strip()
+    sort = str(args.get("sort", "") or "").strip()
+
+    city_list = [c.strip() for c in cities_raw.split(",") if c.strip()] if cities_raw else []
+    cuisine_list = [c.strip().lower() for c in cuisines_raw.split(",") if c.strip()] if cuisines_raw else []
 
-def recommend_restaurants(name, n=5):
-    """Content-based recommendations using per-request cosine similarity."""
-    if tfidf_matrix is None or df is None:
-        init_ml()
-    if tfidf_matrix is None or df is None:
-        return []  # will fall back in API
+    min_rating = None
+    if rating:
+        try:
+            min_rating = float(rating)
+        except Exception:
+            pass
+    return {"search": search, "cities": city_list, "cuisines": cuisine_list, "min_rating": min_rating}, sort
 
+def encode_cursor(key, pos):
+    raw = json.dumps([float(key), int(pos), catalogue().version]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor):
+    """(key, position) from encode_cursor(); None if malformed or from another dataset."""
     try:
-        mask = df["Restaurant Name"].astype(str) == str(name)
-        if not mask.any():
-            return []
-        idx = int(df[mask].index[0])
-    except Exception:
-        return []
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, pos, version = json.loads(raw)
+        if version != catalogue().version:
+            return None
+        return float(key), int(pos)
+    except (ValueError, TypeError):
+        return None
+
+def explain_match(r, mood="", time="", budget="", group=""):
+    """Reasons text shown next to a row of /api/restaurants."""
+    reasons = []
+    if mood and mood in str(r.get("Mood", "")).lower():
+        reasons.append(f"Mood={mood.title()}")
+    if time and time in str(r.get("Time", "")).lower():
+        reasons.append(f"Time={time.title()}")
+    if budget and budget in str(r.get("Budget", "")).lower():
+        reasons.append(f"Budget={budget.title()}")
+    if group and group in str(r.get("Group", "")).lower():
+        reasons.append(f"Group={group}")
+
+    ar = safe_float(r.get("Aggregate rating", 0))
+    if ar >= 4.5:
+        reasons.append(f"Highly rated ⭐ {ar}")
+    elif ar >= 4.0:
+        reasons.append(f"Good rating ⭐ {ar}")
 
-    # similarity = (vector of the restaurant) dot (all vectors)^T
-    sim_row = (tfidf_matrix[idx] @ tfidf_matrix.T).toarray().ravel()
-    # rank, skip self at 0
-    order = sim_row.argsort()[::-1]
-    order = [i for i in order if i != idx][:n]
+    v = safe_int(r.get("Votes", 0))
+    if v >= 500:
+        reasons.append(f"Popular (votes: {v})")
+    elif v >= 200:
+        reasons.append(f"Well-reviewed (votes: {v})")
 
-    recs = df.iloc[order][
-        ["Restaurant Name", "City", "Cuisines", "Aggregate rating", "Votes"]
-    ].to_dict(orient="records")
-    return recs
+    cuisines = str(r.get("Cuisines", "")).strip()
+    if cuisines:
+        first_cuisine = cuisines.split(",")[0].strip()
+        if first_cuisine:
+            reasons.append(f"Cuisine: {first_cuisine}")
+
+    if r.get("City"):
+        reasons.append(f"City: {r.get('City')}")
+
+    if not reasons:
+        reasons = ["General match"]
+    return " | ".join(reasons)
+
+def explained_rows(rows, **prefs):
+    """Lazily yield per-request copies of `rows` carrying their explanation."""
+    restaurants = catalogue().restaurants  # bound now: the page streams after the request returns
+    return _explained(restaurants, rows, prefs)
+
+def _explained(restaurants, rows, prefs):
+    for i in rows:
+        r = dict(restaurants[i])
+        r["explanation"] = explain_match(r, **prefs)
+        yield r
 
-# ---------- Helpers ----------
 def safe_float(x, default=0.0):
     try:
         return float(x)
@@ -204,63 +699,27 @@ def homepage():
 def restaurants_page():
     """
     Render the main 'All Restaurants' page.
-    Adds explanation badges and computes simple insights for charts.
+    Only the first page of the grid is rendered here (streamed, so the header
+    reaches the browser right away); main.js loads further pages from
+    /api/restaurants. Insights come from the precomputed aggregates.
     """
-    user_prefs = session.get("user_prefs", {"cuisines": [], "budget": None, "city": None})
-
-    # Add explanation + normalize keys used in templates
-    updated_restaurants = []
-    for r in restaurants:
-        expl = explain_recommendation(user_prefs, r)
-        r_copy = dict(r)
-        r_copy["explanation"] = expl["text"]
-        r_copy["explain_class"] = expl["class"]
-
-        if "Restaurant Name" not in r_copy and "name" in r_copy:
-            r_copy["Restaurant Name"] = r_copy.get("name")
-        if "Aggregate rating" not in r_copy:
-            r_copy["Aggregate rating"] = r_copy.get("rating") or r_copy.get("Aggregate rating", 0)
-        if "Votes" not in r_copy:
-            r_copy["Votes"] = r_copy.get("votes", 0)
-        if "Average Cost for two" not in r_copy:
-            r_copy["Average Cost for two"] = r_copy.get("cost", r_copy.get("Average Cost for two", 0))
-
-        updated_restaurants.append(r_copy)
-
-    # Insights
-    cuisines_counter = Counter()
-    for r in restaurants:
-        c_field = r.get("Cuisines") or r.get("cuisine") or ""
-        for part in str(c_field).split(","):
-            cs = part.strip()
-            if cs:
-                cuisines_counter[cs] += 1
-    top_cuisines = cuisines_counter.most_common(5)
-
-    cities_counter = Counter()
-    for r in restaurants:
-        city = r.get("City") or r.get("city") or ""
-        if city:
-            cities_counter[str(city).strip()] += 1
-    top_cities = cities_counter.most_common(5)
-
-    top_rated = sorted(
-        restaurants,
-        key=lambda x: safe_float(x.get("Aggregate rating", x.get("rating", 0))),
-        reverse=True
-    )[:5]
-
-    top_rated_normalized = [{
-        "name": r.get("Restaurant Name") or r.get("name") or r.get("Restaurant_name") or str(r.get("Restaurant Name", "")),
-        "rating": safe_float(r.get("Aggregate rating", r.get("rating", 0)))
-    } for r in top_rated]
-
-    return render_template(
+    per_page = 20
+    c = catalogue()
+    restaurants, aggregates = c.restaurants, c.aggregates
+
+    top_rated = [{
+        "name": restaurants[i].get("Restaurant Name", ""),
+        "rating": float(c.store.rating[i])
+    } for i in aggregates.top_rated(5).tolist()]
+
+    return stream_template(
         "restaurant.html",
-        restaurants=updated_restaurants,
-        cuisines=top_cuisines,
-        cities=top_cities,
-        top_rated=top_rated_normalized
+        restaurants=explained_rows(range(min(per_page, len(restaurants)))),
+        total=len(restaurants),
+        per_page=per_page,
+        cuisines=aggregates.top_cuisines(5),
+        cities=aggregates.top_cities(5),
+        top_rated=top_rated
     )
 
 @app.route("/wishlist")
@@ -279,20 +738,14 @@ def contact_feedback_page():
         email = request.form.get("email", "").strip()
         message = request.form.get("message", "").strip()
 
-        feedback = load_feedback()
-        entry = {
-            "type": form_type or "contact",
-            "name": name,
-            "email": email,
-            "message": message,
-            "rating": None,
-            "date": datetime.datetime.now().strftime("%b %d, %Y - %I:%M %p")
-        }
-        if form_type == "feedback":
-            entry["rating"] = request.form.get("rating")
-
-        feedback.append(entry)
-        save_feedback(feedback)
+        feedback_store.add(
+            type=form_type or "contact",
+            name=name,
+            email=email,
+            message=message,
+            rating=request.form.get("rating") if form_type == "feedback" else None,
+            created=datetime.datetime.now().isoformat(timespec="seconds"),
+        )
 
         if form_type == "feedback":
             flash("✅ Thank you for your feedback!", "success")
@@ -301,21 +754,21 @@ def contact_feedback_page():
 
         return redirect(url_for("contact_feedback_page"))
 
-    feedback_list = [f for f in load_feedback() if f.get("type") == "feedback"]
-    feedback_list = sorted(feedback_list, key=lambda x: x.get("date", ""), reverse=True)
-    return render_template("contact_feedback.html", feedback=feedback_list)
+    # newest page only; older ones via ?before=<cursor>
+    before = request.args.get("before")
+    feedback_list, next_cursor = feedback_store.page("feedback", FEEDBACK_PAGE_SIZE, before=before)
+    return render_template("contact_feedback.html", feedback=feedback_list, next_cursor=next_cursor,
+                           older=bool(before))
 
 @app.route("/auth", methods=["GET", "POST"])
 def auth_page():
-    users = load_users()
     if request.method == "POST":
         form_type = request.form.get("form_type")
 
         if form_type == "login":
             username = request.form.get("username", "").strip()
             password = request.form.get("password", "")
-            user = next((u for u in users if u.get("username") == username and u.get("password") == password), None)
-            if user:
+            if accounts.check_login(username, password):
                 session["user"] = username
                 flash("✅ Login successful!", "success")
                 return redirect(url_for("homepage"))
@@ -329,11 +782,9 @@ def auth_page():
 
             if not username or not password:
                 flash("⚠️ Username and password are required", "error")
-            elif any(u.get("username") == username for u in users):
+            elif not accounts.create_user(username, email, password):
                 flash("⚠️ Username already taken!", "error")
             else:
-                users.append({"username": username, "email": email, "password": password})
-                save_users(users)
                 flash("✅ Signup successful! Please login.", "success")
 
         return redirect(url_for("auth_page"))
@@ -348,110 +799,177 @@ def logout():
 
 # ---------- API: Restaurants ----------
 @app.route("/api/restaurants")
+@response_cache.cached(depends=("dataset",))
 def get_restaurants():
-    search = request.args.get("search", "").strip().lower()
-    cities_raw = request.args.get("city", "").strip()
-    cuisines_raw = request.args.get("cuisine", "").strip()
-    rating = request.args.get("rating", "").strip()
-    sort = request.args.get("sort", "").strip()
+    filters, sort = restaurant_query(request.args)
 
     mood = request.args.get("mood", "").strip().lower()
     time = request.args.get("time", "").strip().lower()
     budget = request.args.get("budget", "").strip().lower()
     group = request.args.get("group", "").strip().lower()
 
-    page = int(request.args.get("page", 1) or 1)
+    page = max(safe_int(request.args.get("page", 1) or 1, 1), 1)
     per_page = 20
+    cursor = request.args.get("cursor", "").strip()
+
+    c = catalogue()
+    store, row_json = c.store, c.json["rows"]
+    with metrics.span("restaurants.filter"):
+        rows = filter_restaurants(**filters)
+    total = len(rows)
+
+    # ?cursor= (from next_cursor) resumes after the last row served; ?page=N
+    # only partially sorts the first N pages. A cursor has no page number.
+    if cursor:
+        after = decode_cursor(cursor)
+        if after is None:
+            return jsonify({"message": "invalid or expired cursor"}), 400
+        with metrics.span("restaurants.sort"):
+            page_rows, keys, positions = store.top(rows, sort, per_page, after=after)
+        page = None
+    else:
+        offset = (page - 1) * per_page
+        if offset and offset >= total:
+            pages = (total + per_page - 1) // per_page
+            return jsonify({"message": "page out of range", "total": total, "pages": pages}), 404
+        with metrics.span("restaurants.sort"):
+            page_rows, keys, positions = store.top(rows, sort, offset + per_page)
+        page_rows, keys, positions = page_rows[offset:], keys[offset:], positions[offset:]
+
+    with metrics.span("restaurants.serialize"):
+        paginated = row_json.array(
+            row_json.splice(i, explanation=explain_match(c.restaurants[i], mood=mood, time=time, budget=budget,
+                                                         group=group))
+            for i in page_rows.tolist())
+        next_cursor = None
+        if len(positions) == per_page:
+            next_cursor = encode_cursor(keys[-1], positions[-1])
+        body = row_json.object({"restaurants": paginated, "total": total, "page": page,
+                                "per_page": per_page, "next_cursor": next_cursor})
+    return json_body_response(body)
+
+# ---------- API: Bulk export (streamed NDJSON / CSV, see export.py) ----------
+def export_lines(what, args):
+    """(catalogue, format, line generator) exporting `what`: "restaurants" or "recommendations".
+
+    `args` holds the /api/restaurants filter + sort parameters plus format,
+    fields, limit and k (request.args, or the CLI's options). Raises
+    ValueError on a bad format.
+    """
+    fmt = str(args.get("format", "") or "ndjson").strip().lower()
+    if fmt not in export.FORMATS:
+        raise ValueError(f"format must be one of {', '.join(sorted(export.FORMATS))}")
+    c = catalogue()
+    filters, sort = restaurant_query(args)
+    with metrics.span("export.query"):
+        rows = query_restaurants(sort=sort, **filters)
+    limit = safe_int(args.get("limit", 0), 0)
+    if limit > 0:
+        rows = rows[:limit]
+    if what == "recommendations":
+        k = min(max(safe_int(args.get("k", 5), 5), 1), 50)
+        return c, fmt, export.recommendation_lines(c, rows, k, similar_rows_batch, fmt, dumps=json_dumps)
+    fields = [f.strip() for f in str(args.get("fields", "") or "").split(",") if f.strip()] or None
+    return c, fmt, export.restaurant_lines(c, rows, fmt, fields, dumps=json_dumps)
+
+def export_response(what):
+    try:
+        c, fmt, lines = export_lines(what, request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
 
-    city_list = [c.strip() for c in cities_raw.split(",") if c.strip()] if cities_raw else []
-    cuisine_list = [c.strip().lower() for c in cuisines_raw.split(",") if c.strip()] if cuisines_raw else []
+    def body():
+        # the stream outlives the request: keep reading the catalogue it started on
+        with pinned(c):
+            yield from export.chunked(lines)
 
-    filtered = restaurants
+    resp = app.response_class(body(), mimetype=export.FORMATS[fmt])
+    resp.headers["Content-Disposition"] = f'attachment; filename="{what}-{c.version}.{fmt}"'
+    resp.headers["X-Dataset-Version"] = c.version
+    return resp
 
-    if search:
-        filtered = [r for r in filtered if search in str(r.get("Restaurant Name", "")).lower()]
-    if city_list:
-        filtered = [r for r in filtered if str(r.get("City", "")).strip() in city_list]
-    if cuisine_list:
-        def cuisine_matches(rr):
-            cuisines_field = str(rr.get("Cuisines", "")).lower()
-            return any(c in cuisines_field for c in cuisine_list)
-        filtered = [r for r in filtered if cuisine_matches(r)]
-    if rating:
-        try:
-            min_rating = float(rating)
-            filtered = [r for r in filtered if safe_float(r.get("Aggregate rating", 0)) >= min_rating]
-        except Exception:
-            pass
+@app.route("/api/export/restaurants")
+def export_restaurants():
+    """Every row /api/restaurants pages through (same filters + sort) in one streamed response.
 
-    # richer explanations
-    for r in filtered:
-        reasons = []
-        if mood and mood in str(r.get("Mood", "")).lower():
-            reasons.append(f"Mood={mood.title()}")
-        if time and time in str(r.get("Time", "")).lower():
-            reasons.append(f"Time={time.title()}")
-        if budget and budget in str(r.get("Budget", "")).lower():
-            reasons.append(f"Budget={budget.title()}")
-        if group and group in str(r.get("Group", "")).lower():
-            reasons.append(f"Group={group}")
-
-        ar = safe_float(r.get("Aggregate rating", 0))
-        if ar >= 4.5:
-            reasons.append(f"Highly rated ⭐ {ar}")
-        elif ar >= 4.0:
-            reasons.append(f"Good rating ⭐ {ar}")
-
-        v = safe_int(r.get("Votes", 0))
-        if v >= 500:
-            reasons.append(f"Popular (votes: {v})")
-        elif v >= 200:
-            reasons.append(f"Well-reviewed (votes: {v})")
-
-        cuisines = str(r.get("Cuisines", "")).strip()
-        if cuisines:
-            first_cuisine = cuisines.split(",")[0].strip()
-            if first_cuisine:
-                reasons.append(f"Cuisine: {first_cuisine}")
-
-        if r.get("City"):
-            reasons.append(f"City: {r.get('City')}")
-
-        if not reasons:
-            reasons = ["General match"]
-
-        r["explanation"] = " | ".join(reasons)
-
-    # sorting
+    ?format=ndjson (default) or csv, ?fields=a,b to pick columns, ?limit=N.
+    """
+    return export_response("restaurants")
+
+@app.route("/api/export/recommendations")
+def export_recommendations():
+    """Top-?k= (default 5) similar restaurants of every filtered row, streamed; 503 while warming up."""
+    if not catalogue().ml_ready:
+        return jsonify({"message": "model not ready"}), 503
+    return export_response("recommendations")
+
+# ---------- API: Nearby ----------
+@app.route("/api/nearby")
+@response_cache.cached(depends=("dataset",))
+def nearby_restaurants():
+    """Restaurants around ?lat=&lon= within ?radius= km (default 5), at most ?k= (default 10).
+
+    Accepts the same city / cuisine / rating filters as /api/restaurants.
+    ?sort=distance (default) returns the nearest first; ?sort=score ranks by
+    rating weighted down with distance.
+    """
     try:
-        if sort == "rating":
-            filtered = sorted(filtered, key=lambda rr: safe_float(rr.get("Aggregate rating", 0)), reverse=True)
-        elif sort == "votes":
-            filtered = sorted(filtered, key=lambda rr: safe_int(rr.get("Votes", 0)), reverse=True)
-        elif sort == "cost_low":
-            filtered = sorted(filtered, key=lambda rr: safe_int(rr.get("Average Cost for two", 0)))
-        elif sort == "cost_high":
-            filtered = sorted(filtered, key=lambda rr: safe_int(rr.get("Average Cost for two", 0)), reverse=True)
-    except Exception:
-        pass
+        lat = float(request.args.get("lat", ""))
+        lon = float(request.args.get("lon", ""))
+    except ValueError:
+        return jsonify({"message": "lat and lon required"}), 400
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({"message": "lat/lon out of range"}), 400
+    radius = min(max(safe_float(request.args.get("radius", 5), 5.0), 0.0), 500.0)
+    k = min(max(safe_int(request.args.get("k", 10), 10), 1), 100)
+    sort = request.args.get("sort", "distance").strip()
+
+    cities_raw = request.args.get("city", "").strip()
+    cuisines_raw = request.args.get("cuisine", "").strip()
+    city_list = [c.strip() for c in cities_raw.split(",") if c.strip()]
+    cuisine_list = [c.strip().lower() for c in cuisines_raw.split(",") if c.strip()]
+    min_rating = None
+    if request.args.get("rating", "").strip():
+        try:
+            min_rating = float(request.args.get("rating"))
+        except ValueError:
+            pass
 
-    total = len(filtered)
-    start = (page - 1) * per_page
-    end = start + per_page
-    paginated = filtered[start:end]
+    c = catalogue()
+    restaurants, store, geo = c.restaurants, c.store, c.geo
+    allowed = None
+    if city_list or cuisine_list or min_rating is not None:
+        rows = query_restaurants(cities=city_list, cuisines=cuisine_list, min_rating=min_rating)
+        allowed = np.zeros(len(restaurants), dtype=bool)
+        allowed[rows] = True
 
-    return jsonify({"restaurants": paginated, "total": total, "page": page, "per_page": per_page})
+    if sort == "score":
+        rows, dist, scores = geo.best_rated(lat, lon, store.rating, k=k, radius_km=radius, allowed=allowed)
+    else:
+        rows, dist = geo.nearest(lat, lon, k=k, radius_km=radius, allowed=allowed)
+        scores = None
+
+    results = []
+    for pos, (i, d) in enumerate(zip(rows.tolist(), dist.tolist())):
+        r = dict(restaurants[i])
+        r["distance_km"] = round(d, 3)
+        if scores is not None:
+            r["score"] = round(float(scores[pos]), 4)
+        r["explanation"] = f"Nearby 📍 {d:.1f} km away"
+        results.append(r)
+    return jsonify({"restaurants": results, "count": len(results), "lat": lat, "lon": lon,
+                    "radius_km": radius, "sort": "score" if sort == "score" else "distance"})
 
 # ---------- API: Filters ----------
 @app.route("/api/filters")
+@response_cache.cached(depends=("dataset",))
 def get_filters():
     cities_set = set()
     cuisines_set = set()
-    for r in restaurants:
-        city_val = r.get("City")
+    restaurants = catalogue().restaurants
+    for city_val, c_field in zip(column(restaurants, "City"), column(restaurants, "Cuisines")):
         if city_val:
             cities_set.add(str(city_val).strip())
-        c_field = r.get("Cuisines")
         if c_field:
             for part in str(c_field).split(","):
                 cs = part.strip()
@@ -461,117 +979,173 @@ def get_filters():
 
 # ---------- API: Trending (context-aware) ----------
 @app.route("/api/recommendations")
+@response_cache.cached(depends=("dataset",))
 def trending_recommendations():
-    weather = request.args.get("weather", "").strip().lower()
-    time_of_day = request.args.get("time", "").strip().lower()
-
-    def key_func(r):
-        try:
-            rating = safe_float(r.get("Aggregate rating", 0))
-            votes = safe_int(r.get("Votes", 0))
-            return (rating, votes)
-        except Exception:
-            return (0, 0)
-
-    trending = [r for r in restaurants if safe_float(r.get("Aggregate rating", 0)) > 0]
-    trending = sorted(trending, key=key_func, reverse=True)
-
-    if weather or time_of_day:
-        prioritized = []
-        for r in trending:
-            cuisines_text = str(r.get("Cuisines", "")).lower()
-            score = 0.0
-            if weather == "rainy":
-                if any(k in cuisines_text for k in ["soup", "tea", "hot snack", "snack", "pakora", "chai"]):
-                    score += 30
-            elif weather == "sunny":
-                if any(k in cuisines_text for k in ["ice cream", "juice", "cold", "smoothie", "beverage"]):
-                    score += 20
-
-            if time_of_day == "morning":
-                if any(k in cuisines_text for k in ["breakfast", "brunch", "pancake", "coffee"]):
-                    score += 40
-            elif time_of_day == "evening":
-                if any(k in cuisines_text for k in ["dinner", "snack", "street food"]):
-                    score += 25
-
-            score += safe_float(r.get("Aggregate rating", 0)) * 2
-            score += safe_int(r.get("Votes", 0)) / 100.0
-            prioritized.append((score, r))
-
-        prioritized = sorted(prioritized, key=lambda x: x[0], reverse=True)
-        return jsonify([r for _, r in prioritized][:10])
-
-    return jsonify(trending[:10])
+    c = catalogue()
+    context = {k: request.args.get(k, "") for k in c.trending.contexts}
+    row_json = c.json["rows"]
+    return json_body_response(row_json.array(row_json.raw(i) for i in c.trending.top(context, 10).tolist()))
 
 # ---------- API: ML-based Recommendations ----------
 @app.route("/api/recommend")
+@response_cache.cached(depends=("dataset", "model"))
 def get_recommendations():
     name = request.args.get("name", "")
-    results = recommend_restaurants(name)
+    restaurant_id = request.args.get("id", "").strip()
+    rows = recommend_rows(name, restaurant_id=restaurant_id)
 
-    if not results:
+    if not rows:
         # fallback to trending when ML disabled or unavailable
-        trending = sorted(
-            restaurants,
-            key=lambda r: (safe_float(r.get("Aggregate rating", 0)), safe_int(r.get("Votes", 0))),
-            reverse=True
-        )[:5]
-        results = [{
-            "Restaurant Name": r.get("Restaurant Name", ""),
-            "City": r.get("City", ""),
-            "Cuisines": r.get("Cuisines", ""),
-            "Aggregate rating": safe_float(r.get("Aggregate rating", 0)),
-            "Votes": safe_int(r.get("Votes", 0)),
-            "explanation": "Trending pick ⭐"
-        } for r in trending]
-        return jsonify(results)
+        return json_body_response(trending_fallback_json())
 
     # add explain text relative to the base restaurant
-    base = next((x for x in restaurants if x.get("Restaurant Name") == name), None)
-    for r in results:
-        reasons = []
-        if base:
-            if r.get("Cuisines") and base.get("Cuisines") and r["Cuisines"].split(",")[0] in base["Cuisines"]:
-                reasons.append(f"Similar cuisine 🍽 ({r['Cuisines']})")
-            if r.get("City") == base.get("City"):
-                reasons.append(f"Same city 🏙 ({r['City']})")
-        rating = safe_float(r.get("Aggregate rating", 0))
-        if rating >= 4.5:
-            reasons.append(f"Highly rated ⭐ {rating}")
-        elif rating >= 4.0:
-            reasons.append(f"Good rating ⭐ {rating}")
-        if not reasons:
-            reasons.append("Similar restaurant by overall profile")
-        r["explanation"] = " | ".join(reasons)
-    return jsonify(results)
+    c = catalogue()
+    restaurants, rec_json = c.restaurants, c.json["rec"]
+    base_idx = resolve_row(name, restaurant_id)
+    base = restaurants[base_idx] if base_idx is not None else None
+    with metrics.span("recommend.serialize"):
+        body = rec_json.array(rec_json.splice(i, explanation=similar_explanation(restaurants[i], base))
+                              for i in rows)
+    return json_body_response(body)
+
+@app.route("/api/recommend/batch", methods=["GET", "POST"])
+def get_batch_recommendations():
+    """Recommendations for many restaurants in one call.
+
+    GET ?name=..&name=..&id=..&n=5, or POST {"names": [...], "ids": [...], "n": 5}.
+    Returns {"names": {name: [...]}, "ids": {id: [...]}}.
+    """
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        names, ids, n = data.get("names") or [], data.get("ids") or [], data.get("n", 5)
+        if not isinstance(names, list) or not isinstance(ids, list):
+            return jsonify({"message": "names and ids must be lists"}), 400
+    else:
+        names, ids, n = request.args.getlist("name"), request.args.getlist("id"), request.args.get("n", 5)
+    names = [str(x) for x in names if str(x).strip()]
+    ids = [str(x).strip() for x in ids if str(x).strip()]
+    if not names and not ids:
+        return jsonify({"message": "name or id required"}), 400
+    if len(names) + len(ids) > RECOMMEND_BATCH_MAX:
+        return jsonify({"message": f"at most {RECOMMEND_BATCH_MAX} names + ids per call"}), 400
+    n = min(max(safe_int(n, 5), 1), 50)
+    return jsonify(recommend_batch(names, ids, n=n))
+
+# ---------- API: Model status (readiness probe) ----------
+@app.route("/api/model/status")
+def model_status():
+    """200 once recommendations are served from the model, 503 while warming up."""
+    c = catalogue()
+    status = {
+        "state": c.ml_state,
+        "ready": c.ml_ready,
+        "dataset_key": c.tfidf_key,
+        "rows": c.tfidf_matrix.shape[0] if c.tfidf_matrix is not None else 0,
+        "neighbors_k": c.neighbor_table[0].shape[1] if c.neighbor_table is not None else 0,
+        "hybrid_precompute": hybrid_store.stats(),
+        "dataset": datasets.status(),
+    }
+    return jsonify(status), (200 if status["ready"] else 503)
+
+# ---------- API: Dataset reload (admin) ----------
+@app.route("/api/admin/reload", methods=["POST"])
+def reload_dataset():
+    """Rebuild the catalogue from disk and swap it in, without restarting.
+
+    Needs the X-Reload-Token header to match RELOAD_TOKEN. Returns 202 and
+    reloads in the background; ?wait=1 returns once the new catalogue is
+    live, ?force=1 rebuilds even if the version on disk is unchanged. Only
+    the worker that gets the call reloads right away; the others pick up a
+    new version on disk at their next DATASET_WATCH_INTERVAL check.
+    """
+    token = request.headers.get("X-Reload-Token", "")
+    if not RELOAD_TOKEN or not hmac.compare_digest(token, RELOAD_TOKEN):
+        return jsonify({"message": "forbidden"}), 403
+    force = request.args.get("force") == "1"
+    if request.args.get("wait") == "1":
+        datasets.reload(force=force)
+        return jsonify(datasets.status()), (500 if datasets.last_error else 200)
+    datasets.request_reload(force=force)
+    return jsonify(datasets.status()), 202
+
+# ---------- Metrics (Prometheus text format, per worker) ----------
+metrics.gauge("response_cache_hits", "Response cache hits since start.", lambda: response_cache.hits)
+metrics.gauge("response_cache_misses", "Response cache misses since start.", lambda: response_cache.misses)
+metrics.gauge("response_cache_bytes", "Bytes held by the response cache.", lambda: response_cache.size)
+metrics.gauge("ratings_live", "Live (user, restaurant) ratings in the log index.", lambda: len(ratings_log.index))
+metrics.gauge("ml_ready", "1 once recommendations come from the TF-IDF model.",
+              lambda: datasets.current.ml_ready)
+metrics.gauge("restaurants", "Restaurants in the live catalogue.", lambda: len(datasets.current))
+metrics.gauge("dataset_swaps", "Catalogue reloads swapped in since start.", lambda: datasets.swaps)
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return metrics.response()
 
 # ---------- API: Hybrid Recommender ----------
-@app.route("/api/recommend/hybrid")
-def get_hybrid_recommendations():
-    name = request.args.get("name", "")
-    user = session.get("user", None)
-    content_recs = recommend_restaurants(name, n=6) if name else []
+def user_mf_scores(user, candidates=20):
+    """{row: ALS score scaled to [0, 1]} of `user`'s top candidates ({} without a model / user)."""
+    model = mf_model()
+    if model is None or not user:
+        return {}
+    picks = model.recommend(user, rated=cf.user_ratings(user), n=candidates)
+    if not picks:
+        return {}
+    mf_scores = {}
+    index = catalogue().index
+    lo, hi = min(s for _, s in picks), max(s for _, s in picks)
+    for item, s in picks:
+        row = index.row_for_name(item)
+        if row is not None:
+            mf_scores[row] = (s - lo) / (hi - lo) if hi > lo else 1.0
+    return mf_scores
+
+def blend_recommendations(name, user, n=6, candidates=20, mf_scores=None):
+    """Blend ALS scores for `user` with TF-IDF similarity to `name`.
+
+    Both scores are scaled to [0, 1] and mixed with HYBRID_MF_WEIGHT. Returns
+    [] when there is no MF model or nothing is known about the user.
+    """
+    if mf_scores is None:
+        mf_scores = user_mf_scores(user, candidates)
+    if not mf_scores:
+        return []
 
-    ratings = load_ratings()
-    collab_recs = []
-    try:
-        if ratings and user:
-            df_r = pd.DataFrame(ratings)
-            if {"user", "restaurant", "rating"}.issubset(df_r.columns) and len(df_r) > 0:
-                pivot = df_r.pivot_table(index="user", columns="restaurant", values="rating").fillna(0)
-                if user in pivot.index:
-                    user_vectors = pivot.values
-                    sim = cosine_similarity(user_vectors)
-                    sim_df = pd.DataFrame(sim, index=pivot.index, columns=pivot.index)
-                    sim_scores = sim_df.loc[user].sort_values(ascending=False)
-                    top_users = sim_scores.index[1:4].tolist()
-                    liked = df_r[df_r["user"].isin(top_users)].groupby("restaurant")["rating"].mean()
-                    liked = liked[liked >= 4.0].sort_values(ascending=False)
-                    top_restaurants = liked.index.tolist()[:6]
-                    collab_recs = [r for r in restaurants if r.get("Restaurant Name") in top_restaurants]
-    except Exception:
-        collab_recs = []
+    c = catalogue()
+    content_scores = {}
+    anchor = resolve_row(name) if name and c.ml_ready else None
+    if anchor is not None:
+        rows, sims = similar_rows(anchor, candidates)
+        content_scores = {int(r): float(s) for r, s in zip(rows, sims)}
+
+    w = HYBRID_MF_WEIGHT if content_scores else 1.0
+    blended = {row: w * mf_scores.get(row, 0.0) + (1 - w) * content_scores.get(row, 0.0)
+               for row in set(mf_scores) | set(content_scores)}
+    ranked = sorted(blended, key=lambda row: (-blended[row], row))[:n]
+    recs = []
+    for row in ranked:
+        rec = rec_fields(c.restaurants[row])
+        rec["explanation"] = "Matches your taste profile" if row in mf_scores else "Similar restaurant by overall profile"
+        recs.append(rec)
+    return recs
+
+def user_profile(user):
+    """The per-user (expensive) half of the hybrid: MF scores + collaborative picks."""
+    collab = []
+    if user:
+        top_restaurants = cf.recommend(user, k_users=3, min_rating=4.0, n=6)
+        collab = [int(i) for i in catalogue().index.names_rows(top_restaurants)]
+    return {"mf": user_mf_scores(user), "collab": collab}
+
+def hybrid_recommendations(name, user, profile=None):
+    """What /api/recommend/hybrid returns; pass a precomputed user_profile() to skip that part."""
+    restaurants = catalogue().restaurants
+    if profile is None:
+        profile = user_profile(user)
+    content_recs = blend_recommendations(name, user, mf_scores=profile["mf"])
+    if not content_recs and name:
+        content_recs = recommend_restaurants(name, n=6)
+    collab_recs = [dict(restaurants[i]) for i in profile["collab"]]
 
     combined, seen = [], set()
     for r in content_recs + collab_recs:
@@ -585,7 +1159,70 @@ def get_hybrid_recommendations():
 
     if not combined:
         combined = (restaurants[:10] if restaurants else [])
-    return jsonify(combined[:10])
+    return combined[:10]
+
+def _precompute_hybrid(user):
+    # row ids in the result belong to one catalogue; tag it so a swap can't mix them
+    with pinned(datasets.current) as c:
+        profile = user_profile(user)
+        return {"dataset": c.version, "profile": profile, "default": hybrid_recommendations("", user, profile)}
+
+_hybrid_mf = None
+
+def _before_hybrid_pass():
+    """Pull other workers' ratings; a newly trained MF model invalidates everyone."""
+    global _hybrid_mf
+    ratings_log.refresh()
+    model = mf_model()
+    if model is not _hybrid_mf:
+        _hybrid_mf = model
+        hybrid_store.mark_all()
+
+# user -> {"profile", "default"} kept fresh in the background (see precompute.py)
+hybrid_store = Precomputer(_precompute_hybrid, users=lambda: list(cf.by_user),
+                           interval=HYBRID_PRECOMPUTE_INTERVAL, before_pass=_before_hybrid_pass,
+                           name="hybrid-precompute")
+
+def _hybrid_rating(entry):
+    if entry is None:
+        hybrid_store.mark_all()
+    else:
+        hybrid_store.mark(entry.get("user"))
+
+ratings_log.subscribe(_hybrid_rating)
+
+@app.route("/api/recommend/hybrid")
+def get_hybrid_recommendations():
+    """Precomputed list for the signed-in user when it is fresh, live computation otherwise.
+
+    X-Computed-At / X-Hybrid-Source tell which one was served.
+    """
+    name = request.args.get("name", "")
+    user = session.get("user", None)
+    with metrics.span("hybrid.sync_cf"):
+        sync_cf()
+    entry = None
+    if HYBRID_PRECOMPUTE and user:
+        hybrid_store.ensure_started()
+        entry = hybrid_store.get(user)
+        if entry is not None and entry[0]["dataset"] != catalogue().version:
+            entry = None  # computed on the catalogue before a reload
+
+    if entry is not None:
+        value, computed_at = entry
+        with metrics.span("hybrid.blend"):
+            combined = value["default"] if not name else hybrid_recommendations(name, user, value["profile"])
+        source = "precomputed"
+    else:
+        with metrics.span("hybrid.compute"):
+            combined = hybrid_recommendations(name, user)
+        computed_at, source = datetime.datetime.now(), "live"
+
+    with metrics.span("hybrid.serialize"):
+        resp = jsonify(combined)
+    resp.headers["X-Computed-At"] = computed_at.isoformat(timespec="seconds")
+    resp.headers["X-Hybrid-Source"] = source
+    return resp
 
 # ---------- API: Save rating ----------
 @app.route("/api/rate", methods=["POST"])
@@ -602,55 +1239,67 @@ def save_rating():
     except Exception:
         return jsonify({"message": "invalid rating"}), 400
 
-    ratings = load_ratings()
-    updated = False
-    for r in ratings:
-        if r.get("user") == user and r.get("restaurant") == restaurant:
-            r["rating"] = rating_val
-            r["date"] = datetime.datetime.now().isoformat()
-            updated = True
-            break
-    if not updated:
-        ratings.append({
-            "user": user,
-            "restaurant": restaurant,
-            "rating": rating_val,
-            "date": datetime.datetime.now().isoformat()
-        })
-    save_ratings(ratings)
+    ratings_log.append({
+        "user": user,
+        "restaurant": restaurant,
+        "rating": rating_val,
+        "date": datetime.datetime.now().isoformat()
+    })
     return jsonify({"message": "rating saved"})
 
 # ---------- API: Wishlist ----------
+# Per user (signed-out visitors share "guest", like ratings), keyed by Restaurant ID
 @app.route("/api/wishlist", methods=["GET"])
 def get_wishlist():
-    return jsonify(load_wishlist())
+    return jsonify(accounts.wishlist(session.get("user", "guest")))
 
 @app.route("/api/wishlist", methods=["POST"])
 def add_to_wishlist():
     data = request.json or {}
-    wishlist = load_wishlist()
+    restaurant_id = str(data.get("id") or data.get("Restaurant ID") or "").strip()
     name = data.get("name") or data.get("Restaurant Name") or ""
-    if not name:
+    if not restaurant_id and not name:
         return jsonify({"message": "Missing name"}), 400
-    if any(item.get("name") == name or item.get("Restaurant Name") == name for item in wishlist):
+    row = resolve_row(name, restaurant_id)
+    if row is None:
+        return jsonify({"message": "Unknown restaurant"}), 404
+    r = catalogue().restaurants[row]
+    if not accounts.add_to_wishlist(session.get("user", "guest"), r.get("Restaurant ID"), r.get("Restaurant Name", "")):
         return jsonify({"message": "Already in wishlist"}), 400
-    wishlist.append({"name": name})
-    save_wishlist(wishlist)
     return jsonify({"message": "Added to wishlist"}), 201
 
 @app.route("/api/wishlist/<name>", methods=["DELETE"])
 def remove_from_wishlist(name):
-    wishlist = load_wishlist()
-    wishlist = [item for item in wishlist if item.get("name") != name and item.get("Restaurant Name") != name]
-    save_wishlist(wishlist)
+    """`name` may be the restaurant's name or its Restaurant ID."""
+    accounts.remove_from_wishlist(session.get("user", "guest"), name)
     return jsonify({"message": "Removed from wishlist"})
 
 # ---------- Analytics (sample) ----------
 @app.route("/api/analytics")
 def analytics():
-    cuisines = {"labels": ["Indian", "Chinese", "Japanese", "Italian"], "counts": [12, 8, 5, 7]}
-    ratings = [15, 9, 4]  # Excellent, Good, Average
-    return jsonify({"cuisines": cuisines, "ratings": ratings})
+    """Catalogue + user-rating analytics; ?city= or ?cuisine= drills down, ?n= sizes top lists."""
+    ratings_log.refresh()  # fold in other workers' ratings before the cache lookup
+    return cached_analytics()
+
+@response_cache.cached(depends=("dataset", "ratings"))
+def cached_analytics():
+    n = min(max(safe_int(request.args.get("n", 10), 10), 1), 50)
+    city = request.args.get("city", "").strip()
+    cuisine = request.args.get("cuisine", "").strip()
+    c = catalogue()
+    restaurants = c.restaurants
+    with metrics.span("analytics.summary"):
+        data = c.aggregates.summary(city=city, cuisine=cuisine, n=n)
+    if data is None:
+        return jsonify({"message": "unknown city or cuisine"}), 404
+
+    # Excellent, Good, Average (the rating chart; unrated restaurants left out)
+    data["ratings"] = data["rating"]["bands"]["counts"][:3]
+    data["top_rated"] = [rec_fields(restaurants[i]) for i in data["top_rated"].tolist()]
+    data["most_rated"] = [dict(rec_fields(restaurants[i]), user_ratings=count, user_mean=round(mean, 3))
+                          for i, count, mean in data["most_rated"]]
+    data["dataset"] = c.version
+    return jsonify(data)
 
 # ---------- Run ----------
 if __name__ == "__main__":
@@ -0,0 +1,22 @@
+"""Reproducible benchmarks for the app over synthetic catalogues.
+
+    python -m bench [--sizes 10k,100k,1m] [--requests 2000] [--mix default]
+                    [--out results.json] [--baseline old.json] [--threshold 0.25]
+
+For every size, a catalogue shaped like ``../dataaset`` (same columns, city /
+cuisine / cost / rating distributions sampled from it when present) and a
+ratings log are generated under ``bench/.work/`` (cached per size + seed). The
+catalogue is ingested into a snapshot, then a fresh interpreter runs with
+that directory as its working dir. It imports ``app`` (startup time), replays
+a weighted query mix through the Flask test client and calls the hot
+in-process functions directly.
+
+The report is JSON: p50 / p95 / p99 latency per endpoint and function,
+throughput, peak RSS and startup time per size. With ``--baseline``, every
+metric is compared with a saved report. The exit status is 1 if any metric
+got worse by more than ``--threshold``.
+
+* ``synth``    -- synthetic catalogue TSV + ratings log
+* ``workload`` -- weighted request / function mixes
+* ``worker``   -- the measuring process (one per size)
+"""
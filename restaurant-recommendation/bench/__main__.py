@@ -0,0 +1,144 @@
+"""CLI: ``python -m bench --help`` (see bench/__init__.py)."""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import ingest
+from bench import synth, workload
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = os.path.join(APP_DIR, "bench", ".work")
+MARKER = "BENCH-RESULT "
+LATENCY = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def parse_size(text):
+    """'10k' -> 10000, '1m' -> 1000000, '2500' -> 2500."""
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def prepare(rows, seed, users, per_user, templates, cold=False):
+    """Work dir with data/snapshot + data/ratings.jsonl for ``rows`` rows (built once, then reused)."""
+    workdir = os.path.join(WORK_DIR, f"{rows}-s{seed}")
+    data = os.path.join(workdir, "data")
+    tsv = os.path.join(workdir, "catalogue.tsv")
+    if not os.path.exists(os.path.join(data, "snapshot", "CURRENT")):
+        t0 = time.perf_counter()
+        names = synth.write_catalogue(tsv, rows, seed=seed, templates=templates())
+        ingest.ingest(tsv, os.path.join(data, "snapshot"), keep=1)
+        with open(os.path.join(workdir, "names.json"), "w", encoding="utf-8") as f:
+            json.dump(names, f)
+        print(f"… generated {rows} rows in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    with open(os.path.join(workdir, "names.json"), encoding="utf-8") as f:
+        names = json.load(f)
+    # every run starts from the same ratings / accounts state (the mix writes ratings)
+    for name in os.listdir(data):
+        if name.startswith(("ratings.jsonl", "accounts.db", "feedback.db")) or name == "mf":
+            path = os.path.join(data, name)
+            shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+    if cold:
+        shutil.rmtree(os.path.join(data, "model"), ignore_errors=True)
+    synth.write_ratings(os.path.join(data, "ratings.jsonl"), names, users=users, per_user=per_user, seed=seed)
+    return workdir
+
+
+def run_size(workdir, args):
+    config = {"workdir": workdir, "requests": args.requests, "warmup": args.warmup, "mix": args.mix,
+              "functions": args.functions, "seed": args.seed}
+    env = dict(os.environ, PYTHONPATH=APP_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""),
+               ML_WARMUP="1", ML_WARMUP_BLOCKING="1", HYBRID_PRECOMPUTE="0")
+    if args.no_cache:
+        env["RESPONSE_CACHE_MB"] = "0"
+    proc = subprocess.run([sys.executable, "-m", "bench.worker", json.dumps(config)], cwd=workdir, env=env,
+                          stdout=subprocess.PIPE, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith(MARKER):
+            return json.loads(line[len(MARKER):])
+    raise RuntimeError(f"benchmark worker failed (exit {proc.returncode}) for {workdir}")
+
+
+def metrics(report):
+    """{(size, metric path): (value, higher_is_better)} for every comparable number."""
+    out = {}
+    for size, r in report.get("sizes", {}).items():
+        out[(size, "startup_s")] = (r["startup_s"], False)
+        out[(size, "peak_rss_mib")] = (r["peak_rss_mib"], False)
+        out[(size, "http.overall.throughput_rps")] = (r["http"]["overall"]["throughput_rps"], True)
+        for section, entries in (("http", r["http"]["endpoints"]), ("functions", r["functions"])):
+            for name, stats in entries.items():
+                for m in LATENCY:
+                    out[(size, f"{section}.{name}.{m}")] = (stats[m], False)
+    return out
+
+
+def compare(report, baseline, threshold, min_ms):
+    """[{size, metric, baseline, current, change, regression}] for metrics in both reports."""
+    old, new = metrics(baseline), metrics(report)
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        (before, _), (after, higher_better) = old[key], new[key]
+        if not before:
+            continue
+        change = (after - before) / before
+        worse = -change if higher_better else change
+        noise = key[1].endswith("_ms") and max(before, after) < min_ms
+        rows.append({"size": key[0], "metric": key[1], "baseline": before, "current": after,
+                     "change": round(change, 3), "regression": worse > threshold and not noise})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Benchmark the app on synthetic catalogues.")
+    parser.add_argument("--sizes", default="10k,100k,1m", help="comma-separated row counts (10k, 1m, ...)")
+    parser.add_argument("--requests", type=int, default=2000, help="measured HTTP requests per size")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--functions", type=int, default=1000, help="measured in-process calls per size")
+    parser.add_argument("--mix", default="default", choices=sorted(workload.HTTP_MIXES))
+    parser.add_argument("--users", type=int, default=500, help="users in the synthetic ratings log")
+    parser.add_argument("--ratings-per-user", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache")
+    parser.add_argument("--cold", action="store_true", help="rebuild the TF-IDF model (startup includes training)")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative change counted as a regression")
+    parser.add_argument("--min-ms", type=float, default=0.5, help="ignore latency changes below this (ms)")
+    args = parser.parse_args()
+
+    template_cache = []
+
+    def templates():
+        if not template_cache:
+            template_cache.append(synth.load_templates(os.path.join(APP_DIR, ingest.DEFAULT_SOURCE)))
+        return template_cache[0]
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+              "config": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")}, "sizes": {}}
+    for size in [parse_size(s) for s in args.sizes.split(",") if s.strip()]:
+        workdir = prepare(size, args.seed, args.users, args.ratings_per_user, templates, cold=args.cold)
+        print(f"… benchmarking {size} rows", file=sys.stderr)
+        report["sizes"][str(size)] = run_size(workdir, args)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f), args.threshold, args.min_ms)
+        regressions = [c for c in report["comparison"] if c["regression"]]
+        for c in regressions:
+            print(f"❌ {c['size']} rows {c['metric']}: {c['baseline']} -> {c['current']} ({c['change']:+.0%})",
+                  file=sys.stderr)
+        status = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    sys.exit(status)
@@ -0,0 +1,137 @@
+"""Synthetic catalogues and ratings logs for the benchmarks.
+
+Rows are resampled from template records and then perturbed: new ids and
+names, jittered coordinates, costs, ratings and votes, and the odd swapped
+cuisine. The templates come from the real dataset when it is present and
+from a small built-in set otherwise. Cities, countries, currencies and
+cuisine combinations therefore keep the dataset's joint distribution at
+any size. Output uses the dataset's layout (TSV with an unnamed index
+column), so ``ingest.py`` reads it like the real thing.
+"""
+import datetime
+import json
+import os
+import random
+
+import ingest
+
+HEADER = ["", "Restaurant ID", "Restaurant Name", "Country Name", "Country Code", "City", "Address",
+          "Locality", "Locality Verbose", "Longitude", "Latitude", "Cuisines", "Average Cost for two",
+          "Currency", "Has Table booking", "Has Online delivery", "Is delivering now",
+          "Switch to order menu", "Price range", "Aggregate rating", "Rating color", "Rating text", "Votes"]
+
+CHAIN_SHARE = 0.2  # rows named after a chain (shared names, like the real data)
+SWAP_CUISINE = 0.3
+
+_RATING_TEXT = [(4.5, "Excellent", "Dark Green"), (4.0, "Very Good", "Green"), (3.5, "Good", "Yellow"),
+                (2.5, "Average", "Orange"), (0.1, "Poor", "Red"), (0.0, "Not rated", "White")]
+
+_BUILTIN = [
+    ("India", 1, "New Delhi", "Connaught Place", 77.2167, 28.6315, "North Indian, Chinese", 800, "Indian Rupees(Rs.)"),
+    ("India", 1, "Gurgaon", "Sector 29", 77.0685, 28.4691, "Cafe, Continental", 1200, "Indian Rupees(Rs.)"),
+    ("India", 1, "Noida", "Sector 18", 77.3260, 28.5706, "Fast Food, Pizza", 500, "Indian Rupees(Rs.)"),
+    ("India", 1, "Faridabad", "Sector 15", 77.3178, 28.3952, "South Indian", 300, "Indian Rupees(Rs.)"),
+    ("United States", 216, "Orlando", "Downtown", -81.3792, 28.5383, "American, Burger", 25, "Dollar($)"),
+    ("Phillipines", 162, "Makati City", "Poblacion", 121.0275, 14.5654, "Japanese, Desserts", 1100,
+     "Botswana Pula(P)"),
+]
+_WORDS = ["Spice", "Garden", "Royal", "Urban", "Tandoor", "Cafe", "Bistro", "Grill", "Curry", "Dragon",
+          "Golden", "Green", "House", "Kitchen", "Lounge", "Masala", "Noodle", "Oven", "Palace", "Street"]
+
+
+def _builtin_templates():
+    return [{"Restaurant Name": f"{city} Diner", "Country Name": country, "Country Code": code, "City": city,
+             "Address": f"{locality}, {city}", "Locality": locality, "Locality Verbose": f"{locality}, {city}",
+             "Longitude": lon, "Latitude": lat, "Cuisines": cuisines, "Average Cost for two": cost,
+             "Currency": currency, "Has Table booking": "No", "Has Online delivery": "Yes",
+             "Is delivering now": "No", "Switch to order menu": "No", "Price range": 2,
+             "Aggregate rating": 3.5, "Votes": 120}
+            for country, code, city, locality, lon, lat, cuisines, cost, currency in _BUILTIN]
+
+
+def load_templates(source=ingest.DEFAULT_SOURCE):
+    """Typed records of the real dataset, or a small built-in set if it isn't there."""
+    if source and os.path.exists(source):
+        stats = {"rows": 0, "repaired": 0, "skipped": 0}
+        records = [r for r in map(ingest.normalise, ingest.read_rows(source, stats)) if r is not None]
+        if records:
+            return records
+    return _builtin_templates()
+
+
+def _rating_text(rating):
+    for floor, text, color in _RATING_TEXT:
+        if rating >= floor:
+            return text, color
+    return "Not rated", "White"
+
+
+def _jitter(value, rng, spread):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if value != value else value + rng.uniform(-spread, spread)  # keep NaN
+
+
+def synth_row(i, template, rng, cuisine_pool, chains):
+    """One perturbed copy of ``template`` as TSV fields (index column first)."""
+    t = template
+    if chains and rng.random() < CHAIN_SHARE:
+        name = rng.choice(chains)
+    else:
+        name = f"{rng.choice(_WORDS)} {rng.choice(_WORDS)} {i}"
+    cuisines = [c.strip() for c in str(t.get("Cuisines", "")).split(",") if c.strip()]
+    if cuisine_pool and (not cuisines or rng.random() < SWAP_CUISINE):
+        cuisines = (cuisines[:-1] if cuisines else []) + [rng.choice(cuisine_pool)]
+    rating = float(t.get("Aggregate rating") or 0)
+    if rating > 0:
+        rating = round(min(4.9, max(1.8, rating + rng.uniform(-0.4, 0.4))), 1)
+    text, color = _rating_text(rating)
+    cost = max(0, int(float(t.get("Average Cost for two") or 0) * rng.uniform(0.7, 1.3)))
+    votes = max(0, int(int(t.get("Votes") or 0) * rng.uniform(0.5, 1.5))) if rating > 0 else 0
+    return [str(i), str(100_000_000 + i), name, t.get("Country Name", ""), str(t.get("Country Code", "")),
+            t.get("City", ""), t.get("Address", ""), t.get("Locality", ""), t.get("Locality Verbose", ""),
+            f"{_jitter(t.get('Longitude'), rng, 0.02):.6f}", f"{_jitter(t.get('Latitude'), rng, 0.02):.6f}",
+            ", ".join(dict.fromkeys(cuisines)), str(cost), t.get("Currency", ""),
+            t.get("Has Table booking", "No"), t.get("Has Online delivery", "No"),
+            t.get("Is delivering now", "No"), t.get("Switch to order menu", "No"),
+            str(t.get("Price range", 1)), f"{rating:.1f}", color, text, str(votes)]
+
+
+def write_catalogue(path, rows, seed=0, templates=None):
+    """Write a ``rows``-row TSV to ``path``; returns the restaurant names, in order."""
+    rng = random.Random(seed)
+    templates = templates or load_templates()
+    cuisine_pool = sorted({c.strip() for t in templates for c in str(t.get("Cuisines", "")).split(",")
+                           if c.strip()})
+    counts = {}
+    for t in templates:
+        counts[t["Restaurant Name"]] = counts.get(t["Restaurant Name"], 0) + 1
+    chains = sorted(n for n, c in counts.items() if c > 1)
+
+    names = []
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("\t".join(HEADER) + "\n")
+        for i in range(rows):
+            fields = synth_row(i, rng.choice(templates), rng, cuisine_pool, chains)
+            f.write("\t".join(str(v).replace("\t", " ").replace("\n", " ") for v in fields) + "\n")
+            names.append(fields[2])
+    return names
+
+
+def write_ratings(path, names, users=500, per_user=20, seed=0):
+    """Ratings log (ratings_log.py format) with popularity-skewed picks; returns the user names."""
+    rng = random.Random(seed + 1)
+    start = datetime.datetime(2024, 1, 1)
+    user_names = [f"bench{u}" for u in range(users)]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for u, user in enumerate(user_names):
+            for j in range(per_user):
+                name = names[int(len(names) * rng.random() ** 3)]  # a few restaurants get most ratings
+                entry = {"user": user, "restaurant": name, "rating": float(rng.randint(2, 10)) / 2,
+                         "date": (start + datetime.timedelta(minutes=u * per_user + j)).isoformat()}
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return user_names
@@ -0,0 +1,111 @@
+"""The measuring process: one per catalogue, started by ``python -m bench``.
+
+    python -m bench.worker '{"workdir": ..., "requests": 2000, "mix": "default", ...}'
+
+Runs with ``workdir`` (holding ``data/snapshot`` + ``data/ratings.jsonl``) as
+its working directory, so the app's relative data paths point at the
+synthetic catalogue. It prints one JSON report on stdout.
+"""
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+import numpy as np
+
+from bench import workload
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def peak_rss_mib():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # KiB on Linux
+
+
+def summarise(samples, wall):
+    """Latency percentiles (ms) and throughput for one endpoint / function."""
+    ms = np.asarray(samples) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99]) if len(ms) else (0.0, 0.0, 0.0)
+    return {"count": int(len(ms)), "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3), "mean_ms": round(float(ms.mean()), 3) if len(ms) else 0.0,
+            "throughput_rps": round(len(ms) / wall, 1) if wall > 0 else 0.0}
+
+
+def _send(client, req):
+    if req.user is not None:
+        with client.session_transaction() as s:
+            s["user"] = req.user
+    elif req.method == "POST":
+        with client.session_transaction() as s:
+            s.pop("user", None)
+    t0 = time.perf_counter()
+    resp = client.open(req.path, method=req.method, json=req.json)
+    resp.get_data()  # drain streamed pages too
+    elapsed = time.perf_counter() - t0
+    resp.close()
+    return elapsed, resp.status_code
+
+
+def run_http(app_module, ctx, mix, n, warmup, seed):
+    client = app_module.app.test_client()
+    rng = random.Random(seed)
+    plan = workload.schedule(workload.HTTP_MIXES[mix], warmup + n, seed)
+    requests = [(name, make(rng, ctx)) for name, make in plan]
+    for _, req in requests[:warmup]:
+        _send(client, req)
+
+    samples, errors = {}, {}
+    t0 = time.perf_counter()
+    for name, req in requests[warmup:]:
+        elapsed, status = _send(client, req)
+        samples.setdefault(name, []).append(elapsed)
+        if status >= 400:
+            errors[name] = errors.get(name, 0) + 1
+    wall = time.perf_counter() - t0
+
+    report = {name: dict(summarise(s, sum(s)), errors=errors.get(name, 0)) for name, s in sorted(samples.items())}
+    return {"endpoints": report, "overall": summarise([x for s in samples.values() for x in s], wall)}
+
+
+def run_functions(app_module, ctx, n, seed):
+    rng = random.Random(seed + 2)
+    plan = workload.schedule(workload.FUNCTION_MIX, n, seed + 2)
+    factories = {name: make(app_module) for _, name, make in workload.FUNCTION_MIX}
+    samples = {}
+    for name, _ in plan:
+        call = factories[name](rng, ctx)
+        t0 = time.perf_counter()
+        call()
+        samples.setdefault(name, []).append(time.perf_counter() - t0)
+    return {name: summarise(s, sum(s)) for name, s in sorted(samples.items())}
+
+
+def main(config):
+    os.chdir(config["workdir"])
+    sys.path.insert(0, APP_DIR)
+    t0 = time.perf_counter()
+    import app as app_module
+    startup = time.perf_counter() - t0
+    startup_rss = peak_rss_mib()
+
+    ctx = workload.build_context(app_module, random.Random(config["seed"]))
+    result = {
+        "rows": len(app_module.datasets.current),
+        "startup_s": round(startup, 3),
+        "startup_rss_mib": startup_rss,
+        "model_ready": app_module.datasets.current.tfidf_matrix is not None,
+        "http": run_http(app_module, ctx, config["mix"], config["requests"], config["warmup"], config["seed"]),
+        "functions": run_functions(app_module, ctx, config["functions"], config["seed"]),
+        "response_cache": app_module.response_cache.stats(),
+    }
+    result["response_cache"].pop("versions", None)
+    result["peak_rss_mib"] = peak_rss_mib()
+    return result
+
+
+if __name__ == "__main__":
+    report = main(json.loads(sys.argv[1]))
+    sys.stdout.flush()
+    print("BENCH-RESULT " + json.dumps(report))
@@ -0,0 +1,174 @@
+"""Weighted query mixes replayed by the benchmark worker.
+
+A mix is a list of ``(weight, name, make)``. ``make(rng, ctx)`` returns a
+``Request`` for the HTTP mix, or a zero-argument callable for the function
+mix. ``ctx`` holds values sampled from the loaded catalogue (names, ids,
+cities, cuisines, search words) and the users in the ratings log, so the
+queries hit real rows.
+"""
+import random
+from urllib.parse import urlencode
+
+SORTS = ["", "rating", "votes", "cost_low", "cost_high"]
+CONTEXTS = {"weather": ["", "rainy", "sunny"], "time": ["", "morning", "evening"]}
+MOODS = ["", "", "happy", "romantic", "casual"]
+
+
+class Request:
+    __slots__ = ("method", "path", "json", "user")
+
+    def __init__(self, method, path, json=None, user=None):
+        self.method = method
+        self.path = path
+        self.json = json
+        self.user = user  # signed-in user (session), None for anonymous
+
+
+class Context:
+    __slots__ = ("names", "ids", "cities", "cuisines", "words", "users")
+
+    def __init__(self, names, ids, cities, cuisines, words, users=()):
+        self.names = names
+        self.ids = ids
+        self.cities = cities
+        self.cuisines = cuisines
+        self.words = words
+        self.users = list(users)
+
+
+def build_context(app_module, rng, sample=2000):
+    """Query values sampled from the app's catalogue and ratings log."""
+    restaurants = app_module.catalogue().restaurants
+    picks = [restaurants[rng.randrange(len(restaurants))] for _ in range(min(sample, len(restaurants)))]
+    words = sorted({w.lower() for r in picks for w in str(r.get("Restaurant Name", "")).split()
+                    if len(w) > 3 and w.isalpha()})
+    users = sorted({e["user"] for e in app_module.ratings_log.index.values() if e.get("user")})
+    return Context(
+        names=[r["Restaurant Name"] for r in picks],
+        ids=[str(r["Restaurant ID"]) for r in picks],
+        cities=[str(r.get("City", "")) for r in picks if r.get("City")],
+        cuisines=[c.strip().lower() for r in picks for c in str(r.get("Cuisines", "")).split(",")[:1] if c.strip()],
+        words=words or ["pizza"],
+        users=users,
+    )
+
+
+def _url(path, params):
+    params = {k: v for k, v in params.items() if v not in ("", None)}
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+# ---------- HTTP requests ----------
+def restaurants_query(rng, ctx):
+    params = {"sort": rng.choice(SORTS), "page": rng.choice([1, 1, 1, 2, 3, 10])}
+    if rng.random() < 0.5:
+        params["city"] = rng.choice(ctx.cities)
+    if rng.random() < 0.4:
+        params["cuisine"] = rng.choice(ctx.cuisines)
+    if rng.random() < 0.3:
+        params["rating"] = rng.choice(["3", "3.5", "4"])
+    if rng.random() < 0.2:
+        params["search"] = rng.choice(ctx.words)
+    params["mood"] = rng.choice(MOODS)
+    return Request("GET", _url("/api/restaurants", params))
+
+
+def recommend(rng, ctx):
+    if rng.random() < 0.5:
+        return Request("GET", _url("/api/recommend", {"id": rng.choice(ctx.ids)}))
+    return Request("GET", _url("/api/recommend", {"name": rng.choice(ctx.names)}))
+
+
+def recommend_hybrid(rng, ctx):
+    user = rng.choice(ctx.users) if ctx.users else None
+    name = rng.choice(ctx.names) if rng.random() < 0.5 else ""
+    return Request("GET", _url("/api/recommend/hybrid", {"name": name}), user=user)
+
+
+def trending(rng, ctx):
+    return Request("GET", _url("/api/recommendations", {c: rng.choice(v) for c, v in CONTEXTS.items()}))
+
+
+def rate(rng, ctx):
+    user = rng.choice(ctx.users) if ctx.users and rng.random() < 0.8 else None
+    return Request("POST", "/api/rate", json={"restaurant": rng.choice(ctx.names),
+                                              "rating": rng.randint(2, 10) / 2}, user=user)
+
+
+def restaurants_page(rng, ctx):
+    return Request("GET", "/restaurants")
+
+
+# ---------- in-process functions ----------
+def fn_query(app_module):
+    def make(rng, ctx):
+        city = [rng.choice(ctx.cities)] if rng.random() < 0.5 else []
+        cuisine = [rng.choice(ctx.cuisines)] if rng.random() < 0.4 else []
+        sort = rng.choice(SORTS)
+        return lambda: app_module.catalogue().store.top(app_module.filter_restaurants(cities=city, cuisines=cuisine), sort, 20)
+    return make
+
+
+def fn_recommend(app_module):
+    def make(rng, ctx):
+        name = rng.choice(ctx.names)
+        return lambda: app_module.recommend_rows(name)
+    return make
+
+
+def fn_trending(app_module):
+    def make(rng, ctx):
+        context = {c: rng.choice(v) for c, v in CONTEXTS.items()}
+        return lambda: app_module.catalogue().trending._top({k: v for k, v in context.items() if v}, 10)  # uncached
+    return make
+
+
+def fn_hybrid(app_module):
+    def make(rng, ctx):
+        user = rng.choice(ctx.users) if ctx.users else None
+        return lambda: app_module.hybrid_recommendations("", user)
+    return make
+
+
+def fn_aggregates(app_module):
+    def make(rng, ctx):
+        city = rng.choice(ctx.cities) if rng.random() < 0.5 else None
+        return lambda: app_module.catalogue().aggregates.summary(city=city)
+    return make
+
+
+HTTP_MIXES = {
+    "default": [
+        (35, "GET /api/restaurants", restaurants_query),
+        (20, "GET /api/recommend", recommend),
+        (10, "GET /api/recommend/hybrid", recommend_hybrid),
+        (15, "GET /api/recommendations", trending),
+        (10, "POST /api/rate", rate),
+        (10, "GET /restaurants", restaurants_page),
+    ],
+    "browse": [
+        (60, "GET /api/restaurants", restaurants_query),
+        (25, "GET /restaurants", restaurants_page),
+        (15, "GET /api/recommendations", trending),
+    ],
+    "write-heavy": [
+        (50, "POST /api/rate", rate),
+        (30, "GET /api/recommend/hybrid", recommend_hybrid),
+        (20, "GET /api/restaurants", restaurants_query),
+    ],
+}
+
+FUNCTION_MIX = [
+    (30, "filter_restaurants + store.top", fn_query),
+    (25, "recommend_rows", fn_recommend),
+    (20, "trending._top", fn_trending),
+    (15, "hybrid_recommendations", fn_hybrid),
+    (10, "aggregates.summary", fn_aggregates),
+]
+
+
+def schedule(mix, n, seed=0):
+    """``n`` (name, make) picks from ``mix`` in a fixed, seeded order."""
+    rng = random.Random(seed)
+    weights = [w for w, _, _ in mix]
+    return [(name, make) for _, name, make in rng.choices(mix, weights=weights, k=n)]
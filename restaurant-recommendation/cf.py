@@ -0,0 +1,167 @@
+"""Incremental user/item collaborative filtering over sparse ratings.
+
+Ratings live in two dict-of-dicts (user -> {item: rating} and item ->
+{user: rating}) plus per-user / per-item squared norms, so:
+
+* ``rate()`` is O(1) and only invalidates the cached rows it affects,
+* ``similar_users(u)`` walks the users who share an item with ``u``
+  instead of computing a users × users cosine matrix,
+* ``similar_items(i)`` is cached per item until one of its raters changes.
+
+Cosine similarity treats unrated cells as 0, same as the old
+``pivot_table(...).fillna(0)`` + ``cosine_similarity`` code.
+"""
+import math
+import threading
+from collections import defaultdict
+
+import numpy as np
+from scipy import sparse
+
+
+class CFEngine:
+    def __init__(self, ratings=()):
+        self._lock = threading.RLock()
+        self.reset(ratings)
+
+    def reset(self, ratings):
+        """Rebuild from ``[{user, restaurant, rating}]`` (later entries win)."""
+        with self._lock:
+            self.by_user = defaultdict(dict)
+            self.by_item = defaultdict(dict)
+            self.user_norm2 = defaultdict(float)
+            self.item_norm2 = defaultdict(float)
+            self._user_sim = {}
+            self._item_sim = {}
+            for r in ratings:
+                try:
+                    self._set(r["user"], r["restaurant"], float(r["rating"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+    def _set(self, user, item, rating):
+        old = self.by_user[user].get(item)
+        if old is not None:
+            self.user_norm2[user] -= old * old
+            self.item_norm2[item] -= old * old
+        self.by_user[user][item] = rating
+        self.by_item[item][user] = rating
+        self.user_norm2[user] += rating * rating
+        self.item_norm2[item] += rating * rating
+
+    def rate(self, user, item, rating):
+        """Add / update one rating and drop the cached similarities it touches."""
+        with self._lock:
+            self._set(user, item, float(rating))
+            # `user`'s norm moved, so every row that can contain `user` is stale:
+            # the users sharing any item with them (including themselves)
+            for it in self.by_user[user]:
+                for other in self.by_item[it]:
+                    self._user_sim.pop(other, None)
+            # likewise for `item` and every item co-rated with it
+            for u in self.by_item[item]:
+                for other in self.by_user[u]:
+                    self._item_sim.pop(other, None)
+
+    def user_ratings(self, user):
+        """Copy of ``{restaurant: rating}`` for one user."""
+        with self._lock:
+            return dict(self.by_user.get(user, {}))
+
+    # ---------- similarities ----------
+    def _user_row(self, user):
+        row = self._user_sim.get(user)
+        if row is not None:
+            return row
+        items = self.by_user.get(user)
+        if not items:
+            return []
+        dots = defaultdict(float)
+        for item, r in items.items():
+            for other, r2 in self.by_item[item].items():
+                if other != user:
+                    dots[other] += r * r2
+        norm = math.sqrt(self.user_norm2[user])
+        row = sorted(((d / (norm * math.sqrt(self.user_norm2[o])), o) for o, d in dots.items() if d > 0),
+                     key=lambda x: (-x[0], x[1]))
+        self._user_sim[user] = row
+        return row
+
+    def _item_row(self, item):
+        row = self._item_sim.get(item)
+        if row is not None:
+            return row
+        users = self.by_item.get(item)
+        if not users:
+            return []
+        dots = defaultdict(float)
+        for user, r in users.items():
+            for other, r2 in self.by_user[user].items():
+                if other != item:
+                    dots[other] += r * r2
+        norm = math.sqrt(self.item_norm2[item])
+        row = sorted(((d / (norm * math.sqrt(self.item_norm2[o])), o) for o, d in dots.items() if d > 0),
+                     key=lambda x: (-x[0], x[1]))
+        self._item_sim[item] = row
+        return row
+
+    def similar_users(self, user, k=3):
+        """[(similarity, user)] for the ``k`` nearest raters with any overlap."""
+        with self._lock:
+            return self._user_row(user)[:k]
+
+    def similar_items(self, item, k=10):
+        """[(similarity, restaurant)] co-rated with ``item``, most similar first."""
+        with self._lock:
+            return self._item_row(item)[:k]
+
+    # ---------- recommendations ----------
+    def recommend(self, user, k_users=3, min_rating=4.0, n=6):
+        """Restaurants the user's nearest neighbours liked (mean rating ≥ ``min_rating``).
+
+        Users with no overlapping neighbours fall back to items similar to the
+        ones they rated highest (item-item similarity).
+        """
+        with self._lock:
+            if user not in self.by_user:
+                return []
+            neighbours = [u for _, u in self._user_row(user)[:k_users]]
+            if neighbours:
+                sums, counts = defaultdict(float), defaultdict(int)
+                for u in neighbours:
+                    for item, r in self.by_user[u].items():
+                        sums[item] += r
+                        counts[item] += 1
+                liked = [(sums[i] / counts[i], i) for i in sums]
+            else:
+                seen = self.by_user[user]
+                scores = defaultdict(float)
+                for item, r in seen.items():
+                    if r < min_rating:
+                        continue
+                    for sim, other in self._item_row(item):
+                        if other not in seen:
+                            scores[other] = max(scores[other], sim * r)
+                liked = list((s, i) for i, s in scores.items())
+                min_rating = 0.0
+            liked = [x for x in liked if x[0] >= min_rating]
+            liked.sort(key=lambda x: (-x[0], x[1]))
+            return [i for _, i in liked[:n]]
+
+    # ---------- export ----------
+    def to_csr(self):
+        """(user × item CSR matrix, users, items) snapshot, e.g. for model training."""
+        with self._lock:
+            users = sorted(self.by_user)
+            items = sorted(self.by_item)
+            uix = {u: i for i, u in enumerate(users)}
+            iix = {it: i for i, it in enumerate(items)}
+            rows, cols, vals = [], [], []
+            for u, row in self.by_user.items():
+                for it, r in row.items():
+                    rows.append(uix[u])
+                    cols.append(iix[it])
+                    vals.append(r)
+        m = sparse.csr_matrix((np.asarray(vals, dtype=np.float32), (rows, cols)),
+                              shape=(len(users), len(items)))
+        return m, users, items
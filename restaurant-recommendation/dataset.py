@@ -0,0 +1,208 @@
+"""Versioned catalogue with background rebuilds and atomic swaps.
+
+A ``Catalogue`` bundles one dataset version with everything derived from
+it: the records, the columnar store, the indexes, the geo index, the
+aggregates, the trending scorer, the pre-serialised JSON fragments and the
+TF-IDF / neighbour model. Nothing in it refers to any other version.
+
+``DatasetManager`` owns the live catalogue. A reload builds a complete new
+one off to the side (model included), runs the ``prepare`` hooks (e.g.
+folding in user ratings) and then publishes it with a single reference
+assignment. Requests pin the catalogue they started with (see
+``catalogue()`` in app.py), so in-flight requests finish on the old one.
+The old catalogue is garbage once the last of them is done. Swap
+listeners re-key downstream caches by the new version.
+
+A reload runs when ``reload()`` is called (admin endpoint) or when the
+watcher thread sees ``source_version()`` change (a new snapshot published
+by ``ingest.py``, or data/restaurants.json rewritten). Threads don't survive
+fork(), so each worker starts its own watcher lazily via ``ensure_started``
+and rebuilds its own copy. That first call checks the version on disk right
+away (callers wait for it), so a worker forked from a master whose
+catalogue has gone stale never serves the old data for a whole interval.
+"""
+import datetime
+import os
+import threading
+import time
+
+from aggregates import Aggregates
+from fragments import JSONFragments
+from geo import GeoIndex
+from indexes import RestaurantIndex
+from store import RestaurantStore
+from trending import TrendingScorer
+
+
+class Catalogue:
+    def __init__(self, version, restaurants, snapshot=None, trending_rules=None, dumps=None, projections=None):
+        """``projections``: {name: record -> dict or None} for the JSON fragment sets in ``self.json``."""
+        self.version = version
+        self.restaurants = restaurants
+        self.snapshot = snapshot
+        self.loaded_at = datetime.datetime.now()
+        # Columnar view used by /api/restaurants for vectorized filter + sort
+        self.store = RestaurantStore(restaurants)
+        # Posting lists / trigram search / id + name lookups
+        self.index = RestaurantIndex(restaurants)
+        # k-d tree over coordinates for /api/nearby
+        self.geo = GeoIndex(self.store.lat, self.store.lon)
+        # Group-by aggregates (counts, rating bands, costs, top-N) for insights + /api/analytics
+        self.aggregates = Aggregates(self.store)
+        # Keyword feature columns + weights for /api/recommendations
+        self.trending = TrendingScorer(restaurants, self.store, **(trending_rules or {}))
+        # Per-row JSON bytes, encoded lazily once per version
+        self.json = {name: JSONFragments(restaurants, dumps, version, project=project)
+                     for name, project in (projections or {}).items()}
+
+        # TF-IDF model, filled in by the app's init_ml()
+        self.tfidf_matrix = None
+        self.tfidf_key = None
+        self.neighbor_table = None  # (indices[N, K], scores[N, K])
+        self.ml_state = "idle"  # idle | loading | building | ready | disabled | failed
+        self.ml_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.restaurants)
+
+    @property
+    def ml_ready(self):
+        """init_ml() has finished: ``tfidf_matrix`` and the neighbour table are published together."""
+        return self.ml_state == "ready"
+
+    def info(self):
+        return {"version": self.version, "rows": len(self.restaurants), "ml_state": self.ml_state,
+                "loaded_at": self.loaded_at.isoformat(timespec="seconds")}
+
+
+class DatasetManager:
+    def __init__(self, build, source_version, prepare=(), interval=60.0, name="dataset-watch"):
+        """``build(version) -> Catalogue`` (complete, model included); ``source_version()`` is the
+        cheap on-disk version; ``prepare`` hooks run on a new catalogue right before it goes live."""
+        self.build = build
+        self.source_version = source_version
+        self.prepare = list(prepare)
+        self.interval = interval
+        self.name = name
+        self.current = None
+        self.pending = None  # being prepared; ratings subscribers feed it too
+        self.swaps = 0
+        self.source = None  # source_version() the live catalogue was built from
+        self.last_error = None
+        self.last_build_s = None
+        self._listeners = []
+        self._build_lock = threading.Lock()  # one build at a time
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._force = False
+        self._failed = None
+        self._pid = None
+        self._checked = threading.Event()  # this process's first version check is done
+
+    # ---------- reads ----------
+    def catalogues(self):
+        """The live catalogue plus one being prepared, if any."""
+        return [c for c in (self.current, self.pending) if c is not None]
+
+    def status(self):
+        return {"current": self.current.info() if self.current is not None else None, "source": self.source,
+                "building": self._build_lock.locked(), "swaps": self.swaps,
+                "last_build_s": self.last_build_s, "last_error": self.last_error,
+                "watching": self._pid == os.getpid(), "interval": self.interval}
+
+    # ---------- publishing ----------
+    def subscribe(self, fn):
+        """``fn(old, new)`` after every swap."""
+        self._listeners.append(fn)
+
+    def publish(self, catalogue):
+        for hook in self.prepare:
+            hook(catalogue)
+        with self._lock:
+            old, self.current, self.pending = self.current, catalogue, None
+            if old is not None:
+                self.swaps += 1
+        for fn in self._listeners:
+            fn(old, catalogue)
+        return old
+
+    def load(self, build=None):
+        """Initial synchronous load; ``build`` overrides the reload builder (e.g. to warm up lazily)."""
+        self.source = self.source_version()
+        catalogue = (build or self.build)(self.source)
+        self.pending = catalogue
+        self.publish(catalogue)
+        return catalogue
+
+    def reload(self, force=False):
+        """Build + publish the on-disk dataset if its version changed (or ``force``).
+
+        Runs in the caller's thread; returns the new catalogue, or None if
+        nothing changed or the build failed (the old one stays live).
+        """
+        with self._build_lock:
+            version = self.source_version()
+            if not force and version in (self.source, self._failed):
+                return None
+            t0 = time.perf_counter()
+            try:
+                catalogue = self.build(version)
+                self.pending = catalogue
+                self.publish(catalogue)
+            except Exception as e:
+                self.pending = None
+                self._failed = version  # don't retry the same broken version every tick
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"⚠️ dataset reload ({version}) failed:", e)
+                return None
+            self.source, self._failed = version, None
+            self.last_build_s = round(time.perf_counter() - t0, 3)
+            self.last_error = None
+            print(f"✅ dataset {catalogue.version} live ({len(catalogue)} restaurants, "
+                  f"built in {self.last_build_s}s)")
+            return catalogue
+
+    # ---------- background ----------
+    def request_reload(self, force=False):
+        """Ask this process's watcher to reload now."""
+        self.ensure_started()
+        with self._lock:
+            self._force = self._force or force
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.interval if self.interval > 0 else None)
+            self._wake.clear()
+            with self._lock:
+                force, self._force = self._force, False
+            try:
+                self.reload(force=force)
+            except Exception as e:
+                print(f"⚠️ {self.name} failed:", e)
+
+    def ensure_started(self):
+        """Start this process's watcher thread if it isn't running yet.
+
+        The first call in a process runs one version check (and the reload it
+        may need) before returning; concurrent callers wait for it too.
+        """
+        if self._pid == os.getpid():
+            self._checked.wait()
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                checked = None
+            else:
+                self._pid = os.getpid()
+                self._checked = checked = threading.Event()
+        if checked is None:
+            self._checked.wait()
+            return
+        try:
+            self.reload()
+        except Exception as e:
+            print(f"⚠️ {self.name} failed:", e)
+        finally:
+            checked.set()
+        threading.Thread(target=self._loop, name=self.name, daemon=True).start()
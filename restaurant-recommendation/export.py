@@ -0,0 +1,149 @@
+"""Streaming bulk export of the (filtered, sorted) catalogue and of top-K recommendations.
+
+    python export.py restaurants --city "New Delhi" --sort rating --format csv -o delhi.csv
+    python export.py recommendations -k 10 > recommendations.ndjson
+
+These generators also back GET /api/export/restaurants and
+/api/export/recommendations, which take the same filter and sort
+parameters as /api/restaurants. Rows are encoded one at a time and sent
+in chunks of about 64 KB (chunked transfer, no Content-Length). Memory
+stays flat however many rows go out; the ordered row ids (8 bytes a row)
+are the only per-export array. NDJSON rows are the catalogue's
+pre-serialised fragments (fragments.py), the same bytes /api/restaurants
+serves. Recommendations are looked up ``RECOMMEND_BLOCK`` rows at a time
+from the top-K neighbour table.
+"""
+import csv
+import io
+import itertools
+import json
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CHUNK_BYTES = 64 * 1024
+ROW_BLOCK = 4096  # row ids converted to Python ints per step
+RECOMMEND_BLOCK = 1024  # rows per similar_rows_batch() call
+REC_CSV_COLUMNS = ["Restaurant ID", "Restaurant Name", "rank", "Recommended ID", "Recommended Name", "score"]
+
+
+def chunked(pieces, size=CHUNK_BYTES):
+    """Join an iterable of bytes into chunks of about ``size`` bytes."""
+    buf, n = [], 0
+    for piece in pieces:
+        buf.append(piece)
+        n += len(piece)
+        if n >= size:
+            yield b"".join(buf)
+            buf, n = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+def iter_rows(rows, block=ROW_BLOCK):
+    """Row ids of an int array as Python ints, without converting it all at once."""
+    for start in range(0, len(rows), block):
+        yield from rows[start:start + block].tolist()
+
+
+def csv_lines(header, records):
+    """One encoded CSV line per record (header first)."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for values in itertools.chain([header], records):
+        writer.writerow(values)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+
+
+def restaurant_lines(c, rows, fmt="ndjson", fields=None, dumps=json.dumps):
+    """Lines for catalogue ``c``'s ``rows`` (all columns, or just ``fields``)."""
+    restaurants = c.restaurants
+    if fmt == "csv":
+        columns = fields or (list(restaurants[0]) if restaurants else [])
+        return csv_lines(columns, ([restaurants[i].get(k, "") for k in columns] for i in iter_rows(rows)))
+    if fields:
+        return (dumps({k: restaurants[i].get(k) for k in fields}).encode("utf-8") + b"\n"
+                for i in iter_rows(rows))
+    row_json = c.json["rows"]
+    return (row_json.raw(i) + b"\n" for i in iter_rows(rows))
+
+
+def recommendation_pairs(c, rows, k, similar_batch, block=RECOMMEND_BLOCK):
+    """(row, [(recommended row, score)]) for each of ``rows`` the model knows."""
+    limit = c.tfidf_matrix.shape[0]
+    for start in range(0, len(rows), block):
+        chunk = [i for i in rows[start:start + block].tolist() if i < limit]
+        if not chunk:
+            continue
+        indices, scores = similar_batch(chunk, k)
+        for i, picks, sims in zip(chunk, indices.tolist(), scores.tolist()):
+            yield i, list(zip(picks, sims))
+
+
+def recommendation_lines(c, rows, k, similar_batch, fmt="ndjson", dumps=json.dumps):
+    """Lines of the top-``k`` similar restaurants of each of ``rows``.
+
+    NDJSON: one object per restaurant with a ``recommendations`` list.
+    CSV: one line per (restaurant, rank).
+    """
+    restaurants = c.restaurants
+    pairs = recommendation_pairs(c, rows, k, similar_batch)
+
+    def ref(i):
+        r = restaurants[i]
+        return r.get("Restaurant ID"), r.get("Restaurant Name", "")
+
+    if fmt == "csv":
+        return csv_lines(REC_CSV_COLUMNS, (ref(i) + (rank,) + ref(j) + (round(s, 6),)
+                                           for i, picks in pairs for rank, (j, s) in enumerate(picks, 1)))
+    return (dumps({"Restaurant ID": ref(i)[0], "Restaurant Name": ref(i)[1],
+                   "recommendations": [{"Restaurant ID": ref(j)[0], "Restaurant Name": ref(j)[1],
+                                        "score": round(s, 6)} for j, s in picks]}).encode("utf-8") + b"\n"
+            for i, picks in pairs)
+
+
+if __name__ == "__main__":
+    import argparse
+    import contextlib
+    import os
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Export restaurants or top-K recommendations as NDJSON / CSV.")
+    parser.add_argument("what", choices=["restaurants", "recommendations"])
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    parser.add_argument("--search", default="")
+    parser.add_argument("--city", default="", help="comma-separated")
+    parser.add_argument("--cuisine", default="", help="comma-separated")
+    parser.add_argument("--rating", default="", help="minimum aggregate rating")
+    parser.add_argument("--sort", default="", help="as /api/restaurants ?sort=")
+    parser.add_argument("--fields", default="", help="comma-separated columns (restaurants only)")
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("-k", type=int, default=5, help="recommendations per restaurant")
+    parser.add_argument("-o", "--out", default="-", help="file to write (default: stdout)")
+    args = parser.parse_args()
+
+    if args.what == "recommendations":
+        os.environ.setdefault("ML_WARMUP_BLOCKING", "1")  # need the model before exporting
+    else:
+        os.environ.setdefault("ML_WARMUP", "0")
+    with contextlib.redirect_stdout(sys.stderr):  # keep the app's startup messages out of the export
+        import app
+
+    c = app.datasets.current
+    if args.what == "recommendations" and not c.ml_ready:
+        sys.exit("TF-IDF model unavailable (DISABLE_HEAVY_ML set or empty dataset)")
+    t0 = time.perf_counter()
+    with app.pinned(c):
+        try:
+            _, fmt, lines = app.export_lines(args.what, vars(args))
+        except ValueError as e:
+            sys.exit(str(e))
+        out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+        written = 0
+        with out:
+            for chunk in chunked(lines):
+                out.write(chunk)
+                written += len(chunk)
+    print(f"✅ exported {args.what} ({fmt}, {written / 1e6:.1f} MB, dataset {c.version}) "
+          f"in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
@@ -0,0 +1,127 @@
+"""Append-only, time-indexed store for the contact / feedback form.
+
+Replaces ``feedback.json``, which was loaded, appended to and rewritten
+whole on every submission, then re-read and sorted on the display-date
+*string* on every page view. Here a submission is one INSERT, and entries
+carry an ISO-8601 ``created`` timestamp indexed by (type, created, id), so
+reading the newest page is an index range scan of ``limit`` rows.
+
+Older pages use keyset cursors (the last entry's ``(created, id)``), not
+OFFSET, so deep pages cost the same as the first one and stay stable while
+new feedback arrives.
+
+The legacy JSON file is imported once, when the database is created.
+"""
+import base64
+import datetime
+import json
+
+from sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    type    TEXT NOT NULL,
+    name    TEXT NOT NULL DEFAULT '',
+    email   TEXT NOT NULL DEFAULT '',
+    message TEXT NOT NULL DEFAULT '',
+    rating  TEXT,
+    created TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS feedback_by_type_created ON feedback (type, created DESC, id DESC);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+"""
+
+DISPLAY_FORMAT = "%b %d, %Y - %I:%M %p"  # what feedback.json stored and the page shows
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def _legacy_created(date):
+    try:
+        return datetime.datetime.strptime(str(date), DISPLAY_FORMAT).isoformat(timespec="seconds")
+    except ValueError:
+        return None
+
+
+def display_date(created):
+    """ISO timestamp -> the "Oct 17, 2026 - 09:30 AM" form the page shows."""
+    try:
+        return datetime.datetime.fromisoformat(created).strftime(DISPLAY_FORMAT)
+    except (TypeError, ValueError):
+        return created or ""
+
+
+def encode_cursor(created, entry_id):
+    raw = json.dumps([created, int(entry_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(created, id) from encode_cursor(); None if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created, entry_id = json.loads(raw)
+        return str(created), int(entry_id)
+    except (ValueError, TypeError):
+        return None
+
+
+class FeedbackStore(SQLiteStore):
+    SCHEMA = SCHEMA
+
+    def __init__(self, path, legacy_path=None):
+        super().__init__(path)
+        self._import_legacy(legacy_path)
+
+    def _import_legacy(self, path):
+        with self._tx() as db:
+            if self._imported(db, "legacy_imported", _now()) or not path:
+                return
+            try:
+                with open(path, encoding="utf-8") as f:
+                    items = json.load(f)
+            except (OSError, ValueError):
+                items = []
+            # file order is submission order; undated / unparseable entries keep it via the id
+            rows = [(e.get("type") or "contact", e.get("name") or "", e.get("email") or "",
+                     e.get("message") or "", e.get("rating"), _legacy_created(e.get("date")) or _now())
+                    for e in items if isinstance(e, dict)] if isinstance(items, list) else []
+            db.executemany(
+                "INSERT INTO feedback (type, name, email, message, rating, created) VALUES (?, ?, ?, ?, ?, ?)",
+                rows)
+
+    def add(self, type, name="", email="", message="", rating=None, created=None):
+        """Append one entry; returns its id."""
+        cur = self._conn().execute(
+            "INSERT INTO feedback (type, name, email, message, rating, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (type, name or "", email or "", message or "", rating, created or _now()))
+        return cur.lastrowid
+
+    def page(self, type, limit=20, before=None):
+        """(entries, next_cursor): the newest ``limit`` entries of ``type``, older than cursor ``before``.
+
+        ``next_cursor`` is None on the last page.
+        """
+        after = decode_cursor(before) if before else None
+        sql = "SELECT id, type, name, email, message, rating, created FROM feedback WHERE type = ?"
+        args = [type]
+        if after is not None:
+            sql += " AND (created < ? OR (created = ? AND id < ?))"
+            args += [after[0], after[0], after[1]]
+        sql += " ORDER BY created DESC, id DESC LIMIT ?"
+        rows = self._conn().execute(sql, args + [limit + 1]).fetchall()
+
+        entries = [dict(r, date=display_date(r["created"])) for r in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1]["created"], rows[limit - 1]["id"]) if len(rows) > limit else None
+        return entries, next_cursor
+
+    def count(self, type=None):
+        if type is None:
+            return self._conn().execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
+        return self._conn().execute("SELECT COUNT(*) FROM feedback WHERE type = ?", (type,)).fetchone()[0]
@@ -0,0 +1,80 @@
+"""Pre-serialised JSON bodies for catalogue rows.
+
+List endpoints used to ``jsonify`` the same restaurant dicts from scratch on
+every request. Here each row's static JSON object is encoded to bytes once
+per dataset version (lazily, on first use) and responses are assembled by
+joining those fragments. Per-request fields such as ``explanation`` are
+spliced in without re-encoding the rest.
+
+Bytes match what ``jsonify`` would produce for the same data, given the
+``dumps`` the app passes in (sorted keys, compact separators). A spliced
+field whose key sorts after every static key is appended before the closing
+brace; any other field falls back to encoding the merged dict.
+
+    frags = JSONFragments(restaurants, dumps, version)
+    body = frags.array(frags.splice(i, explanation=text) for i in rows)
+"""
+import threading
+
+
+class JSONFragments:
+    def __init__(self, records, dumps, version=None, project=None):
+        """``dumps(obj) -> str``; ``project(record) -> dict`` selects / coerces the fields served."""
+        self.records = records
+        self.version = version
+        self._dumps = dumps
+        self._project = project
+        self._bodies = [None] * len(records)
+        self._last_key = [None] * len(records)  # greatest static key per row
+        self._lock = threading.Lock()
+        self.encoded = 0
+
+    def _fields(self, row):
+        r = self.records[row]
+        return self._project(r) if self._project is not None else r
+
+    def dumps(self, obj):
+        return self._dumps(obj).encode("utf-8")
+
+    def raw(self, row):
+        """The row's JSON object as bytes, encoded on first use."""
+        body = self._bodies[row]
+        if body is None:
+            fields = self._fields(row)
+            body = self.dumps(fields)
+            with self._lock:
+                self._bodies[row] = body
+                self._last_key[row] = max(fields) if fields else ""
+                self.encoded += 1
+        return body
+
+    def splice(self, row, **fields):
+        """The row's JSON object with ``fields`` added (or overriding static ones)."""
+        body = self.raw(row)
+        if not fields:
+            return body
+        last = self._last_key[row]
+        keys = sorted(fields)
+        if keys[0] <= last:
+            return self.dumps({**self._fields(row), **fields})  # would land mid-object
+        tail = b",".join(self.dumps(k) + b":" + self.dumps(fields[k]) for k in keys)
+        return body[:-1] + (b"," if len(body) > 2 else b"") + tail + b"}"
+
+    def warm(self):
+        """Encode every row now (e.g. at startup) instead of on first use."""
+        for row in range(len(self._bodies)):
+            self.raw(row)
+
+    @staticmethod
+    def array(items):
+        """JSON array from already-encoded items."""
+        return b"[" + b",".join(items) + b"]"
+
+    def object(self, fields):
+        """JSON object with sorted keys; ``bytes`` values are taken as already encoded."""
+        return b"{" + b",".join(
+            self.dumps(k) + b":" + (v if isinstance(v, bytes) else self.dumps(v))
+            for k, v in sorted(fields.items())) + b"}"
+
+    def stats(self):
+        return {"rows": len(self._bodies), "encoded": self.encoded, "version": self.version}
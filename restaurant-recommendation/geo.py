@@ -0,0 +1,92 @@
+"""Spatial index for "near me" queries.
+
+Restaurants are placed on the unit sphere (x, y, z) and indexed with a
+``cKDTree``; straight-line (chord) distance there is monotonic in
+great-circle distance, so k-nearest and radius queries on the tree are exact
+without touching every row. Rows with missing or (0, 0) coordinates are
+left out of the tree.
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0088
+# rating / (1 + km / DISTANCE_SCALE_KM): a 4.5★ place 2 km away ties a 3★ one next door
+DISTANCE_SCALE_KM = 2.0
+
+
+def _xyz(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def km_to_chord(km):
+    return 2.0 * np.sin(np.minimum(km / EARTH_RADIUS_KM, np.pi) / 2.0)
+
+
+def chord_to_km(chord):
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+
+class GeoIndex:
+    def __init__(self, lat, lon):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        valid = (np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+                 & ~((lat == 0) & (lon == 0)))
+        self.rows = np.flatnonzero(valid)  # tree position -> catalogue row
+        self.tree = cKDTree(_xyz(lat[valid], lon[valid])) if len(self.rows) else None
+
+    def nearest(self, lat, lon, k=10, radius_km=5.0, allowed=None):
+        """Up to ``k`` (rows, distances_km) within ``radius_km``, nearest first.
+
+        ``allowed`` is an optional boolean mask over catalogue rows; the tree
+        is asked for progressively more neighbours until ``k`` allowed rows
+        are found or the radius is exhausted.
+        """
+        if self.tree is None or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        point = _xyz([lat], [lon])[0]
+        bound = km_to_chord(radius_km)
+        ask = k if allowed is None else 4 * k
+        while True:
+            ask = min(ask, len(self.rows))
+            dist, pos = self.tree.query(point, k=ask, distance_upper_bound=bound)
+            dist, pos = np.atleast_1d(dist), np.atleast_1d(pos)
+            hit = np.isfinite(dist)
+            dist, rows = dist[hit], self.rows[pos[hit]]
+            exhausted = hit.sum() < ask or ask == len(self.rows)
+            if allowed is not None:
+                keep = allowed[rows]
+                dist, rows = dist[keep], rows[keep]
+            if len(rows) >= k or exhausted:
+                return rows[:k], chord_to_km(dist[:k])
+            ask *= 4
+
+    def within(self, lat, lon, radius_km, allowed=None):
+        """All (rows, distances_km) within ``radius_km`` (unordered)."""
+        if self.tree is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        point = _xyz([lat], [lon])[0]
+        pos = np.asarray(self.tree.query_ball_point(point, km_to_chord(radius_km)), dtype=np.int64)
+        rows = self.rows[pos]
+        if allowed is not None:
+            keep = allowed[rows]
+            pos, rows = pos[keep], rows[keep]
+        dist = np.linalg.norm(self.tree.data[pos] - point, axis=1)
+        return rows, chord_to_km(dist)
+
+    def best_rated(self, lat, lon, ratings, k=10, radius_km=5.0, allowed=None):
+        """Top ``k`` by distance-weighted rating within ``radius_km``.
+
+        Returns (rows, distances_km, scores), best first.
+        """
+        rows, dist = self.within(lat, lon, radius_km, allowed)
+        if not len(rows):
+            return rows, dist, np.empty(0)
+        scores = np.nan_to_num(ratings[rows]) / (1.0 + dist / DISTANCE_SCALE_KM)
+        if len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, dist, scores = rows[top], dist[top], scores[top]
+        order = np.lexsort((dist, -scores))
+        return rows[order], dist[order], scores[order]
@@ -0,0 +1,44 @@
+"""Gunicorn settings: load the app once in the master, fork workers from it.
+
+With ``preload_app`` the catalogue, the columnar store, the indexes and the
+memory-mapped TF-IDF / neighbour / snapshot arrays are built before the fork,
+so every worker shares those pages with the master instead of loading its
+own copy. ``gc.freeze()`` right before each fork keeps the cyclic GC from
+writing to (and thereby un-sharing) the preloaded objects.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Set GUNICORN_PRELOAD=0 to go back to one full copy per worker.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "2"))
+timeout = 120
+keepalive = 5
+max_requests = 200
+max_requests_jitter = 40
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "warning")
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+if preload_app:
+    # finish building the model in the master; threads don't survive fork()
+    os.environ.setdefault("ML_WARMUP_BLOCKING", "1")
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # check the dataset before serving: the master's catalogue may be stale by
+        # the time a recycled (max_requests) worker is forked from it
+        import app
+        if app.DATASET_WATCH_INTERVAL > 0:
+            app.datasets.ensure_started()
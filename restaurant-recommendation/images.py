@@ -0,0 +1,214 @@
+"""Resized, recompressed image variants with content-hashed names.
+
+    python images.py                      # static/images/* -> static/img/ + manifest.json
+
+The build step writes each original in ``static/images`` at every width in
+``WIDTHS`` narrower than the original, plus the original width capped at
+the largest. JPEGs are re-encoded progressive at ``QUALITY``; PNGs are
+re-encoded with ``optimize``. Variant names carry a hash of the original's
+bytes and of the encoding settings (``pizza-640.3f9c2a1b7e.jpg``), so a URL
+never changes content and can be cached forever. Unchanged originals are
+skipped on rebuild; variants no longer listed in the manifest are deleted.
+Pillow is only needed for the build.
+
+At runtime ``ImageVariants`` reads the manifest (again after a rebuild)
+and ``init_app`` gives templates ``image_url``, ``image_srcset`` and
+``image_variants`` (the compact map main.js uses). It also serves
+``/static/img/<hashed name>`` with ``Cache-Control: public, max-age=1y,
+immutable``. Without a manifest, the helpers hand back the originals.
+"""
+import hashlib
+import json
+import os
+import re
+
+from flask import request
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # only the build step needs Pillow
+    Image = ImageOps = None
+
+SOURCE_DIR = os.path.join("static", "images")
+OUT_DIR = os.path.join("static", "img")
+MANIFEST = "manifest.json"
+WIDTHS = (80, 160, 320, 640, 960, 1280, 1920)
+QUALITY = 80
+EXTENSIONS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG"}
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+HASHED = re.compile(r"\.[0-9a-f]{10}\.\w+$")
+
+
+def variant_name(name, width, key):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}-{width}.{key}{ext.lower()}"
+
+
+def digest(data, widths=WIDTHS, quality=QUALITY):
+    """Hash in the variant names: the original's bytes plus the encoding settings."""
+    settings = json.dumps([sorted(widths), quality]).encode("utf-8")
+    return hashlib.sha1(data + settings).hexdigest()[:10]
+
+
+def load_manifest(out_dir=OUT_DIR):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"images": {}}
+    return manifest if isinstance(manifest.get("images"), dict) else {"images": {}}
+
+
+# ---------- build ----------
+def _encode(im, path, fmt, quality):
+    if fmt == "JPEG":
+        if im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        im.save(path, "JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        im.save(path, "PNG", optimize=True)
+
+
+def build_one(path, name, out_dir, widths=WIDTHS, quality=QUALITY):
+    """Write the variants of one original; returns its manifest entry."""
+    with open(path, "rb") as f:
+        data = f.read()
+    key = digest(data, widths, quality)
+    fmt = EXTENSIONS[os.path.splitext(name)[1].lower()]
+    with Image.open(path) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode == "P":
+            im = im.convert("RGBA")  # palette images only resize with NEAREST
+        w0, h0 = im.size
+        sizes = sorted({w for w in widths if w < w0} | {min(w0, max(widths))})
+        files = {}
+        for w in sizes:
+            out = os.path.join(out_dir, variant_name(name, w, key))
+            resized = im if w == w0 else im.resize((w, max(1, round(h0 * w / w0))), Image.LANCZOS)
+            _encode(resized, out + ".tmp", fmt, quality)
+            os.replace(out + ".tmp", out)
+            files[str(w)] = os.path.getsize(out)
+    return {"hash": key, "width": w0, "height": h0, "widths": sizes, "bytes": files, "source_bytes": len(data)}
+
+
+def build(source_dir=SOURCE_DIR, out_dir=OUT_DIR, widths=WIDTHS, quality=QUALITY, force=False):
+    """Bring ``out_dir`` up to date with ``source_dir``; returns (manifest, {"built", "kept", "removed"})."""
+    if Image is None:
+        raise RuntimeError("Pillow is required to build image variants (pip install Pillow)")
+    os.makedirs(out_dir, exist_ok=True)
+    old = load_manifest(out_dir)["images"]
+    images, stats = {}, {"built": 0, "kept": 0, "removed": 0}
+    for name in sorted(os.listdir(source_dir)):
+        if os.path.splitext(name)[1].lower() not in EXTENSIONS:
+            continue
+        path = os.path.join(source_dir, name)
+        entry = old.get(name)
+        if entry and not force:
+            with open(path, "rb") as f:
+                key = digest(f.read(), widths, quality)
+            if entry.get("hash") == key and all(
+                    os.path.exists(os.path.join(out_dir, variant_name(name, w, key))) for w in entry["widths"]):
+                images[name] = entry
+                stats["kept"] += 1
+                continue
+        images[name] = build_one(path, name, out_dir, widths, quality)
+        stats["built"] += 1
+
+    keep = {variant_name(n, w, e["hash"]) for n, e in images.items() for w in e["widths"]}
+    for fname in os.listdir(out_dir):
+        if HASHED.search(fname) and fname not in keep:
+            os.remove(os.path.join(out_dir, fname))
+            stats["removed"] += 1
+
+    manifest = {"widths": sorted(widths), "quality": quality, "images": images}
+    tmp = os.path.join(out_dir, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+    return manifest, stats
+
+
+# ---------- runtime ----------
+class ImageVariants:
+    def __init__(self, static_folder="static", static_url="/static"):
+        """Originals in ``<static_folder>/images``, variants + manifest in ``<static_folder>/img``."""
+        self.out_dir = os.path.join(static_folder, "img")
+        self.static_url = static_url.rstrip("/")
+        self.prefix = f"{self.static_url}/img/"
+        self._images = {}
+        self._mtime = None
+
+    def images(self):
+        """{original name: manifest entry}, reloaded when the build step rewrites the manifest."""
+        try:
+            mtime = os.path.getmtime(os.path.join(self.out_dir, MANIFEST))
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self._images = load_manifest(self.out_dir)["images"] if mtime is not None else {}
+            self._mtime = mtime
+        return self._images
+
+    def _url(self, name, width, entry):
+        return self.prefix + variant_name(name, width, entry["hash"])
+
+    def url(self, name, width=None):
+        """Smallest variant at least ``width`` wide (largest without one); the original if not built."""
+        entry = self.images().get(name)
+        if entry is None:
+            return f"{self.static_url}/images/{name}"
+        sizes = entry["widths"]
+        pick = next((w for w in sizes if width is not None and w >= width), sizes[-1])
+        return self._url(name, pick, entry)
+
+    def srcset(self, name):
+        """``srcset`` value listing every variant of ``name`` ("" if not built)."""
+        entry = self.images().get(name)
+        if entry is None:
+            return ""
+        return ", ".join(f"{self._url(name, w, entry)} {w}w" for w in entry["widths"])
+
+    def client_map(self):
+        """{name: [hash, widths]} for main.js, which builds the same URLs."""
+        return {name: [e["hash"], e["widths"]] for name, e in self.images().items()}
+
+    # ---------- Flask glue ----------
+    def init_app(self, app):
+        app.jinja_env.globals.update(image_url=self.url, image_srcset=self.srcset,
+                                     image_variants=self.client_map)
+
+        @app.after_request
+        def _immutable(resp):
+            if resp.status_code in (200, 304) and request.path.startswith(self.prefix) \
+                    and HASHED.search(request.path):
+                resp.cache_control.no_cache = None
+                resp.cache_control.public = True
+                resp.cache_control.max_age = IMMUTABLE_MAX_AGE
+                resp.cache_control.immutable = True
+            return resp
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Build resized, content-hashed image variants.")
+    parser.add_argument("--source", default=SOURCE_DIR)
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--widths", default=",".join(map(str, WIDTHS)))
+    parser.add_argument("--quality", type=int, default=QUALITY)
+    parser.add_argument("--force", action="store_true", help="rebuild unchanged originals too")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    try:
+        manifest, stats = build(args.source, args.out, [int(w) for w in args.widths.split(",") if w.strip()],
+                                args.quality, force=args.force)
+    except RuntimeError as e:
+        sys.exit(str(e))
+    before = sum(e["source_bytes"] for e in manifest["images"].values())
+    after = sum(sum(e["bytes"].values()) for e in manifest["images"].values())
+    print(f"✅ {len(manifest['images'])} images ({stats['built']} built, {stats['kept']} unchanged, "
+          f"{stats['removed']} stale variants removed) in {time.perf_counter() - t0:.1f}s; "
+          f"originals {before / 1e6:.1f} MB, all variants {after / 1e6:.1f} MB")
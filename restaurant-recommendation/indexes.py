@@ -0,0 +1,164 @@
+"""Inverted indexes over the restaurant catalogue, built once at load.
+
+* posting lists (sorted int32 row ids) for City and for every cuisine token
+* a trigram index on Restaurant Name, Locality and Address used by search
+* primary-key map ``Restaurant ID -> row`` and an exact ``name -> rows`` map
+
+Filters are answered by merging / intersecting posting lists; search ranks
+exact name hits first and then typo-tolerant trigram matches.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+from store import column, split_cuisines
+
+# search fields and how much a hit on each is worth
+SEARCH_FIELDS = (("Restaurant Name", 1.0), ("Locality", 0.6), ("Address", 0.4))
+FUZZY_MIN_SIMILARITY = 0.6   # share of query trigrams a fuzzy name hit must have
+PLACE_MIN_SIMILARITY = 0.8   # ... and a locality / address hit
+
+
+def _norm(text):
+    return " ".join(str(text).lower().split())
+
+
+def trigrams(text, pad=True):
+    """Set of 3-char shingles; padded like pg_trgm so short words still match."""
+    s = _norm(text)
+    if pad:
+        s = "  " + s + " "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def _postings(buckets):
+    return {k: np.array(v, dtype=np.int32) for k, v in buckets.items()}
+
+
+def union(lists):
+    lists = [l for l in lists if len(l)]
+    if not lists:
+        return np.empty(0, dtype=np.int32)
+    if len(lists) == 1:
+        return lists[0]
+    return np.unique(np.concatenate(lists))
+
+
+def intersect(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+class RestaurantIndex:
+    def __init__(self, restaurants):
+        self.size = len(restaurants)
+
+        by_city = defaultdict(list)
+        by_cuisine = defaultdict(list)
+        by_name = defaultdict(list)
+        self.by_id = {}
+        grams = {field: defaultdict(list) for field, _ in SEARCH_FIELDS}
+
+        names = column(restaurants, "Restaurant Name", "")
+        rows = zip(column(restaurants, "City", ""), column(restaurants, "Cuisines", ""), names,
+                   column(restaurants, "Restaurant ID"))
+        for i, (city, cuisines, name, rid) in enumerate(rows):
+            by_city[str(city).strip()].append(i)
+            for token in set(split_cuisines(cuisines)):
+                by_cuisine[token].append(i)
+            by_name[str(name)].append(i)
+            if rid is not None:
+                self.by_id.setdefault(str(rid).strip(), i)
+        for field, _ in SEARCH_FIELDS:
+            for i, value in enumerate(column(restaurants, field)):
+                if value is None or value != value:  # missing / NaN
+                    continue
+                for g in trigrams(value):
+                    grams[field][g].append(i)
+
+        self.by_city = _postings(by_city)
+        self.by_cuisine = _postings(by_cuisine)
+        self.by_name = dict(by_name)
+        self.grams = {field: _postings(g) for field, g in grams.items()}
+        self.names_lower = [_norm(name) for name in names]
+
+    # ---------- lookups ----------
+    def row_for_id(self, restaurant_id):
+        return self.by_id.get(str(restaurant_id).strip())
+
+    def rows_for_name(self, name):
+        return self.by_name.get(str(name), [])
+
+    def row_for_name(self, name):
+        rows = self.rows_for_name(name)
+        return rows[0] if rows else None
+
+    # ---------- filters ----------
+    def city_rows(self, cities):
+        return union([self.by_city[c] for c in cities if c in self.by_city])
+
+    def cuisine_rows(self, cuisines):
+        """Rows with a cuisine token containing any of ``cuisines`` (lowercase)."""
+        return union([rows for token, rows in self.by_cuisine.items()
+                      if any(c in token for c in cuisines)])
+
+    def names_rows(self, names):
+        return np.array(sorted({i for n in names for i in self.rows_for_name(n)}), dtype=np.int32)
+
+    # ---------- search ----------
+    def _similarity(self, field, query_grams):
+        """Per-row share of ``query_grams`` present in ``field`` (dense float array)."""
+        postings = self.grams[field]
+        lists = [postings[g] for g in query_grams if g in postings]
+        if not lists:
+            return None
+        counts = np.bincount(np.concatenate(lists), minlength=self.size)
+        return counts / float(len(query_grams))
+
+    def search(self, text, rows=None):
+        """Rank rows (optionally restricted to ``rows``) for a free-text query.
+
+        Returns ``(row_ids, scores)`` best first. Exact name substrings always
+        match (names starting with the query rank highest); misspelt names and
+        locality / address hits come after them by trigram similarity.
+        """
+        q = _norm(text)
+        if not q:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        names = self.names_lower
+        if len(q) < 3:
+            # too short for trigrams: plain substring on the candidate names
+            cand = np.arange(self.size) if rows is None else np.asarray(rows)
+            hits = np.array([i for i in cand if q in names[i]], dtype=np.int64)
+            scores = np.array([3.0 if names[i].startswith(q) else 2.0 for i in hits])
+        else:
+            qgrams = trigrams(q)
+            score = np.zeros(self.size)
+            for field, weight in SEARCH_FIELDS:
+                sim = self._similarity(field, qgrams)
+                if sim is None:
+                    continue
+                floor = FUZZY_MIN_SIMILARITY if field == "Restaurant Name" else PLACE_MIN_SIMILARITY
+                score = np.maximum(score, np.where(sim >= floor, sim * weight, 0.0))
+
+            # exact substrings: every unpadded query trigram must be in the name
+            inner = trigrams(q, pad=False)
+            exact = self._similarity("Restaurant Name", inner)
+            if exact is not None:
+                for i in np.flatnonzero(exact >= 1.0):
+                    if q in names[i]:
+                        score[i] = 3.0 if names[i].startswith(q) else 2.0
+
+            if rows is not None:
+                keep = np.zeros(self.size, dtype=bool)
+                keep[np.asarray(rows, dtype=np.int64)] = True
+                score[~keep] = 0.0
+            hits = np.flatnonzero(score > 0)
+            scores = score[hits]
+
+        order = np.argsort(-scores, kind="stable")
+        return hits[order], scores[order]
@@ -0,0 +1,136 @@
+"""Stream the raw tab-separated dataset into a binary catalogue snapshot.
+
+    python ingest.py [../dataaset] [--out data/snapshot] [--keep 2]
+
+Rows are parsed one at a time (csv handles quoted multi-line addresses; an
+unquoted line break inside Address is stitched back together), types are
+normalised to those of data/restaurants.json (numbers float, id and
+coordinates as their decimal text) and the multi-factor defaults that
+update_restaurants.py used to patch in are filled.
+Output goes to a new snapshot version (see snapshot.py) which the app loads
+instead of data/restaurants.json.
+"""
+import csv
+import os
+import sys
+
+from snapshot import SCHEMA, SnapshotWriter, prune
+
+DEFAULT_SOURCE = os.path.join("..", "dataaset")
+DEFAULT_OUT = os.path.join("data", "snapshot")
+
+# multi-factor fields (same defaults as update_restaurants.py)
+DEFAULTS = {"Mood": "Casual", "Time": "Dinner", "Budget": "Medium", "Group": "2–4"}
+COORDINATES = ("Longitude", "Latitude")
+
+
+def _trim(fields):
+    while fields and not fields[-1].strip():
+        fields = fields[:-1]
+    return fields
+
+
+def read_rows(path, stats):
+    """Yield one ``{header: value}`` dict per record of the TSV at ``path``."""
+    csv.field_size_limit(1 << 24)
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.reader(f, delimiter="\t")
+        header = next(reader, None)
+        if header is None:
+            return
+        width = len(header)
+        pending = None
+        for fields in reader:
+            if pending is not None:
+                # previous line broke mid-field: glue its last field to our first
+                head, tail = _trim(pending), _trim(fields)
+                merged = head[:-1] + [head[-1] + " " + tail[0]] + tail[1:] if head and tail else head + tail
+                previous, pending = pending, None
+                if len(merged) <= width and len(tail) < width:
+                    stats["repaired"] += 1
+                    yield dict(zip(header, merged + [""] * (width - len(merged))))
+                    continue
+                # not a split after all: a record with an empty tail
+                yield dict(zip(header, previous))
+            if len(_trim(fields)) < width - 6 and len(fields) == width:
+                # numeric tail is empty: looks like a record split across lines
+                pending = fields
+                continue
+            if len(fields) != width:
+                stats["skipped"] += 1
+                continue
+            yield dict(zip(header, fields))
+        if pending is not None:
+            yield dict(zip(header, pending))
+
+
+def _float(v, default=float("nan")):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return default
+
+
+def _int(v, default=0):
+    try:
+        return int(float(v))
+    except (TypeError, ValueError, OverflowError):
+        return default
+
+
+def normalise(row):
+    """Typed record for one raw row, or None if it can't be trusted."""
+    rid = _int(row.get("Restaurant ID"), None)
+    if rid is None or not str(row.get("Restaurant Name", "")).strip():
+        return None
+    rec = {}
+    for name, kind in SCHEMA:
+        raw = row.get(name, "")
+        if kind == "int":
+            rec[name] = _int(raw)
+        elif kind == "float":
+            rec[name] = _float(raw, 0.0)
+        elif name in COORDINATES:
+            text = str(raw).strip()
+            rec[name] = text if _float(text) == _float(text) else ""  # unparseable -> missing
+        else:
+            rec[name] = " ".join(str(raw).split())
+    rec["Restaurant ID"] = str(rid)
+    for name, default in DEFAULTS.items():
+        if not rec.get(name):
+            rec[name] = default
+    return rec
+
+
+def ingest(source, out, keep=2):
+    stats = {"rows": 0, "repaired": 0, "skipped": 0}
+    writer = SnapshotWriter(out)
+    for row in read_rows(source, stats):
+        rec = normalise(row)
+        if rec is None:
+            stats["skipped"] += 1
+            continue
+        writer.add(rec)
+        stats["rows"] += 1
+    version = writer.commit(source={"path": os.path.abspath(source), "size": os.path.getsize(source)})
+    if keep:
+        prune(out, keep=keep)
+    return version, stats
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Ingest the raw TSV dataset into a binary snapshot.")
+    parser.add_argument("source", nargs="?", default=DEFAULT_SOURCE)
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--keep", type=int, default=2, help="snapshot versions to keep (0 = all)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        sys.exit(f"dataset not found: {args.source}")
+    t0 = time.perf_counter()
+    version, stats = ingest(args.source, args.out, keep=args.keep)
+    print(f"✅ snapshot {version}: {stats['rows']} rows "
+          f"({stats['repaired']} repaired, {stats['skipped']} skipped) in {time.perf_counter() - t0:.2f}s")
@@ -0,0 +1,97 @@
+"""Measure per-worker memory of the gunicorn deployment, with and without preload.
+
+    python measure_memory.py [--workers 4] [--requests 200]
+
+Starts gunicorn (gunicorn.conf.py) once with GUNICORN_PRELOAD=0 and once with
+GUNICORN_PRELOAD=1, sends a mix of API requests to warm every worker, then
+reads /proc/<pid>/smaps_rollup for the master and each worker. RSS counts
+shared pages in full for every process; PSS splits them between the
+processes sharing them, so sum(PSS) is the real footprint. Linux only.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+PATHS = [
+    "/api/restaurants?sort=rating",
+    "/api/restaurants?city=New%20Delhi&cuisine=chinese",
+    "/api/restaurants?search=pizza",
+    "/api/recommend?name=KFC",
+    "/api/recommendations?weather=rainy",
+    "/api/filters",
+]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rollup(pid):
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                out[parts[0][:-1]] = int(parts[1]) // 1024  # MiB
+    out["Private"] = out.pop("Private_Clean", 0) + out.pop("Private_Dirty", 0)
+    return out
+
+
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def run(preload, workers, requests):
+    port = _free_port()
+    env = dict(os.environ, GUNICORN_PRELOAD="1" if preload else "0", PORT=str(port),
+               WEB_CONCURRENCY=str(workers), GUNICORN_LOG_LEVEL="error")
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+                            env=env, stdout=subprocess.DEVNULL)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        while True:
+            try:
+                urllib.request.urlopen(base + "/api/model/status", timeout=1)
+                break
+            except Exception:
+                if proc.poll() is not None or time.perf_counter() - t0 > 300:
+                    raise RuntimeError("gunicorn did not come up")
+                time.sleep(0.2)
+        startup = time.perf_counter() - t0
+        for i in range(requests):
+            urllib.request.urlopen(base + PATHS[i % len(PATHS)], timeout=30).read()
+        time.sleep(0.5)
+        master = _rollup(proc.pid)
+        per_worker = [_rollup(p) for p in _children(proc.pid)]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+    return {
+        "preload": preload,
+        "startup_s": round(startup, 2),
+        "master_mib": master,
+        "workers_mib": per_worker,
+        "total_pss_mib": master["Pss"] + sum(w["Pss"] for w in per_worker),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    results = [run(False, args.workers, args.requests), run(True, args.workers, args.requests)]
+    print(json.dumps(results, indent=2))
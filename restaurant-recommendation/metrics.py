@@ -0,0 +1,251 @@
+"""Latency histograms per route and per named stage, in Prometheus text format.
+
+    metrics = Metrics()
+    metrics.init_app(app)                 # http_request_duration_seconds{route,method,status}
+    with metrics.span("restaurants.filter"):
+        ...                               # stage_duration_seconds{stage="restaurants.filter"}
+
+Histograms have fixed buckets. An observation is one ``bisect`` plus two
+increments under a lock. The per-request allocations are small and fixed:
+one ``_Span`` per stage and one label tuple per observation. Series are
+created only the first time a label set is seen. With
+``Metrics(enabled=False)``, ``span`` hands back a shared no-op context
+manager. Values are per process, so under gunicorn each worker reports its
+own.
+
+``SlowRequestProfiler`` is the opt-in sampling profiler. While a request is
+in flight, one daemon thread samples its stack from ``sys._current_frames()``
+every ``interval`` seconds. Requests slower than ``threshold`` get their
+hottest stacks written out in folded format (``frame;frame;frame count``,
+which flamegraph.pl and speedscope read). When it is not installed, the
+request path does not touch it at all.
+"""
+import bisect
+import collections
+import datetime
+import functools
+import os
+import sys
+import threading
+import time
+
+from flask import Response, g, request
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+                   30.0, 120.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class _Span:
+    __slots__ = ("histogram", "name", "t0")
+
+    def __init__(self, histogram, name):
+        self.histogram = histogram
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.t0, self.name)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.requests = Histogram("http_request_duration_seconds",
+                                  "Time from request start to response returned, by route.",
+                                  ("route", "method", "status"), buckets)
+        self.stages = Histogram("stage_duration_seconds", "Time spent in named stages (spans).",
+                                ("stage",), buckets)
+        self._gauges = []  # (name, help, fn)
+
+    # ---------- instrumentation ----------
+    def span(self, name):
+        """Context manager timing one named stage."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self.stages, name)
+
+    def timed(self, name):
+        """Decorator form of ``span``."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def gauge(self, name, help, fn):
+        """Report ``fn()`` (a number) as a gauge at scrape time."""
+        self._gauges.append((name, help, fn))
+
+    # ---------- exposition ----------
+    def render(self):
+        lines = self.requests.render() + self.stages.render()
+        for name, help, fn in self._gauges:
+            try:
+                value = float(fn())
+            except Exception:
+                continue
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {value!r}"]
+        return "\n".join(lines) + "\n"
+
+    def response(self):
+        return Response(self.render(), content_type=CONTENT_TYPE)
+
+    # ---------- Flask glue ----------
+    def init_app(self, app, profiler=None):
+        """Time every request; hand them to ``profiler`` (a SlowRequestProfiler) if given."""
+        if not self.enabled and profiler is None:
+            return
+
+        @app.before_request
+        def _start_timer():
+            g._metrics_t0 = time.perf_counter()
+            if profiler is not None:
+                profiler.start()
+
+        @app.after_request
+        def _record(resp):
+            t0 = g.get("_metrics_t0")
+            if t0 is not None and self.enabled:
+                route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+                self.requests.observe(time.perf_counter() - t0, route, request.method, str(resp.status_code))
+            return resp
+
+        if profiler is not None:
+            @app.teardown_request
+            def _profile(exc=None):
+                t0 = g.get("_metrics_t0")
+                if t0 is not None:
+                    profiler.finish(f"{request.method} {request.full_path.rstrip('?')}", time.perf_counter() - t0)
+
+
+class SlowRequestProfiler:
+    def __init__(self, threshold=0.5, interval=0.005, top=20, log_path=None, keep=50):
+        self.threshold = threshold
+        self.interval = interval
+        self.top = top
+        self.log_path = log_path
+        self.reports = collections.deque(maxlen=keep)
+        self._active = {}  # thread id -> Counter of folded stacks
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_sampler(self):
+        # threads don't survive fork(): one sampler per process, started lazily
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._loop, name="slow-request-sampler", daemon=True).start()
+
+    def start(self):
+        self._ensure_sampler()
+        with self._lock:
+            self._active[threading.get_ident()] = collections.Counter()
+
+    def finish(self, label, elapsed):
+        with self._lock:
+            samples = self._active.pop(threading.get_ident(), None)
+        if not samples or elapsed < self.threshold:
+            return None
+        report = {"request": label, "seconds": round(elapsed, 4), "samples": sum(samples.values()),
+                  "at": datetime.datetime.now().isoformat(timespec="seconds"),
+                  "stacks": samples.most_common(self.top)}
+        self.reports.append(report)
+        print(f"🐢 slow request {label}: {elapsed * 1000:.0f} ms ({report['samples']} samples)")
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(f"# {report['at']} {label} {elapsed * 1000:.1f}ms samples={report['samples']}\n")
+                    f.writelines(f"{stack} {count}\n" for stack, count in report["stacks"])
+            except OSError as e:
+                print("⚠️ could not write slow request log:", e)
+        return report
+
+    @staticmethod
+    def _fold(frame, skip):
+        names = []
+        while frame is not None and len(names) < 128:
+            code = frame.f_code
+            if code.co_filename != skip:
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples[self._fold(frame, __file__)] += 1
+                del frames  # don't keep other threads' frames alive until the next tick
@@ -0,0 +1,191 @@
+"""Matrix-factorization recommender (alternating least squares, NumPy only).
+
+Trained offline from the ratings store::
+
+    python mf.py train [--factors 32] [--iterations 15] [--reg 0.1]
+                       [--implicit --alpha 40]
+
+which writes ``data/mf/{user,item}_factors.npy`` + ``users.json`` /
+``items.json`` / ``meta.json``. Web workers memory-map the factor matrices and
+score a user with one ``item_factors @ user_vector`` plus argpartition.
+Users who rated something after the last training run are folded in with a
+single k×k solve against the item factors, so nobody needs per-request
+training.
+
+Explicit mode fits mean-centred ratings; implicit mode treats every rating
+as a positive interaction with confidence ``1 + alpha * rating``
+(Hu, Koren & Volinsky).
+"""
+import json
+import os
+
+import numpy as np
+
+META = "meta.json"
+
+
+# ---------- training ----------
+def _solve(cols, vals, Y, reg, implicit, alpha, YtY):
+    """Least-squares factor for one row given the other side's factors ``Y``."""
+    k = Y.shape[1]
+    Yi = Y[cols]
+    if implicit:
+        conf = 1.0 + alpha * vals
+        A = YtY + (Yi.T * (conf - 1.0)) @ Yi + reg * np.eye(k)
+        b = Yi.T @ conf
+    else:
+        A = Yi.T @ Yi + reg * len(cols) * np.eye(k)
+        b = Yi.T @ vals
+    return np.linalg.solve(A, b)
+
+
+def _solve_all(R, Y, reg, implicit, alpha):
+    X = np.zeros((R.shape[0], Y.shape[1]), dtype=np.float64)
+    YtY = Y.T @ Y if implicit else None
+    for row in range(R.shape[0]):
+        s, e = R.indptr[row], R.indptr[row + 1]
+        if s != e:
+            X[row] = _solve(R.indices[s:e], R.data[s:e], Y, reg, implicit, alpha, YtY)
+    return X
+
+
+def train_als(R, factors=32, iterations=15, reg=0.1, implicit=False, alpha=40.0, seed=0, log=None):
+    """Fit ``R ≈ X @ Y.T`` on a users × items CSR matrix; returns (X, Y, mean)."""
+    R = R.tocsr().astype(np.float64)
+    mean = 0.0
+    if not implicit and R.nnz:
+        mean = float(R.data.mean())
+        R = R.copy()
+        R.data -= mean
+    Rt = R.T.tocsr()
+    rng = np.random.default_rng(seed)
+    Y = rng.normal(scale=0.1, size=(R.shape[1], factors))
+    X = np.zeros((R.shape[0], factors))
+    for it in range(iterations):
+        X = _solve_all(R, Y, reg, implicit, alpha)
+        Y = _solve_all(Rt, X, reg, implicit, alpha)
+        if log and not implicit and R.nnz:
+            coo = R.tocoo()
+            pred = np.einsum("ij,ij->i", X[coo.row], Y[coo.col])
+            log(f"  iter {it + 1}/{iterations}  train RMSE {np.sqrt(np.mean((pred - coo.data) ** 2)):.4f}")
+    return X.astype(np.float32), Y.astype(np.float32), mean
+
+
+# ---------- persistence ----------
+def save_model(path, X, Y, users, items, meta):
+    os.makedirs(path, exist_ok=True)
+
+    def put(name, write):
+        tmp = os.path.join(path, f".{name}.tmp-{os.getpid()}")
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, os.path.join(path, name))
+
+    put("user_factors.npy", lambda f: np.save(f, X))
+    put("item_factors.npy", lambda f: np.save(f, Y))
+    put("users.json", lambda f: f.write(json.dumps(users, ensure_ascii=False).encode("utf-8")))
+    put("items.json", lambda f: f.write(json.dumps(items, ensure_ascii=False).encode("utf-8")))
+    # meta last: its mtime is what readers watch
+    put(META, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+
+
+class MFModel:
+    def __init__(self, X, Y, users, items, meta):
+        self.user_factors = X
+        self.item_factors = Y
+        self.users = {u: i for i, u in enumerate(users)}
+        self.items = items
+        self.item_index = {it: i for i, it in enumerate(items)}
+        self.meta = meta
+        self.implicit = bool(meta.get("implicit"))
+        self.reg = float(meta.get("reg", 0.1))
+        self.alpha = float(meta.get("alpha", 40.0))
+        self.mean = float(meta.get("mean", 0.0))
+        self._YtY = None
+
+    @classmethod
+    def load(cls, path):
+        """Memory-mapped model from ``path``, or None if missing / inconsistent."""
+        try:
+            with open(os.path.join(path, META), encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(os.path.join(path, "users.json"), encoding="utf-8") as f:
+                users = json.load(f)
+            with open(os.path.join(path, "items.json"), encoding="utf-8") as f:
+                items = json.load(f)
+            X = np.load(os.path.join(path, "user_factors.npy"), mmap_mode="r")
+            Y = np.load(os.path.join(path, "item_factors.npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if X.shape[0] != len(users) or Y.shape[0] != len(items) or X.shape[1] != Y.shape[1]:
+            return None  # caught mid-write; try again next time
+        return cls(X, Y, users, items, meta)
+
+    def user_vector(self, user, rated=None):
+        """Trained factor for ``user``; otherwise fold in their current ``rated`` dict."""
+        row = self.users.get(user)
+        if row is not None:
+            return np.asarray(self.user_factors[row])
+        pairs = [(self.item_index[i], r) for i, r in (rated or {}).items() if i in self.item_index]
+        if not pairs:
+            return None
+        cols = np.array([c for c, _ in pairs])
+        vals = np.array([r for _, r in pairs], dtype=np.float64)
+        if not self.implicit:
+            vals = vals - self.mean
+        if self.implicit and self._YtY is None:
+            Y = np.asarray(self.item_factors, dtype=np.float64)
+            self._YtY = Y.T @ Y
+        return _solve(cols, vals, np.asarray(self.item_factors, dtype=np.float64),
+                      self.reg, self.implicit, self.alpha, self._YtY).astype(np.float32)
+
+    def recommend(self, user, rated=None, n=10):
+        """[(item, score)] best first, skipping what the user already rated."""
+        vec = self.user_vector(user, rated)
+        if vec is None or not len(self.items):
+            return []
+        scores = self.item_factors @ vec
+        if not self.implicit:
+            scores = scores + self.mean
+        for it in rated or ():
+            j = self.item_index.get(it)
+            if j is not None:
+                scores[j] = -np.inf
+        n = min(n, len(scores))
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.items[j], float(scores[j])) for j in top if np.isfinite(scores[j])]
+
+
+if __name__ == "__main__":
+    import argparse
+    import datetime
+    import time
+
+    parser = argparse.ArgumentParser(description="Train the ALS recommender from the ratings store.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    t = sub.add_parser("train")
+    t.add_argument("--factors", type=int, default=32)
+    t.add_argument("--iterations", type=int, default=15)
+    t.add_argument("--reg", type=float, default=0.1)
+    t.add_argument("--implicit", action="store_true")
+    t.add_argument("--alpha", type=float, default=40.0)
+    t.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("ML_WARMUP", "0")
+    import app
+    from cf import CFEngine
+
+    R, users, items = CFEngine(app.load_ratings()).to_csr()
+    print(f"Training ALS on {R.nnz} ratings ({len(users)} users × {len(items)} restaurants)")
+    t0 = time.perf_counter()
+    X, Y, mean = train_als(R, factors=args.factors, iterations=args.iterations, reg=args.reg,
+                           implicit=args.implicit, alpha=args.alpha, seed=args.seed, log=print)
+    meta = {
+        "factors": args.factors, "iterations": args.iterations, "reg": args.reg,
+        "implicit": args.implicit, "alpha": args.alpha, "mean": mean,
+        "ratings": int(R.nnz), "trained_at": datetime.datetime.now().isoformat(),
+    }
+    save_model(app.MF_DIR, X, Y, users, items, meta)
+    print(f"✅ MF model saved to {app.MF_DIR} ({time.perf_counter() - t0:.1f}s)")
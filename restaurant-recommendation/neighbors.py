@@ -0,0 +1,116 @@
+"""Precomputed top-K similar-restaurant table for the content recommender.
+
+For every row of the TF-IDF matrix we keep the K most similar other rows
+(indices + cosine scores), computed with blocked sparse products so we never
+hold more than ``block × N`` scores at once. ``/api/recommend`` then becomes
+a slice of this table instead of a row × matrix product per request.
+
+The table lives next to the TF-IDF artifacts it was computed from (see
+tfidf_store.py), so it is versioned by the same dataset key. Rebuild it
+offline with::
+
+    python neighbors.py [K]
+"""
+import os
+
+import numpy as np
+
+DEFAULT_K = 20
+# dense score block kept in memory while building (~64 MB of float32)
+BLOCK_BUDGET = 16_000_000
+
+
+def top_k(scores, k, exclude=None):
+    """Top-``k`` column ids of each row of a dense ``scores`` block, best first.
+
+    ``exclude`` is an optional per-row column to drop (the item itself).
+    Ties are broken by the lower row id so results are deterministic.
+    """
+    rows, n = scores.shape
+    if exclude is not None:
+        scores[np.arange(rows), exclude] = -np.inf
+    k = min(k, n - (1 if exclude is not None else 0))
+    if k <= 0:
+        return np.empty((rows, 0), dtype=np.int32), np.empty((rows, 0), dtype=np.float32)
+    if k < n:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(scores, part, axis=1)
+        # argpartition picks arbitrarily among columns tied with the k-th score;
+        # where it left some out, take the lowest ids like a full sort would
+        kth = part_scores.min(axis=1, keepdims=True)
+        short = (scores == kth).sum(axis=1) > (part_scores == kth).sum(axis=1)
+        for r in np.flatnonzero(short):
+            better = np.flatnonzero(scores[r] > kth[r])
+            part[r] = np.concatenate([better, np.flatnonzero(scores[r] == kth[r])[:k - len(better)]])
+    else:
+        part = np.tile(np.arange(n), (rows, 1))
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.lexsort((part, -part_scores), axis=1)
+    idx = np.take_along_axis(part, order, axis=1).astype(np.int32)
+    return idx, np.take_along_axis(part_scores, order, axis=1).astype(np.float32)
+
+
+def query_topk(matrix, rows, k=DEFAULT_K, block=None):
+    """Top ``k`` neighbours of just ``rows``: blocked ``matrix[rows] @ matrix.T``.
+
+    Returns (indices[len(rows), k], scores[len(rows), k]); each row is
+    excluded from its own neighbours.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    n = matrix.shape[0]
+    if block is None:
+        block = max(1, min(max(len(rows), 1), BLOCK_BUDGET // max(n, 1)))
+    k = min(k, max(n - 1, 0))
+    indices = np.zeros((len(rows), k), dtype=np.int32)
+    scores = np.zeros((len(rows), k), dtype=np.float32)
+    matrix_t = matrix.T.tocsc()
+    for start in range(0, len(rows), block):
+        part = rows[start:start + block]
+        sims = (matrix[part] @ matrix_t).toarray()
+        idx, sc = top_k(sims, k, exclude=part)
+        indices[start:start + len(part)] = idx
+        scores[start:start + len(part)] = sc
+    return indices, scores
+
+
+def build_topk(matrix, k=DEFAULT_K, block=None):
+    """Blocked ``matrix @ matrix.T`` keeping the top ``k`` neighbours per row."""
+    return query_topk(matrix, np.arange(matrix.shape[0]), k=k, block=block)
+
+
+def save_topk(path, indices, scores):
+    os.makedirs(path, exist_ok=True)
+    for name, arr in (("neighbors_indices", indices), ("neighbors_scores", scores)):
+        tmp = os.path.join(path, f"{name}.tmp-{os.getpid()}.npy")
+        np.save(tmp, arr)
+        os.replace(tmp, os.path.join(path, name + ".npy"))
+
+
+def load_topk(path):
+    """Memory-mapped (indices, scores) saved under ``path``, or None."""
+    try:
+        indices = np.load(os.path.join(path, "neighbors_indices.npy"), mmap_mode="r")
+        scores = np.load(os.path.join(path, "neighbors_scores.npy"), mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if indices.shape != scores.shape:
+        return None
+    return indices, scores
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    os.environ.setdefault("ML_WARMUP", "0")  # we build explicitly below
+    import app
+
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else app.NEIGHBORS_K
+    c = app.datasets.current
+    app.init_ml(c, load_neighbors=False)
+    if not c.ml_ready:
+        sys.exit("TF-IDF matrix unavailable (DISABLE_HEAVY_ML set or empty dataset)")
+    t0 = time.perf_counter()
+    app.build_neighbor_table(c, k=k)
+    print(f"✅ Neighbour table saved to {app.model_path(c)} "
+          f"(rows={c.tfidf_matrix.shape[0]}, k={k}, {time.perf_counter() - t0:.1f}s)")
@@ -0,0 +1,125 @@
+"""Background materialisation of per-user results (hybrid recommendations).
+
+A daemon thread keeps ``{user: (value, computed_at)}`` up to date. Users are
+marked dirty when their ratings change (a ratings_log subscriber calls
+``mark``) and each pass recomputes only the dirty ones; ``mark_all`` (new MF
+model, ratings log reloaded) queues every active user again. A dirty user
+has no entry as far as ``get`` is concerned, so callers compute live until
+the worker catches up. A user stays dirty while a pass works through the
+batch, up to the moment their own value is stored.
+
+Threads don't survive fork(), so every process starts its own worker lazily
+via ``ensure_started`` (call it from the request path).
+"""
+import datetime
+import os
+import threading
+
+
+class Precomputer:
+    def __init__(self, compute, users, interval=30.0, before_pass=None, name="precompute"):
+        """``compute(user) -> value``; ``users()`` lists the active users;
+        ``before_pass()`` runs first on every pass (pull new ratings, check the model)."""
+        self.compute = compute
+        self.users = users
+        self.interval = interval
+        self.before_pass = before_pass
+        self.name = name
+        self.results = {}
+        self.last_run = None
+        self._dirty = set()
+        self._inflight = set()  # taken by the running pass, not recomputed yet
+        self._everyone = True  # first pass covers all active users
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    # ---------- invalidation ----------
+    def mark(self, user):
+        if user is None:
+            return
+        with self._lock:
+            self._dirty.add(user)
+        self._wake.set()
+
+    def mark_all(self):
+        with self._lock:
+            self._everyone = True
+        self._wake.set()
+
+    # ---------- reads ----------
+    def get(self, user):
+        """(value, computed_at) for a clean user, else None."""
+        with self._lock:
+            if self._everyone or user in self._dirty or user in self._inflight:
+                return None
+            return self.results.get(user)
+
+    def stats(self):
+        with self._lock:
+            return {"users": len(self.results), "pending": len(self._dirty | self._inflight),
+                    "full_pass_pending": self._everyone,
+                    "last_run": self.last_run.isoformat() if self.last_run else None,
+                    "running": self._pid == os.getpid()}
+
+    # ---------- worker ----------
+    def run_once(self):
+        """One pass: recompute the dirty users (or everyone after mark_all)."""
+        if self.before_pass is not None:
+            self.before_pass()
+        with self._lock:
+            batch = set(self.users()) if self._everyone else set()
+            if self._everyone:
+                # users that dropped out won't be recomputed: forget them now
+                for user in set(self.results) - batch:
+                    del self.results[user]
+            self._everyone = False
+            batch |= self._dirty
+            self._dirty = set()
+            # the whole batch stays dirty for get() until each user's value is stored
+            self._inflight = set(batch)
+        failed, error = set(), None
+        try:
+            for user in batch:
+                try:
+                    value = self.compute(user)
+                except Exception as e:
+                    # no stale entry: get() sends the user to live computation until a pass succeeds
+                    failed.add(user)
+                    error = e
+                    with self._lock:
+                        self.results.pop(user, None)
+                        self._inflight.discard(user)
+                else:
+                    with self._lock:
+                        self.results[user] = (value, datetime.datetime.now())
+                        self._inflight.discard(user)
+        finally:
+            with self._lock:
+                # failed users, and any the pass never reached, stay dirty for the next one
+                self._dirty |= failed | self._inflight
+                self._inflight = set()
+        if failed:
+            print(f"⚠️ {self.name}: {len(failed)} of {len(batch)} users failed (last: {error})")
+        with self._lock:
+            self.last_run = datetime.datetime.now()
+        return len(batch) - len(failed)
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"⚠️ {self.name} pass failed:", e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def ensure_started(self):
+        """Start this process's worker thread if it isn't running yet."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._loop, name=self.name, daemon=True).start()
@@ -0,0 +1,219 @@
+"""Append-only ratings log (JSON lines) with an in-memory (user, restaurant) index.
+
+* Writes append one line per rating under an exclusive ``flock`` on a side
+  lock file, so gunicorn threads and workers never lose each other's updates.
+  Concurrent writers in one process are group-committed: whoever gets there
+  first writes + fsyncs everything queued behind it in one go.
+* Readers tail the file from their last offset, so picking up another
+  worker's ratings costs one ``stat`` plus the new bytes.
+* The log is compacted (rewritten with only the latest entry per key) once
+  it holds ``COMPACT_RATIO`` times more lines than live ratings. Other
+  processes notice the new inode and reload.
+
+Subscribers (e.g. the CF engine) get every applied entry in file order, or
+``None`` when the log was reloaded from scratch.
+
+    python ratings_log.py compact
+"""
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: fall back to in-process locking only
+    fcntl = None
+
+COMPACT_RATIO = 4
+COMPACT_MIN_LINES = 1000
+
+
+class RatingsLog:
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(threading.Lock())
+        self._pending = []
+        self._queued = 0      # entries handed to append()
+        self._flushed = 0     # ... and written (or failed)
+        self._flushing = False
+        self._errors = []     # (first_seq, last_seq, exception) of failed batches
+        self._subscribers = []
+        self._reset_state()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not os.path.exists(path) and legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+        self.refresh()
+
+    def _reset_state(self):
+        self.index = {}
+        self.lines = 0
+        self._offset = 0
+        self._inode = None
+        self._reloading = True  # subscribers get one None instead of every entry
+
+    # ---------- locking ----------
+    def _flock(self):
+        f = open(self.lock_path, "a")
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        return f
+
+    # ---------- reading ----------
+    def subscribe(self, fn):
+        self._subscribers.append(fn)
+
+    def _apply(self, entry):
+        try:
+            key = (entry["user"], entry["restaurant"])
+        except (KeyError, TypeError):
+            return
+        self.index[key] = entry
+        if not self._reloading:
+            for fn in self._subscribers:
+                fn(entry)
+
+    def refresh(self):
+        """Apply whatever was appended since we last looked (any process)."""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                return
+            if self._inode is not None and st.st_ino != self._inode:
+                # compacted / replaced by someone else: start over
+                self._reset_state()
+            self._inode = st.st_ino
+            if st.st_size > self._offset:
+                self._read_tail(st.st_size)
+            if self._reloading:
+                self._reloading = False
+                for fn in self._subscribers:
+                    fn(None)
+
+    def _read_tail(self, size):
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+        end = chunk.rfind(b"\n") + 1  # ignore a line still being written
+        for line in chunk[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(json.loads(line))
+            except ValueError:
+                continue
+            self.lines += 1
+        self._offset += end
+
+    def all(self):
+        """Latest rating per (user, restaurant), as ``[{user, restaurant, rating, date}]``."""
+        self.refresh()
+        with self._lock:
+            return list(self.index.values())
+
+    def get(self, user, restaurant):
+        self.refresh()
+        with self._lock:
+            return self.index.get((user, restaurant))
+
+    # ---------- writing ----------
+    def _write(self, batch):
+        data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in batch).encode("utf-8")
+        with self._flock():
+            with open(self.path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append(self, entry):
+        """Durably append one rating; returns once it is on disk and indexed."""
+        with self._cond:
+            self._pending.append(entry)
+            self._queued += 1
+            seq = self._queued
+            while self._flushed < seq:
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                # become the leader: commit everything queued so far
+                self._flushing = True
+                batch, self._pending = self._pending, []
+                first, last = self._flushed + 1, self._queued
+                self._cond.release()
+                error = None
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    error = e
+                finally:
+                    self._cond.acquire()
+                    self._flushing = False
+                    self._flushed = last
+                    if error is not None:
+                        self._errors = self._errors[-16:] + [(first, last, error)]
+                    self._cond.notify_all()
+            for first, last, error in self._errors:
+                if first <= seq <= last:
+                    raise error
+        self.refresh()
+        self.maybe_compact()
+
+    def replace(self, entries):
+        """Rewrite the log with exactly ``entries`` (latest per key wins)."""
+        latest = {}
+        for e in entries:
+            try:
+                latest[(e["user"], e["restaurant"])] = e
+            except (KeyError, TypeError):
+                continue
+        with self._lock, self._flock():
+            self._rewrite(latest.values())
+
+    # ---------- compaction ----------
+    def _rewrite(self, entries):
+        tmp = f"{self.path}.tmp-{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for e in entries:
+                f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        # reload our own view from the new file
+        self._reset_state()
+        self.refresh()
+
+    def maybe_compact(self):
+        if self.lines >= COMPACT_MIN_LINES and self.lines > COMPACT_RATIO * max(len(self.index), 1):
+            self.compact()
+
+    def compact(self):
+        with self._lock, self._flock():
+            self.refresh()  # include lines other workers appended meanwhile
+            self._rewrite(list(self.index.values()))
+
+    def _import_legacy(self, legacy_path):
+        try:
+            with open(legacy_path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(entries, list):
+            with self._flock():
+                if not os.path.exists(self.path):
+                    self._rewrite(entries)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["compact"]:
+        sys.exit("usage: python ratings_log.py compact")
+    os.environ.setdefault("ML_WARMUP", "0")
+    import app
+
+    before = app.ratings_log.lines
+    app.ratings_log.compact()
+    print(f"✅ ratings log compacted: {before} -> {app.ratings_log.lines} lines")
@@ -0,0 +1,147 @@
+"""Versioned LRU cache for read-only JSON endpoints, with ETag / 304 support.
+
+Entries are keyed by the route, the query arguments exactly as the view
+reads them (grouped by name, values untouched) and the current version of
+every namespace the route depends on ("dataset", "ratings", "model", ...). Bumping a namespace
+changes the keys of everything depending on it and drops those entries right
+away, so stale responses are never served. Total body size is bounded;
+the least recently used entries go first.
+
+A namespace can have a resolver giving the version the current request
+works against (for "dataset": the catalogue the request pinned). The key
+then matches the data the body is built from, even when a swap lands
+mid-request. A body whose versions moved on while it was being computed
+is served but not stored.
+
+    @app.route("/api/filters")
+    @response_cache.cached(depends=("dataset",))
+    def get_filters(): ...
+"""
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import Response, make_response, request
+
+
+class _Entry:
+    __slots__ = ("body", "mimetype", "etag", "depends")
+
+    def __init__(self, body, mimetype, etag, depends):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self.depends = depends
+
+
+class ResponseCache:
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_age=60, resolvers=None):
+        """``resolvers``: {namespace: fn() -> version this request sees, or None for the stored one}."""
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._resolvers = dict(resolvers or {})
+        self._lock = threading.Lock()
+
+    # ---------- versions ----------
+    def version(self, namespace):
+        fn = self._resolvers.get(namespace)
+        if fn is not None:
+            value = fn()
+            if value is not None:
+                return value
+        return self._versions.get(namespace, 0)
+
+    def set_version(self, namespace, value):
+        """Pin a namespace to an external version (e.g. the dataset snapshot id)."""
+        with self._lock:
+            if self._versions.get(namespace) != value:
+                self._versions[namespace] = value
+                self._drop(namespace)
+
+    def bump(self, namespace):
+        """Invalidate everything that depends on ``namespace``."""
+        with self._lock:
+            v = self._versions.get(namespace, 0)
+            self._versions[namespace] = (v + 1) if isinstance(v, int) else (v, 1)
+            self._drop(namespace)
+
+    def _drop(self, namespace):
+        for key in [k for k, e in self._entries.items() if namespace in e.depends]:
+            self.size -= len(self._entries.pop(key).body)
+
+    # ---------- entries ----------
+    def key(self, path, args, depends):
+        # raw values: views see "KFC " and "" as given, so the key must too;
+        # the sort is stable, so repeated arguments keep their order
+        params = tuple(sorted(args.items(multi=True), key=lambda kv: kv[0]))
+        return (path, params, tuple(self.version(d) for d in depends))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, mimetype, depends):
+        etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        entry = _Entry(body, mimetype, etag, tuple(depends))
+        if len(body) > self.max_bytes // 4:
+            return entry  # too big to be worth keeping; still gets an ETag
+        with self._lock:
+            if key[2] != tuple(self._versions.get(d, 0) for d in depends):
+                return entry  # built against versions that are gone now; nobody would look it up
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old.body)
+            self._entries[key] = entry
+            self.size += len(body)
+            while self.size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.body)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self.size, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "versions": dict(self._versions)}
+
+    # ---------- Flask glue ----------
+    def _respond(self, entry, hit):
+        headers = {"Cache-Control": f"public, max-age={self.max_age}", "X-Cache": "HIT" if hit else "MISS"}
+        if request.if_none_match.contains(entry.etag):
+            resp = Response(status=304, headers=headers)
+        else:
+            resp = Response(entry.body, mimetype=entry.mimetype, headers=headers)
+        resp.set_etag(entry.etag)
+        return resp
+
+    def cached(self, depends=("dataset",)):
+        """Decorator for GET views whose output depends only on the query string."""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                key = self.key(request.path, request.args, depends)
+                entry = self.get(key)
+                if entry is not None:
+                    return self._respond(entry, hit=True)
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200 or resp.direct_passthrough or resp.is_streamed:
+                    return resp
+                entry = self.put(key, resp.get_data(), resp.mimetype, depends)
+                return self._respond(entry, hit=False)
+            return wrapper
+        return decorator
@@ -0,0 +1,347 @@
+"""Versioned binary snapshot of the restaurant catalogue.
+
+Layout::
+
+    data/snapshot/
+        CURRENT                      name of the live version dir
+        <version>/manifest.json      format version, row count, column kinds
+        <version>/<col>.npy          numeric columns (float64 / int64)
+        <version>/<col>.codes.npy    categorical columns: int32 codes ...
+        <version>/<col>.values.json  ... and their distinct values
+        <version>/<col>.offsets.npy  free-text columns: int64 offsets ...
+        <version>/<col>.blob         ... into one UTF-8 string table
+
+Everything is written column by column in fixed-size chunks, so the writer
+never holds more than ``CHUNK_ROWS`` rows, and every array is loaded back
+with ``mmap_mode="r"``. Publishing a new version is an atomic rename of
+``CURRENT``; readers never see a half-written snapshot.
+
+The app never turns a snapshot into a list of dicts: ``Snapshot.records()``
+is a sequence that builds a row's dict only when that row is indexed (the
+rows a response returns), and whole-field consumers (store, indexes) read
+``Records.column()``, which hands out the mmap'd numeric arrays as they
+are.
+"""
+import operator
+import datetime
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+FORMAT_VERSION = 2
+CHUNK_ROWS = 50_000
+
+# column -> kind: float | int | cat (few distinct values) | str (free text).
+# Kinds follow data/restaurants.json, so records come back with the same
+# types the API has always sent: ids and coordinates are strings, counts
+# and costs are floats.
+SCHEMA = [
+    ("Restaurant ID", "str"),
+    ("Restaurant Name", "str"),
+    ("Country Name", "cat"),
+    ("Country Code", "float"),
+    ("City", "cat"),
+    ("Address", "str"),
+    ("Locality", "str"),
+    ("Locality Verbose", "str"),
+    ("Longitude", "str"),
+    ("Latitude", "str"),
+    ("Cuisines", "str"),
+    ("Average Cost for two", "float"),
+    ("Currency", "cat"),
+    ("Has Table booking", "cat"),
+    ("Has Online delivery", "cat"),
+    ("Is delivering now", "cat"),
+    ("Switch to order menu", "cat"),
+    ("Price range", "float"),
+    ("Aggregate rating", "float"),
+    ("Rating color", "cat"),
+    ("Rating text", "cat"),
+    ("Votes", "float"),
+    ("Mood", "cat"),
+    ("Time", "cat"),
+    ("Budget", "cat"),
+    ("Group", "cat"),
+]
+
+_DTYPES = {"float": np.float64, "int": np.int64, "cat": np.int32}
+
+
+def _file_key(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def _raw_to_npy(raw_path, npy_path, dtype, rows):
+    """Prefix an .npy header to a raw little-endian dump without loading it."""
+    with open(npy_path, "wb") as out:
+        np.lib.format.write_array_header_1_0(out, {
+            "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+            "fortran_order": False,
+            "shape": (rows,),
+        })
+        with open(raw_path, "rb") as src:
+            shutil.copyfileobj(src, out, 1 << 20)
+    os.remove(raw_path)
+
+
+class SnapshotWriter:
+    """Stream records (dicts) into a new snapshot version under ``root``."""
+
+    def __init__(self, root, schema=SCHEMA):
+        self.root = root
+        self.schema = schema
+        self.rows = 0
+        self._hash = hashlib.sha1()
+        self._tmp = os.path.join(root, f".tmp-{os.getpid()}")
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        os.makedirs(self._tmp)
+        self._buf = {name: [] for name, _ in schema}
+        self._cats = {name: {} for name, kind in schema if kind == "cat"}
+        self._blob_pos = {name: 0 for name, kind in schema if kind == "str"}
+        for name, kind in schema:
+            if kind == "str":
+                # leading 0 offset
+                self._append_raw(name, ".offsets.raw", np.zeros(1, dtype=np.int64))
+
+    def _path(self, name, suffix):
+        return os.path.join(self._tmp, _file_key(name) + suffix)
+
+    def _append_raw(self, name, suffix, arr):
+        with open(self._path(name, suffix), "ab") as f:
+            arr.tofile(f)
+
+    def add(self, record):
+        for name, kind in self.schema:
+            v = record.get(name)
+            if kind == "cat":
+                v = "" if v is None else str(v)
+                v = self._cats[name].setdefault(v, len(self._cats[name]))
+            elif kind == "str":
+                v = "" if v is None else str(v)
+            self._buf[name].append(v)
+        self.rows += 1
+        if len(self._buf[self.schema[0][0]]) >= CHUNK_ROWS:
+            self._flush()
+
+    def _flush(self):
+        for name, kind in self.schema:
+            values = self._buf[name]
+            if not values:
+                continue
+            if kind == "str":
+                encoded = [v.encode("utf-8") for v in values]
+                with open(self._path(name, ".blob"), "ab") as f:
+                    for b in encoded:
+                        f.write(b)
+                        self._hash.update(b)
+                ends = np.cumsum([len(b) for b in encoded], dtype=np.int64) + self._blob_pos[name]
+                self._blob_pos[name] = int(ends[-1])
+                self._append_raw(name, ".offsets.raw", ends)
+            else:
+                arr = np.asarray(values, dtype=_DTYPES[kind])
+                self._hash.update(arr.tobytes())
+                self._append_raw(name, ".raw", arr)
+            self._buf[name] = []
+
+    def commit(self, source=None):
+        """Finish the files, write the manifest and make this version CURRENT."""
+        self._flush()
+        columns = []
+        for name, kind in self.schema:
+            key = _file_key(name)
+            if kind == "str":
+                _raw_to_npy(self._path(name, ".offsets.raw"), self._path(name, ".offsets.npy"),
+                            np.int64, self.rows + 1)
+                if not os.path.exists(self._path(name, ".blob")):
+                    open(self._path(name, ".blob"), "wb").close()
+            else:
+                suffix = ".codes.npy" if kind == "cat" else ".npy"
+                if self.rows:
+                    _raw_to_npy(self._path(name, ".raw"), self._path(name, suffix), _DTYPES[kind], self.rows)
+                else:
+                    np.save(self._path(name, suffix), np.empty(0, dtype=_DTYPES[kind]))
+                if kind == "cat":
+                    with open(self._path(name, ".values.json"), "w", encoding="utf-8") as f:
+                        json.dump(list(self._cats[name]), f, ensure_ascii=False)
+            columns.append({"name": name, "kind": kind, "file": key})
+
+        created = datetime.datetime.now()
+        version = f"{created:%Y%m%dT%H%M%S}-{self._hash.hexdigest()[:8]}"
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "version": version,
+            "rows": self.rows,
+            "created": created.isoformat(),
+            "source": source or {},
+            "columns": columns,
+        }
+        with open(os.path.join(self._tmp, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        final = os.path.join(self.root, version)
+        if os.path.exists(final):
+            shutil.rmtree(self._tmp)  # identical content already published
+        else:
+            os.replace(self._tmp, final)
+        pointer = os.path.join(self.root, f".CURRENT.tmp-{os.getpid()}")
+        with open(pointer, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(pointer, os.path.join(self.root, "CURRENT"))
+        return version
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of one snapshot version."""
+
+    def __init__(self, path, manifest):
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest["version"]
+        self.rows = manifest["rows"]
+        self.kinds = {c["name"]: c["kind"] for c in manifest["columns"]}
+        self._files = {c["name"]: c["file"] for c in manifest["columns"]}
+        self._cache = {}  # column name -> mmap'd arrays for record()
+
+    def _load(self, name, suffix):
+        return np.load(os.path.join(self.path, self._files[name] + suffix), mmap_mode="r")
+
+    def _blob(self, name):
+        path = os.path.join(self.path, self._files[name] + ".blob")
+        if not os.path.getsize(path):
+            return np.empty(0, dtype=np.uint8)  # can't mmap an empty file
+        return np.memmap(path, dtype=np.uint8, mode="r")
+
+    def _reader(self, name):
+        """(kind, column data) for reading single rows, mapped once per column."""
+        reader = self._cache.get(name)
+        if reader is None:
+            kind = self.kinds[name]
+            if kind == "str":
+                reader = kind, (self._load(name, ".offsets.npy"), self._blob(name))
+            elif kind == "cat":
+                reader = kind, (self.array(name), self.categories(name))
+            else:
+                reader = kind, self.array(name)
+            self._cache[name] = reader
+        return reader
+
+    def array(self, name):
+        """float / int column as an (mmap'd) array; categorical -> codes."""
+        kind = self.kinds[name]
+        return self._load(name, ".codes.npy" if kind == "cat" else ".npy")
+
+    def categories(self, name):
+        with open(os.path.join(self.path, self._files[name] + ".values.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def strings(self, name):
+        """Decode a free-text column to a list of str."""
+        offsets = self._load(name, ".offsets.npy").tolist()
+        with open(os.path.join(self.path, self._files[name] + ".blob"), "rb") as f:
+            blob = f.read()
+        return [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(self.rows)]
+
+    def values(self, name):
+        """Column as a list of plain Python values (NaN floats become None)."""
+        kind = self.kinds[name]
+        if kind == "str":
+            return self.strings(name)
+        if kind == "cat":
+            cats = self.categories(name)
+            return [cats[c] for c in self.array(name).tolist()]
+        vals = self.array(name).tolist()
+        if kind == "float":
+            vals = [None if v != v else v for v in vals]
+        return vals
+
+    def record(self, i):
+        """Row ``i`` as a dict, read from the mapped columns (same values as ``values()``)."""
+        rec = {}
+        for name in self.kinds:
+            kind, data = self._reader(name)
+            if kind == "str":
+                offsets, blob = data
+                rec[name] = bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8")
+            elif kind == "cat":
+                codes, cats = data
+                rec[name] = cats[codes[i]]
+            else:
+                v = data[i].item()
+                rec[name] = None if v != v else v
+        return rec
+
+    def records(self):
+        return Records(self)
+
+
+class Records:
+    """Read-only sequence of a snapshot's rows; a row's dict is built each time it is indexed.
+
+    Stands in for the JSON file's list of dicts. Code that needs one field
+    of every row should use ``column()`` rather than iterate.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.rows
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.snapshot.record(j) for j in range(*i.indices(len(self)))]
+        i = operator.index(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("row out of range")
+        return self.snapshot.record(i)
+
+    def __iter__(self):
+        return (self.snapshot.record(i) for i in range(len(self)))
+
+    def column(self, name, default=None):
+        """Field ``name`` of every row: the mmap'd array for float / int columns, else a list."""
+        kind = self.snapshot.kinds.get(name)
+        if kind is None:
+            return [default] * len(self)
+        if kind in ("float", "int"):
+            return self.snapshot.array(name)
+        return self.snapshot.values(name)
+
+
+def load_snapshot(root):
+    """Snapshot named by ``root/CURRENT``, or None if missing / unsupported."""
+    try:
+        with open(os.path.join(root, "CURRENT"), encoding="utf-8") as f:
+            version = f.read().strip()
+        path = os.path.join(root, version)
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format_version") != FORMAT_VERSION:
+        return None
+    return Snapshot(path, manifest)
+
+
+def current_version(root):
+    """Version named by ``root/CURRENT`` (one small read, for change polling), or None."""
+    try:
+        with open(os.path.join(root, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def prune(root, keep=2):
+    """Delete all but the ``keep`` newest versions (never the CURRENT one)."""
+    current = load_snapshot(root)
+    versions = sorted(d for d in os.listdir(root)
+                      if not d.startswith(".") and os.path.isdir(os.path.join(root, d)))
+    for d in versions[:-keep] if keep else versions:
+        if current is None or d != current.version:
+            shutil.rmtree(os.path.join(root, d), ignore_errors=True)
@@ -0,0 +1,50 @@
+"""Shared plumbing for the small SQLite stores (accounts, feedback).
+
+Each thread gets its own connection, reopened after fork. The database runs
+in WAL mode, so readers never block the single writer. Statements
+autocommit; multi-statement writes go through ``_tx()`` (``BEGIN
+IMMEDIATE``). A busy timeout lets gunicorn threads and workers queue up for
+the write lock instead of failing.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SQLiteStore:
+    SCHEMA = ""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @contextmanager
+    def _tx(self):
+        db = self._conn()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _imported(self, db, key, now):
+        """True if the one-off import ``key`` already ran, else mark it as done (inside ``db``'s tx)."""
+        if db.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+            return True
+        db.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (key, now))
+        return False
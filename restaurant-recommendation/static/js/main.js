@@ -58,6 +58,38 @@ const stockImages = [
   "/static/images/food3.jpg"
 ];
 
+// ⭐ Resized variants built by `python images.py` (window.IMAGE_VARIANTS, set in base.html)
+function imageVariants(url) {
+  const m = /^\/static\/images\/([^/?#]+)$/.exec(url || "");
+  const entry = m && window.IMAGE_VARIANTS && window.IMAGE_VARIANTS[m[1]];
+  if (!entry) return null;
+  const [hash, widths] = entry;
+  const dot = m[1].lastIndexOf(".");
+  const stem = m[1].slice(0, dot), ext = m[1].slice(dot).toLowerCase();
+  return widths.map(w => ({ w, url: `/static/img/${stem}-${w}.${hash}${ext}` }));
+}
+
+// src + srcset + sizes for an <img> about `width` CSS px wide (plain src when not built)
+function imgAttrs(url, width, sizes) {
+  const variants = imageVariants(url);
+  if (!variants) return `src="${url}"`;
+  const pick = variants.find(v => v.w >= width) || variants[variants.length - 1];
+  return `src="${pick.url}" srcset="${variants.map(v => `${v.url} ${v.w}w`).join(", ")}" sizes="${sizes || width + "px"}"`;
+}
+
+function setImage(img, url, width, sizes) {
+  const variants = imageVariants(url);
+  if (!variants) {
+    img.src = url;
+    return;
+  }
+  img.sizes = sizes || width + "px";
+  img.srcset = variants.map(v => `${v.url} ${v.w}w`).join(", ");
+  img.src = (variants.find(v => v.w >= width) || variants[variants.length - 1]).url;
+}
+
+const CARD_SIZES = "(max-width: 600px) 100vw, 360px";
+
 // ⭐ Choose best image
 function getRestaurantImage(r) {
   if (r.Image_URL && r.Image_URL.trim() !== "") return r.Image_URL;
@@ -161,7 +193,7 @@ function loadRestaurants(page = 1) {
 
         const html = `
           <div class="card">
-            <img src="${image}" alt="${escapeHtml(r["Restaurant Name"] || "")}">
+            <img ${imgAttrs(image, 640, CARD_SIZES)} alt="${escapeHtml(r["Restaurant Name"] || "")}" loading="lazy">
             <div class="card-content">
               <h3>${escapeHtml(r["Restaurant Name"] || "")}</h3>
               <p><b>City:</b> ${escapeHtml(r.City || "")}</p>
@@ -190,6 +222,27 @@ function loadRestaurants(page = 1) {
     });
 }
 
+// Server-rendered first page (/restaurants): finish the cards instead of re-fetching
+function hydrateRestaurants() {
+  const list = document.getElementById("restaurantGrid");
+  if (!list || !list.dataset.total) return false;
+
+  list.querySelectorAll(".card").forEach(card => {
+    const img = card.querySelector("img");
+    if (img && !img.getAttribute("src")) {
+      setImage(img, getRestaurantImage({ City: card.dataset.city, Cuisines: card.dataset.cuisines }), 640, CARD_SIZES);
+    }
+    const expl = card.querySelector(".explanation");
+    if (expl) expl.innerHTML = "💡 " + renderExplanations(expl.dataset.explanation);
+  });
+
+  attachRatingEvents();
+  const total = parseInt(list.dataset.total, 10) || 0;
+  const perPage = parseInt(list.dataset.perPage, 10) || 1;
+  if (total > 0) renderPagination(Math.ceil(total / perPage), 1);
+  return true;
+}
+
 // =================== Rating Stars ===================
 function attachRatingEvents() {
   document.querySelectorAll(".rating-stars .star").forEach(star => {
@@ -284,7 +337,7 @@ function loadRecommendations() {
         const html = `
           <div class="rec-card" data-name="${escapeJsString(r["Restaurant Name"] || "")}" 
                onclick="openRecommendation('${escapeJsString(r["Restaurant Name"] || "")}')">
-            <img src="${image}" alt="${safeName}">
+            <img ${imgAttrs(image, 320, "220px")} alt="${safeName}" loading="lazy">
             <h4>${safeName}</h4>
             <p><b>City:</b> ${escapeHtml(r.City || "")}</p>
             <p><b>Cuisine:</b> ${escapeHtml(r.Cuisines || "")}</p>
@@ -339,7 +392,7 @@ function openRecommendation(name) {
         const explanationHTML = renderExplanations(r.explanation);
         const html = `
           <div class="rec-card">
-            <img src="${image}" alt="${escapeHtml(r["Restaurant Name"] || "")}">
+            <img ${imgAttrs(image, 320, "220px")} alt="${escapeHtml(r["Restaurant Name"] || "")}" loading="lazy">
             <h4>${escapeHtml(r["Restaurant Name"] || "")}</h4>
             <p><b>City:</b> ${escapeHtml(r.City || "")}</p>
             <p><b>Cuisine:</b> ${escapeHtml(r.Cuisines || "")}</p>
@@ -362,7 +415,7 @@ function closeModal() {
 // =================== On page load ===================
 window.onload = function () {
   loadFilters();
-  loadRestaurants();
+  if (!hydrateRestaurants()) loadRestaurants();
   loadRecommendations();
   renderWishlist();
 };
@@ -0,0 +1,179 @@
+"""Columnar in-memory view of the restaurant catalogue.
+
+The ``restaurants`` records (the JSON file's list of dicts, or a snapshot's
+``Records`` view) stay the source of truth for what we send back to the
+client; this module only keeps the columns the API filters and sorts on as
+NumPy arrays so that a request is a handful of vectorized mask / argsort
+calls instead of a Python pass over every row. Columns are read with
+``column()``, so a snapshot's numeric columns are used straight from the
+mmap'd files and no row dicts are built.
+"""
+import numpy as np
+
+
+def _to_float(x, default=0.0):
+    try:
+        return float(x)
+    except Exception:
+        return default
+
+
+def _to_int(x, default=0):
+    try:
+        return int(float(x))
+    except Exception:
+        return default
+
+
+def column(restaurants, name, default=None):
+    """Field ``name`` of every row: from the snapshot's columns when ``restaurants`` has them."""
+    read = getattr(restaurants, "column", None)
+    if read is not None:
+        return read(name, default)
+    return [r.get(name, default) for r in restaurants]
+
+
+def _floats(values, default=0.0):
+    if isinstance(values, np.ndarray):
+        return np.asarray(values, dtype=np.float64)  # a snapshot column: no copy, stays mmap'd
+    return np.fromiter((_to_float(v, default) for v in values), dtype=np.float64, count=len(values))
+
+
+def _ints(values):
+    if isinstance(values, np.ndarray):
+        return values.astype(np.int64)
+    return np.fromiter((_to_int(v) for v in values), dtype=np.int64, count=len(values))
+
+
+def split_cuisines(field):
+    """'French, Japanese' -> ['french', 'japanese'] (lowercased, stripped)."""
+    return [p.strip().lower() for p in str(field).split(",") if p.strip()]
+
+
+class RestaurantStore:
+    """Rating / votes / cost / lat / lon arrays, City category codes and cuisine bitsets.
+
+    Row ``i`` of every column refers to ``restaurants[i]``.
+    """
+
+    def __init__(self, restaurants):
+        self.restaurants = restaurants
+        n = len(restaurants)
+        self.size = n
+
+        # numeric columns (same coercion rules as safe_float / safe_int)
+        self.rating = _floats(column(restaurants, "Aggregate rating", 0))
+        self.votes = _ints(column(restaurants, "Votes", 0))
+        self.cost = _ints(column(restaurants, "Average Cost for two", 0))
+        # coordinates (NaN when missing) for the spatial index
+        self.lat = _floats(column(restaurants, "Latitude"), np.nan)
+        self.lon = _floats(column(restaurants, "Longitude"), np.nan)
+
+        # City -> category codes
+        city_values = [str(v).strip() for v in column(restaurants, "City", "")]
+        self.city_names, codes = np.unique(np.array(city_values, dtype=object), return_inverse=True)
+        self.city_codes = codes.astype(np.int32)
+        self._city_lookup = {c: i for i, c in enumerate(self.city_names)}
+
+        # Cuisines -> one bit per distinct (lowercased) cuisine token
+        token_ids = {}
+        labels = []  # first spelling seen for each token, for display
+        row_tokens = []
+        for field in column(restaurants, "Cuisines", ""):
+            ids = []
+            for part in str(field).split(","):
+                label = part.strip()
+                if label:
+                    t = token_ids.setdefault(label.lower(), len(token_ids))
+                    if t == len(labels):
+                        labels.append(label)
+                    ids.append(t)
+            row_tokens.append(ids)
+        self.cuisine_tokens = list(token_ids)
+        self.cuisine_labels = labels
+        n_words = max(1, (len(token_ids) + 63) // 64)
+        bits = np.zeros((n, n_words), dtype=np.uint64)
+        for i, ids in enumerate(row_tokens):
+            for t in ids:
+                bits[i, t >> 6] |= np.uint64(1) << np.uint64(t & 63)
+        self.cuisine_bits = bits
+
+    # ---------- masks ----------
+    def city_mask(self, cities):
+        """Rows whose (stripped) City is one of ``cities``."""
+        codes = [self._city_lookup[c] for c in cities if c in self._city_lookup]
+        if not codes:
+            return np.zeros(self.size, dtype=bool)
+        return np.isin(self.city_codes, codes)
+
+    def cuisine_mask(self, cuisines):
+        """Rows whose Cuisines field contains any of ``cuisines`` (lowercase substrings).
+
+        The query terms carry no commas, so a substring hit on the raw field is
+        always a hit on a single token; we resolve terms to tokens once and
+        test the bitsets.
+        """
+        query = np.zeros(self.cuisine_bits.shape[1], dtype=np.uint64)
+        hit = False
+        for t, token in enumerate(self.cuisine_tokens):
+            if any(c in token for c in cuisines):
+                query[t >> 6] |= np.uint64(1) << np.uint64(t & 63)
+                hit = True
+        if not hit:
+            return np.zeros(self.size, dtype=bool)
+        return (self.cuisine_bits & query).any(axis=1)
+
+    def rating_mask(self, min_rating):
+        return self.rating >= min_rating
+
+    def rating_rows(self, idx, min_rating):
+        """Keep the rows of ``idx`` rated at least ``min_rating``."""
+        return idx[self.rating[idx] >= min_rating]
+
+    # ---------- ordering ----------
+    def sort_key(self, idx, sort):
+        """Ascending sort key for the rows ``idx`` (None: keep the ``idx`` order)."""
+        if sort == "rating":
+            return -self.rating[idx]
+        if sort == "votes":
+            return -self.votes[idx]
+        if sort == "cost_low":
+            return self.cost[idx]
+        if sort == "cost_high":
+            return -self.cost[idx]
+        return None
+
+    def order(self, idx, sort):
+        """Reorder row indices ``idx`` by ``sort`` (stable, like ``sorted``)."""
+        key = self.sort_key(idx, sort)
+        if key is None:
+            return idx
+        return idx[np.argsort(key, kind="stable")]
+
+    def top(self, idx, sort, k, after=None):
+        """The next ``k`` rows of ``order(idx, sort)``, sorting only those.
+
+        ``after`` is the (key, position) of the last row already served, as
+        returned for it here; positions index ``idx`` and break ties the way
+        the stable sort does. ``argpartition``-style selection keeps a deep
+        page O(len(idx)) instead of a full sort.
+
+        Returns (rows, keys, positions).
+        """
+        pos = np.arange(len(idx))
+        key = self.sort_key(idx, sort)
+        if key is None:
+            start = 0 if after is None else int(after[1]) + 1
+            pos = pos[start:start + k]
+            return idx[pos], np.zeros(len(pos)), pos
+        if after is not None:
+            k0, p0 = after
+            keep = (key > k0) | ((key == k0) & (pos > p0))
+            pos, key = pos[keep], key[keep]
+        if 0 < k < len(key):
+            # everything up to the k-th smallest key, ties included, then sort just that
+            kth = np.partition(key, k - 1)[k - 1]
+            cand = key <= kth
+            pos, key = pos[cand], key[cand]
+        perm = np.argsort(key, kind="stable")[:k]
+        return idx[pos[perm]], key[perm], pos[perm]
@@ -0,0 +1,69 @@
+import importlib
+import json
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the app's modules are top-level scripts next to this directory
+sys.path.insert(0, ROOT)
+
+CITIES = ["New Delhi", "Gurgaon", "Noida", "Mumbai"]
+CUISINES = ["North Indian", "Chinese", "Fast Food", "Cafe", "Pizza", "Desserts"]
+
+
+def synthetic_restaurants(n=95, seed=7):
+    """Rows shaped like data/restaurants.json, with plenty of ties on every sort key."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        rating = rng.choice([0.0, 3.1, 3.5, 3.5, 4.0, 4.4, 4.9])
+        rows.append({
+            "Restaurant ID": str(1000 + i), "Restaurant Name": f"Place {i % 60}",
+            "Country Name": "India", "Country Code": 1.0, "City": rng.choice(CITIES),
+            "Address": f"{i} Main Road", "Locality": f"Block {i % 7}", "Locality Verbose": f"Block {i % 7}",
+            "Longitude": f"{77.1 + rng.random() / 10:.6f}", "Latitude": f"{28.5 + rng.random() / 10:.6f}",
+            "Cuisines": ", ".join(rng.sample(CUISINES, rng.randint(1, 3))),
+            "Average Cost for two": float(rng.choice([300, 500, 500, 800, 1200])), "Currency": "Indian Rupees(Rs.)",
+            "Has Table booking": "No", "Has Online delivery": "Yes", "Is delivering now": "No",
+            "Switch to order menu": "No", "Price range": float(rng.randint(1, 4)), "Aggregate rating": rating,
+            "Rating color": "Green", "Rating text": "Good", "Votes": float(rng.choice([0, 12, 12, 150, 900])),
+            "Mood": "Casual", "Time": "Dinner", "Budget": "Medium", "Group": "2–4",
+        })
+    return rows
+
+
+@pytest.fixture
+def restaurants():
+    return synthetic_restaurants()
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """app.py imported against a small synthetic dataset in a scratch working directory."""
+    work = tmp_path_factory.mktemp("app")
+    os.makedirs(work / "data")
+    with open(work / "data" / "restaurants.json", "w", encoding="utf-8") as f:
+        json.dump(synthetic_restaurants(), f)
+    env = {"ML_WARMUP": "0", "HYBRID_PRECOMPUTE": "0", "DATASET_WATCH_INTERVAL": "0", "METRICS": "0"}
+    saved_env = {k: os.environ.get(k) for k in env}
+    cwd = os.getcwd()
+    os.environ.update(env)
+    os.chdir(work)  # the app's data paths are relative
+    try:
+        yield importlib.import_module("app")
+    finally:
+        os.chdir(cwd)
+        for k, v in saved_env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+@pytest.fixture
+def api(app_module):
+    app_module.response_cache.clear()
+    return app_module.app.test_client()
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from accounts import GUEST, AccountStore
+
+
+def write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def legacy(tmp_path):
+    users = write(tmp_path / "users.json", [
+        {"username": "asha", "email": "a@example.com", "password": "s3cret"},
+        {"username": "nopass", "email": "n@example.com"},
+        {"username": "blank", "password": ""},
+        {"username": "", "password": "x"},
+        "not a user",
+    ])
+    wishlist = write(tmp_path / "wishlist.json", [
+        {"name": "KFC"}, {"Restaurant Name": "Unknown Place"}, {"name": ""}, 42,
+    ])
+    return users, wishlist
+
+
+def store(tmp_path, legacy):
+    users, wishlist = legacy
+    return AccountStore(str(tmp_path / "accounts.db"), legacy_users=users, legacy_wishlist=wishlist,
+                        resolve_id=lambda name: 18 if name == "KFC" else None)
+
+
+def test_legacy_users_are_imported(tmp_path, legacy):
+    accounts = store(tmp_path, legacy)
+    assert accounts.count_users() == 1
+    assert accounts.get_user("asha")["email"] == "a@example.com"
+    assert accounts.check_login("asha", "s3cret")
+    assert not accounts.check_login("asha", "wrong")
+
+
+@pytest.mark.parametrize("username", ["nopass", "blank"])
+def test_users_without_a_password_are_not_imported(tmp_path, legacy, username):
+    accounts = store(tmp_path, legacy)
+    assert accounts.get_user(username) is None
+    assert not accounts.check_login(username, "")
+    assert accounts.create_user(username, "", "new-password")  # the name is free to sign up
+
+
+def test_empty_password_never_logs_in(tmp_path, legacy):
+    accounts = store(tmp_path, legacy)
+    # a row imported before passwordless users were skipped
+    accounts._conn().execute(
+        "INSERT INTO users (username, email, password, created) VALUES ('old', '', '', '2024-01-01')")
+    assert not accounts.check_login("old", "")
+    assert not accounts.check_login("old", None)
+
+
+def test_legacy_wishlist_goes_to_guest_by_id(tmp_path, legacy):
+    accounts = store(tmp_path, legacy)
+    items = {(i["id"], i["name"]) for i in accounts.wishlist(GUEST)}
+    assert items == {("18", "KFC"), ("Unknown Place", "Unknown Place")}
+
+
+def test_import_runs_once(tmp_path, legacy):
+    accounts = store(tmp_path, legacy)
+    accounts.remove_from_wishlist(GUEST, "18")
+    again = store(tmp_path, legacy)
+    assert {i["id"] for i in again.wishlist(GUEST)} == {"Unknown Place"}
+
+
+def test_duplicates_are_rejected_by_the_keys(tmp_path, legacy):
+    accounts = store(tmp_path, legacy)
+    assert not accounts.create_user("asha", "", "other")
+    assert accounts.add_to_wishlist("asha", 7, "Cafe")
+    assert not accounts.add_to_wishlist("asha", "7", "Cafe")
+    assert accounts.remove_from_wishlist("asha", "Cafe") == 1
@@ -0,0 +1,65 @@
+import pytest
+
+SORTS = ["", "rating", "votes", "cost_low", "cost_high"]
+QUERIES = ["", "city=New%20Delhi", "cuisine=pizza&rating=3.5", "search=place"]
+
+
+def by_page(api, query):
+    rows, page = [], 1
+    while True:
+        resp = api.get(f"/api/restaurants?{query}&page={page}")
+        if resp.status_code == 404:
+            return rows, resp.get_json()
+        data = resp.get_json()
+        assert data["page"] == page
+        rows += [r["Restaurant ID"] for r in data["restaurants"]]
+        page += 1
+
+
+def by_cursor(api, query):
+    data = api.get(f"/api/restaurants?{query}").get_json()
+    rows = [r["Restaurant ID"] for r in data["restaurants"]]
+    while data["next_cursor"]:
+        data = api.get(f"/api/restaurants?{query}&cursor={data['next_cursor']}").get_json()
+        assert data["page"] is None  # keyset pages have no number
+        rows += [r["Restaurant ID"] for r in data["restaurants"]]
+    return rows
+
+
+@pytest.mark.parametrize("sort", SORTS)
+@pytest.mark.parametrize("query", QUERIES)
+def test_cursor_and_page_walks_agree(api, query, sort):
+    query = f"{query}&sort={sort}" if sort else query
+    paged, _ = by_page(api, query)
+    cursored = by_cursor(api, query)
+    assert cursored == paged
+    assert len(set(paged)) == len(paged)  # no row served twice across page boundaries
+    total = api.get(f"/api/restaurants?{query}").get_json()["total"]
+    assert len(paged) == total
+
+
+def test_pages_follow_the_full_order(api, app_module):
+    with app_module.app.test_request_context():
+        with app_module.pinned(app_module.datasets.current):
+            rows = app_module.query_restaurants(sort="rating")
+            expected = [app_module.catalogue().restaurants[i]["Restaurant ID"] for i in rows.tolist()]
+    assert by_page(api, "sort=rating")[0] == expected
+
+
+def test_page_past_the_end_is_404(api):
+    total = api.get("/api/restaurants").get_json()["total"]
+    pages = (total + 19) // 20
+    assert api.get(f"/api/restaurants?page={pages}").status_code == 200
+    resp = api.get(f"/api/restaurants?page={pages + 1}")
+    assert resp.status_code == 404
+    assert resp.get_json() == {"message": "page out of range", "total": total, "pages": pages}
+    assert api.get("/api/restaurants?page=100000000").status_code == 404
+
+
+def test_empty_result_is_an_empty_first_page(api):
+    data = api.get("/api/restaurants?search=zzzzqqq").get_json()
+    assert data["restaurants"] == [] and data["total"] == 0 and data["page"] == 1
+
+
+def test_bad_cursor_is_400(api):
+    assert api.get("/api/restaurants?cursor=not-a-cursor").status_code == 400
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from dataset import DatasetManager
+
+
+class FakeCatalogue:
+    def __init__(self, version):
+        self.version = version
+
+    def __len__(self):
+        return 0
+
+
+def manager(source, build_delay=0.0):
+    def build(version):
+        time.sleep(build_delay)
+        return FakeCatalogue(version)
+    m = DatasetManager(build, lambda: source["version"], interval=3600)
+    m.load()
+    return m
+
+
+def test_first_ensure_started_reloads_without_waiting_an_interval():
+    source = {"version": "boot"}
+    m = manager(source)
+    source["version"] = "newer"  # e.g. published while the master sat on its preloaded copy
+    m.ensure_started()
+    assert m.current.version == "newer"
+    assert m.swaps == 1
+
+
+def test_unchanged_source_keeps_the_catalogue():
+    source = {"version": "boot"}
+    m = manager(source)
+    first = m.current
+    m.ensure_started()
+    assert m.current is first
+
+
+def test_concurrent_callers_wait_for_the_first_check():
+    source = {"version": "boot"}
+    m = manager(source, build_delay=0.2)
+    source["version"] = "newer"
+    seen = []
+
+    def request():
+        m.ensure_started()
+        seen.append(m.current.version)
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert seen == ["newer"] * 4
+    assert m.swaps == 1
+
+
+def test_failed_build_keeps_serving_and_does_not_block():
+    source = {"version": "boot"}
+    m = manager(source)
+    first = m.current
+
+    def broken(version):
+        raise ValueError("bad snapshot")
+    m.build = broken
+    source["version"] = "broken"
+    m.ensure_started()
+    assert m.current is first
+    assert "bad snapshot" in m.last_error
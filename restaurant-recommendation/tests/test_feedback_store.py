@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from feedback_store import FeedbackStore, decode_cursor, display_date, encode_cursor
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FeedbackStore(str(tmp_path / "feedback.db"))
+
+
+def walk(store, type, limit):
+    entries, cursor = store.page(type, limit=limit)
+    while cursor:
+        more, cursor = store.page(type, limit=limit, before=cursor)
+        entries += more
+    return entries
+
+
+def test_pages_are_newest_first_and_cover_everything(store):
+    # several entries share a timestamp: the id breaks the tie
+    for i in range(23):
+        store.add("feedback", name=f"n{i}", message="hi", rating="5", created=f"2024-05-{1 + i // 3:02d}T10:00:00")
+    store.add("contact", name="other")
+    entries = walk(store, "feedback", limit=5)
+    assert [e["name"] for e in entries] == [f"n{i}" for i in reversed(range(23))]
+    assert all(e["type"] == "feedback" for e in entries)
+
+
+def test_pages_stay_stable_while_new_entries_arrive(store):
+    for i in range(10):
+        store.add("contact", name=f"n{i}", created=f"2024-05-01T10:00:{i:02d}")
+    first, cursor = store.page("contact", limit=4)
+    store.add("contact", name="newest")
+    second, _ = store.page("contact", limit=4, before=cursor)
+    assert [e["name"] for e in first + second] == [f"n{i}" for i in range(9, 1, -1)]
+
+
+def test_last_page_has_no_cursor(store):
+    for i in range(4):
+        store.add("contact", name=f"n{i}")
+    assert store.page("contact", limit=4)[1] is None
+    assert store.page("contact", limit=3)[1] is not None
+
+
+def test_cursor_round_trip_and_garbage():
+    assert decode_cursor(encode_cursor("2024-05-01T10:00:00", 7)) == ("2024-05-01T10:00:00", 7)
+    assert decode_cursor("???") is None
+    assert decode_cursor(encode_cursor("x", 1)[:-2]) is None
+
+
+def test_legacy_file_is_imported_once_with_parsed_dates(tmp_path):
+    legacy = tmp_path / "feedback.json"
+    legacy.write_text(json.dumps([
+        {"type": "feedback", "name": "old", "rating": "4", "date": "Jan 02, 2024 - 09:30 AM"},
+        {"name": "undated"},
+        "junk",
+    ]), encoding="utf-8")
+    store = FeedbackStore(str(tmp_path / "feedback.db"), legacy_path=str(legacy))
+    (entry,), _ = store.page("feedback")
+    assert entry["created"] == "2024-01-02T09:30:00"
+    assert entry["date"] == display_date(entry["created"]) == "Jan 02, 2024 - 09:30 AM"
+    assert store.count("contact") == 1
+    assert FeedbackStore(str(tmp_path / "feedback.db"), legacy_path=str(legacy)).count() == 2
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from fragments import JSONFragments
+
+
+def dumps(obj):
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+@pytest.fixture
+def frags(restaurants):
+    return JSONFragments(restaurants, dumps, "v1")
+
+
+def test_raw_rows_match_a_fresh_encode(frags, restaurants):
+    assert frags.raw(4) == dumps(restaurants[4]).encode("utf-8")
+    assert frags.raw(4) is frags.raw(4)  # encoded once
+    assert frags.stats()["encoded"] == 1
+
+
+@pytest.mark.parametrize("fields", [
+    {"explanation": ["Top rated"]},                 # sorts after every static key: appended
+    {"City": "Elsewhere"},                          # overrides a static key
+    {"Aggregate rating": 1.0, "zz": None},
+    {},
+])
+def test_spliced_rows_match_encoding_the_merged_dict(frags, restaurants, fields):
+    assert frags.splice(2, **fields) == dumps({**restaurants[2], **fields}).encode("utf-8")
+
+
+def test_projection_and_array(restaurants):
+    frags = JSONFragments(restaurants, dumps, project=lambda r: {"id": r["Restaurant ID"]})
+    body = frags.array(frags.splice(i, score=i) for i in (0, 1))
+    assert json.loads(body) == [{"id": restaurants[0]["Restaurant ID"], "score": 0},
+                                {"id": restaurants[1]["Restaurant ID"], "score": 1}]
+    assert frags.object({"rows": body, "total": 2}) == dumps(
+        {"rows": json.loads(body), "total": 2}).encode("utf-8")
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+import neighbors
+
+
+@pytest.fixture
+def matrix():
+    rng = np.random.default_rng(3)
+    dense = (rng.random((40, 12)) < 0.3) * rng.random((40, 12))
+    dense[5] = dense[6]  # an exact tie
+    norms = np.linalg.norm(dense, axis=1, keepdims=True)
+    return sparse.csr_matrix(np.divide(dense, norms, out=np.zeros_like(dense), where=norms > 0), dtype=np.float32)
+
+
+def brute_force(matrix, k):
+    sims = (matrix @ matrix.T).toarray()
+    np.fill_diagonal(sims, -np.inf)
+    order = np.lexsort((np.tile(np.arange(len(sims)), (len(sims), 1)), -sims), axis=1)[:, :k]
+    return order, np.take_along_axis(sims, order, axis=1)
+
+
+@pytest.mark.parametrize("block", [None, 1, 7])
+def test_blocked_table_matches_brute_force(matrix, block):
+    indices, scores = neighbors.build_topk(matrix, k=5, block=block)
+    want_idx, want_scores = brute_force(matrix, 5)
+    np.testing.assert_array_equal(indices, want_idx)
+    np.testing.assert_allclose(scores, want_scores, rtol=1e-5)
+    assert not (indices == np.arange(len(indices))[:, None]).any()  # never its own neighbour
+
+
+def test_query_rows_match_the_table(matrix):
+    table_idx, table_scores = neighbors.build_topk(matrix, k=4)
+    idx, scores = neighbors.query_topk(matrix, [6, 0, 39], k=4)
+    np.testing.assert_array_equal(idx, table_idx[[6, 0, 39]])
+    np.testing.assert_allclose(scores, table_scores[[6, 0, 39]])
+
+
+def test_k_larger_than_the_catalogue(matrix):
+    indices, _ = neighbors.build_topk(matrix[:3], k=10)
+    assert indices.shape == (3, 2)
+
+
+def test_saved_table_loads_memory_mapped(tmp_path, matrix):
+    indices, scores = neighbors.build_topk(matrix, k=3)
+    neighbors.save_topk(str(tmp_path), indices, scores)
+    loaded = neighbors.load_topk(str(tmp_path))
+    np.testing.assert_array_equal(loaded[0], indices)
+    assert isinstance(loaded[0], np.memmap)
+    assert neighbors.load_topk(str(tmp_path / "missing")) is None
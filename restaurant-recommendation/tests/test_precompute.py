@@ -0,0 +1,128 @@
+import threading
+
+import pytest
+
+from precompute import Precomputer
+
+
+class Model:
+    """compute() that tags values with a model version and can fail / pause on a user."""
+
+    def __init__(self, users):
+        self.users = list(users)
+        self.version = 1
+        self.fail = set()
+        self.calls = []
+        self.hook = None
+
+    def compute(self, user):
+        if self.hook is not None:
+            self.hook(user)
+        self.calls.append(user)
+        if user in self.fail:
+            raise RuntimeError(f"cannot score {user}")
+        return (user, self.version)
+
+
+@pytest.fixture
+def model():
+    return Model(["a", "b", "c"])
+
+
+@pytest.fixture
+def store(model):
+    return Precomputer(model.compute, users=lambda: model.users, interval=3600)
+
+
+def value(store, user):
+    entry = store.get(user)
+    return None if entry is None else entry[0]
+
+
+def test_first_pass_covers_everyone(store, model):
+    assert value(store, "a") is None
+    assert store.run_once() == 3
+    assert [value(store, u) for u in "abc"] == [("a", 1), ("b", 1), ("c", 1)]
+
+
+def test_mark_recomputes_only_the_dirty_user(store, model):
+    store.run_once()
+    model.calls.clear()
+    model.version = 2
+    store.mark("b")
+    assert value(store, "b") is None
+    assert value(store, "a") == ("a", 1)
+    store.run_once()
+    assert model.calls == ["b"]
+    assert value(store, "b") == ("b", 2)
+
+
+def test_full_pass_never_serves_the_previous_model(store, model):
+    store.run_once()
+    model.version = 2
+    store.mark_all()
+    seen = []
+
+    def check(user):
+        # while the pass is running, nobody may see a version-1 value
+        seen.extend(value(store, u) for u in "abc")
+    model.hook = check
+    store.run_once()
+    assert all(v is None or v[1] == 2 for v in seen)
+    assert [value(store, u) for u in "abc"] == [("a", 2), ("b", 2), ("c", 2)]
+
+
+def test_full_pass_drops_inactive_users(store, model):
+    store.run_once()
+    model.users = ["a"]
+    store.mark_all()
+    store.run_once()
+    assert store.results.keys() == {"a"}
+
+
+def test_failed_user_stays_dirty(store, model):
+    model.fail = {"b"}
+    assert store.run_once() == 2
+    assert value(store, "b") is None
+    assert store.stats()["pending"] == 1
+    model.fail = set()
+    model.calls.clear()
+    store.run_once()
+    assert model.calls == ["b"]
+    assert value(store, "b") == ("b", 1)
+
+
+def test_aborted_pass_keeps_unreached_users_dirty(store, model):
+    store.run_once()
+    model.version = 2
+    model.calls.clear()
+    store.mark_all()
+
+    def abort(user):
+        if model.calls:
+            raise KeyboardInterrupt  # not caught per user: the pass stops here
+    model.hook = abort
+    with pytest.raises(KeyboardInterrupt):
+        store.run_once()
+    fresh = [u for u in "abc" if value(store, u) is not None]
+    assert len(fresh) == 1 and value(store, fresh[0])[1] == 2
+    model.hook = None
+    store.run_once()
+    assert [value(store, u) for u in "abc"] == [("a", 2), ("b", 2), ("c", 2)]
+
+
+def test_mark_during_the_pass_is_kept(store, model):
+    store.run_once()
+    store.mark("a")
+    marked = threading.Event()
+
+    def remark(user):
+        if user == "a" and not marked.is_set():
+            marked.set()
+            store.mark("a")  # a new rating lands while "a" is being recomputed
+    model.hook = remark
+    store.run_once()
+    assert value(store, "a") is None
+    model.hook = None
+    store.run_once()
+    assert value(store, "a") == ("a", 1)
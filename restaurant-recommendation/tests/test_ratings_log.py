@@ -0,0 +1,102 @@
+import json
+import threading
+
+import pytest
+
+import ratings_log
+from ratings_log import RatingsLog
+
+
+def rating(user, restaurant, value):
+    return {"user": user, "restaurant": restaurant, "rating": value, "date": "2024-01-01"}
+
+
+def file_lines(log):
+    with open(log.path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "ratings.jsonl")
+
+
+def test_latest_rating_per_key_wins(path):
+    log = RatingsLog(path)
+    log.append(rating("u1", "KFC", 3))
+    log.append(rating("u1", "KFC", 5))
+    log.append(rating("u2", "KFC", 4))
+    assert log.get("u1", "KFC")["rating"] == 5
+    assert len(log.all()) == 2 and log.lines == 3
+
+
+def test_other_processes_pick_up_appends(path):
+    writer = RatingsLog(path)
+    writer.append(rating("u1", "KFC", 1))
+    reader = RatingsLog(path)
+    seen = []
+    reader.subscribe(seen.append)
+    writer.append(rating("u1", "KFC", 4))
+    assert reader.get("u1", "KFC")["rating"] == 4
+    assert seen == [rating("u1", "KFC", 4)]  # just the new entry, no replay
+
+
+def test_half_written_line_waits_for_its_newline(path):
+    log = RatingsLog(path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"user": "u1", "restaurant": "KFC", "ra')
+    assert log.all() == []
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('ting": 2}\n')
+    assert log.get("u1", "KFC")["rating"] == 2
+
+
+def test_compaction_keeps_only_live_ratings(path, monkeypatch):
+    monkeypatch.setattr(ratings_log, "COMPACT_MIN_LINES", 10)
+    log = RatingsLog(path)
+    for i in range(9):
+        log.append(rating("u1", "KFC", i % 5 + 1))
+    log.append(rating("u2", "KFC", 1))
+    assert log.lines == 2  # 10 lines > 4 x 2 live ratings: compacted on the last append
+    assert file_lines(log) == [rating("u1", "KFC", 4), rating("u2", "KFC", 1)]
+    assert log.get("u1", "KFC")["rating"] == 4
+
+
+def test_compaction_includes_other_writers_and_reloads_them(path):
+    mine, other = RatingsLog(path), RatingsLog(path)
+    events = []
+    other.subscribe(events.append)
+    mine.append(rating("u1", "KFC", 1))
+    other.append(rating("u2", "Cafe", 3))  # not yet seen by `mine`
+    mine.append(rating("u1", "KFC", 2))
+    mine.compact()
+    assert sorted((e["user"], e["rating"]) for e in file_lines(mine)) == [("u1", 2), ("u2", 3)]
+    # the other worker notices the new file and starts over: one None, no replay
+    events.clear()
+    assert {(e["user"], e["rating"]) for e in other.all()} == {("u1", 2), ("u2", 3)}
+    assert events == [None]
+    other.append(rating("u3", "KFC", 5))
+    assert mine.get("u3", "KFC")["rating"] == 5
+
+
+def test_concurrent_appends_are_all_kept(path):
+    log = RatingsLog(path)
+
+    def worker(n):
+        for i in range(25):
+            log.append(rating(f"user{n}", f"place{i}", 4))
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(RatingsLog(path).all()) == 200
+
+
+def test_legacy_ratings_are_imported_once(path, tmp_path):
+    legacy = tmp_path / "ratings.json"
+    legacy.write_text(json.dumps([rating("u1", "KFC", 2), rating("u1", "KFC", 3), {"bad": 1}]), encoding="utf-8")
+    log = RatingsLog(path, legacy_path=str(legacy))
+    assert log.get("u1", "KFC")["rating"] == 3 and len(log.all()) == 1
+    log.append(rating("u1", "KFC", 5))
+    assert RatingsLog(path, legacy_path=str(legacy)).get("u1", "KFC")["rating"] == 5
@@ -0,0 +1,97 @@
+import pytest
+from flask import Flask, jsonify, request
+
+from werkzeug.datastructures import MultiDict
+
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(max_bytes=1 << 20)
+
+
+@pytest.fixture
+def client(cache):
+    app = Flask(__name__)
+    calls = []
+
+    @app.route("/echo")
+    @cache.cached(depends=("dataset",))
+    def echo():
+        # reads the raw value, like /api/recommend's `name`
+        calls.append(request.query_string)
+        name = request.args.get("name", "")
+        return jsonify({"name": name, "exact": name == "KFC", "cities": request.args.getlist("city")})
+
+    client = app.test_client()
+    client.calls = calls
+    return client
+
+
+def fresh(client, cache, url):
+    cache.clear()
+    resp = client.get(url)
+    assert resp.headers["X-Cache"] == "MISS"
+    return resp.get_data()
+
+
+@pytest.mark.parametrize("warm, url", [
+    ("/echo?name=KFC", "/echo?name=KFC%20"),
+    ("/echo?name=KFC", "/echo?name=%20KFC"),
+    ("/echo?name=", "/echo"),
+    ("/echo?city=a&city=b", "/echo?city=b&city=a"),
+])
+def test_cached_response_matches_uncached(client, cache, warm, url):
+    client.get(warm)
+    served = client.get(url)
+    assert served.get_data() == fresh(client, cache, url)
+
+
+def test_argument_order_shares_an_entry(client):
+    client.get("/echo?name=KFC&city=a")
+    resp = client.get("/echo?city=a&name=KFC")
+    assert resp.headers["X-Cache"] == "HIT"
+    assert len(client.calls) == 1
+
+
+def test_bump_invalidates_dependents(client, cache):
+    client.get("/echo?name=KFC")
+    cache.bump("ratings")
+    assert client.get("/echo?name=KFC").headers["X-Cache"] == "HIT"
+    cache.bump("dataset")
+    assert cache.stats()["entries"] == 0
+    assert client.get("/echo?name=KFC").headers["X-Cache"] == "MISS"
+
+
+def test_set_version_invalidates_only_on_change(client, cache):
+    cache.set_version("dataset", "v1")
+    client.get("/echo?name=KFC")
+    cache.set_version("dataset", "v1")
+    assert client.get("/echo?name=KFC").headers["X-Cache"] == "HIT"
+    cache.set_version("dataset", "v2")
+    assert client.get("/echo?name=KFC").headers["X-Cache"] == "MISS"
+
+
+def test_body_built_against_an_old_version_is_not_stored(cache):
+    cache.set_version("dataset", "v1")
+    key = cache.key("/x", MultiDict(), ("dataset",))
+    cache.set_version("dataset", "v2")  # swap lands while the body is being built
+    entry = cache.put(key, b"{}", "application/json", ("dataset",))
+    assert entry.etag
+    assert cache.stats()["entries"] == 0
+
+
+def test_resolver_keys_on_the_pinned_version():
+    pinned = {"version": "old"}
+    cache = ResponseCache(resolvers={"dataset": lambda: pinned["version"]})
+    cache.set_version("dataset", "old")
+    k_old = cache.key("/x", MultiDict(), ("dataset",))
+    pinned["version"] = "new"
+    assert cache.key("/x", MultiDict(), ("dataset",)) != k_old
+
+
+def test_etag_revalidation(client):
+    etag = client.get("/echo?name=KFC").headers["ETag"]
+    resp = client.get("/echo?name=KFC", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pytest
+
+import ingest
+import snapshot
+from indexes import RestaurantIndex
+from snapshot import SCHEMA, SnapshotWriter, load_snapshot
+from store import RestaurantStore, column
+
+
+@pytest.fixture
+def snap(tmp_path, restaurants, monkeypatch):
+    monkeypatch.setattr(snapshot, "CHUNK_ROWS", 16)  # several flushes
+    writer = SnapshotWriter(str(tmp_path))
+    for r in restaurants:
+        writer.add(r)
+    writer.commit()
+    return load_snapshot(str(tmp_path))
+
+
+def test_round_trip_keeps_values_and_json_types(snap, restaurants):
+    records = snap.records()
+    assert len(records) == len(restaurants)
+    for got, want in zip(records, restaurants):
+        assert got == want
+        assert {k: type(v) for k, v in got.items()} == {k: type(v) for k, v in want.items()}
+    row = records[0]
+    assert isinstance(row["Restaurant ID"], str)
+    assert isinstance(row["Votes"], float) and isinstance(row["Latitude"], str)
+
+
+def test_round_trip_survives_json_encoding(snap, restaurants):
+    assert json.dumps(snap.records()[3], sort_keys=True) == json.dumps(restaurants[3], sort_keys=True)
+
+
+def test_records_index_like_a_list(snap, restaurants):
+    records = snap.records()
+    assert records[-1] == restaurants[-1]
+    assert records[np.int64(5)] == restaurants[5]
+    assert records[2:5] == restaurants[2:5]
+    with pytest.raises(IndexError):
+        records[len(restaurants)]
+
+
+def test_columns_come_from_the_mapped_files(snap, restaurants):
+    records = snap.records()
+    votes = records.column("Votes")
+    assert isinstance(votes, np.ndarray) and not votes.flags.writeable
+    assert votes.tolist() == [r["Votes"] for r in restaurants]
+    assert records.column("City") == [r["City"] for r in restaurants]
+    assert records.column("Missing", "x") == ["x"] * len(restaurants)
+    for name, _ in SCHEMA:
+        assert list(column(records, name)) == list(column(restaurants, name))
+
+
+def test_consumers_match_the_list_of_dicts(snap, restaurants):
+    a, b = RestaurantStore(snap.records()), RestaurantStore(restaurants)
+    for attr in ("rating", "votes", "cost", "lat", "lon", "city_codes", "cuisine_bits"):
+        np.testing.assert_array_equal(getattr(a, attr), getattr(b, attr))
+    assert list(a.city_names) == list(b.city_names) and a.cuisine_labels == b.cuisine_labels
+    ia, ib = RestaurantIndex(snap.records()), RestaurantIndex(restaurants)
+    assert ia.by_id == ib.by_id and ia.names_lower == ib.names_lower
+
+
+def test_other_format_versions_are_ignored(snap, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "FORMAT_VERSION", snapshot.FORMAT_VERSION + 1)
+    assert load_snapshot(str(tmp_path)) is None
+
+
+def test_ingest_normalises_to_the_json_types(tmp_path):
+    header = [name for name, _ in SCHEMA]
+    good = {name: "" for name in header}
+    good.update({"Restaurant ID": "6317637", "Restaurant Name": "Le Petit  Souffle", "City": "Makati City",
+                 "Votes": "314", "Average Cost for two": "1100", "Price range": "3", "Country Code": "162",
+                 "Aggregate rating": "4.8", "Longitude": "121.027535", "Latitude": "not a number"})
+    bad = dict(good, **{"Restaurant ID": "", "Restaurant Name": "No Id"})
+    source = tmp_path / "raw.tsv"
+    source.write_text("\n".join("\t".join(row[h] for h in header) for row in [dict(zip(header, header)), good, bad])
+                      + "\n", encoding="utf-8")
+
+    version, stats = ingest.ingest(str(source), str(tmp_path / "snap"), keep=0)
+    assert stats["rows"] == 1 and stats["skipped"] == 1
+    rec = load_snapshot(str(tmp_path / "snap")).records()[0]
+    assert rec["Restaurant ID"] == "6317637"
+    assert rec["Restaurant Name"] == "Le Petit Souffle"
+    assert rec["Votes"] == 314.0 and isinstance(rec["Votes"], float)
+    assert rec["Average Cost for two"] == 1100.0 and rec["Country Code"] == 162.0
+    assert rec["Longitude"] == "121.027535" and rec["Latitude"] == ""
+    assert rec["Mood"] == "Casual"  # multi-factor default filled in
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+import neighbors
+import tfidf_store
+
+TEXTS = ["Italian, Pizza Delhi", "Chinese Mumbai", "Pizza, Fast Food Delhi", "Cafe, Desserts Pune"]
+
+
+@pytest.fixture
+def fitted():
+    return tfidf_store.fit(TEXTS)
+
+
+def same(a, b):
+    return (a != b).nnz == 0 and a.shape == b.shape
+
+
+def test_save_then_load_round_trip(tmp_path, fitted):
+    vectorizer, matrix = fitted
+    path = str(tmp_path / tfidf_store.dataset_key(TEXTS))
+    assert tfidf_store.save(path, vectorizer, matrix)
+    assert same(tfidf_store.load_matrix(path), matrix)
+    assert tfidf_store.load_vectorizer(path).vocabulary == vectorizer.vocabulary_
+
+
+def test_existing_copy_is_kept(tmp_path, fitted):
+    vectorizer, matrix = fitted
+    path = str(tmp_path / "key")
+    tfidf_store.save(path, vectorizer, matrix)
+    before = os.stat(os.path.join(path, "meta.json")).st_mtime_ns
+    assert tfidf_store.save(path, vectorizer, matrix)  # another worker's identical copy
+    assert os.stat(os.path.join(path, "meta.json")).st_mtime_ns == before
+    assert not [n for n in os.listdir(tmp_path) if n != "key"]
+
+
+def test_directory_without_a_matrix_is_repaired(tmp_path, fitted):
+    vectorizer, matrix = fitted
+    path = str(tmp_path / "key")
+    indices, scores = np.zeros((4, 2), dtype=np.int32), np.ones((4, 2), dtype=np.float32)
+    neighbors.save_topk(path, indices, scores)  # table saved before the matrix
+    with open(os.path.join(path, "data.npy"), "wb") as f:
+        f.write(b"half-written")  # crash mid-save
+    assert tfidf_store.load_matrix(path) is None
+
+    assert tfidf_store.save(path, vectorizer, matrix)
+    assert same(tfidf_store.load_matrix(path), matrix)
+    table = neighbors.load_topk(path)
+    assert table is not None and np.array_equal(table[0], indices)
+    assert sorted(os.listdir(tmp_path)) == ["key"]
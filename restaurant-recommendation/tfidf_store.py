@@ -0,0 +1,131 @@
+"""On-disk TF-IDF artifacts, keyed by a hash of the text they were fit on.
+
+Layout (one directory per dataset version)::
+
+    data/model/<key>/
+        meta.json                       shape / nnz / feature count
+        vocabulary.json, idf.npy        the fitted vectorizer
+        data.npy, indices.npy, indptr.npy   CSR matrix, loaded with mmap
+        neighbors_*.npy                 top-K table (see neighbors.py)
+
+Loading is a handful of ``np.load(mmap_mode="r")`` calls, so a fresh worker
+serves recommendations without refitting anything.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+from scipy import sparse
+
+from store import column
+
+MAX_FEATURES = 20000
+
+
+def tfidf_texts(restaurants):
+    """'<Cuisines> <City>' per restaurant, the document the vectorizer sees."""
+    def text(v):
+        return "" if v is None or v != v else str(v)  # None / NaN -> ""
+    return [text(cuisines) + " " + text(city)
+            for cuisines, city in zip(column(restaurants, "Cuisines"), column(restaurants, "City"))]
+
+
+def dataset_key(texts):
+    h = hashlib.sha1()
+    for t in texts:
+        h.update(t.encode("utf-8", "replace"))
+        h.update(b"\n")
+    return h.hexdigest()[:16]
+
+
+def artifact_dir(root, key):
+    return os.path.join(root, key)
+
+
+def fit(texts):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer(stop_words="english", max_features=MAX_FEATURES, dtype=np.float32)
+    matrix = vectorizer.fit_transform(texts).tocsr()
+    return vectorizer, matrix
+
+
+def save(path, vectorizer, matrix):
+    """Write the artifacts to a temp dir and rename it into place.
+
+    Returns True once ``path`` holds a loadable matrix (ours, or an identical
+    one another worker saved first).
+    """
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    vocab = {term: int(col) for term, col in vectorizer.vocabulary_.items()}
+    with open(os.path.join(tmp, "vocabulary.json"), "w", encoding="utf-8") as f:
+        json.dump(vocab, f, ensure_ascii=False)
+    np.save(os.path.join(tmp, "idf.npy"), vectorizer.idf_.astype(np.float32))
+    np.save(os.path.join(tmp, "data.npy"), matrix.data)
+    np.save(os.path.join(tmp, "indices.npy"), matrix.indices)
+    np.save(os.path.join(tmp, "indptr.npy"), matrix.indptr)
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"shape": list(matrix.shape), "nnz": int(matrix.nnz), "features": len(vocab)}, f)
+    try:
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        if load_matrix(path) is not None:
+            # another worker got there first; its copy is identical
+            shutil.rmtree(tmp, ignore_errors=True)
+            return True
+    # `path` exists but holds no usable matrix (a crash mid-save, or a neighbour
+    # table saved into it first): keep its neighbour files, replace the rest
+    try:
+        for name in os.listdir(path):
+            if name.startswith("neighbors_") and name.endswith(".npy"):
+                os.replace(os.path.join(path, name), os.path.join(tmp, name))
+        stale = f"{path}.stale-{os.getpid()}"
+        os.replace(path, stale)
+        shutil.rmtree(stale, ignore_errors=True)
+        os.replace(tmp, path)
+        return True
+    except OSError as e:
+        if load_matrix(path) is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return True
+        shutil.rmtree(tmp, ignore_errors=True)
+        print(f"⚠️ TF-IDF artifacts not saved to {path}: {e}")
+        return False
+
+
+def load_matrix(path):
+    """Memory-mapped CSR matrix from ``path``, or None if it isn't there."""
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = [np.load(os.path.join(path, name), mmap_mode="r")
+                  for name in ("data.npy", "indices.npy", "indptr.npy")]
+    except (OSError, ValueError):
+        return None
+    return sparse.csr_matrix(tuple(arrays), shape=tuple(meta["shape"]), copy=False)
+
+
+def load_vectorizer(path):
+    """Rebuild the fitted TfidfVectorizer (e.g. to vectorize free-text queries)."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    with open(os.path.join(path, "vocabulary.json"), encoding="utf-8") as f:
+        vocab = json.load(f)
+    vectorizer = TfidfVectorizer(stop_words="english", max_features=MAX_FEATURES,
+                                 dtype=np.float32, vocabulary=vocab)
+    vectorizer.idf_ = np.load(os.path.join(path, "idf.npy"))
+    return vectorizer
+
+
+def prune(root, keep):
+    """Drop artifact dirs of older dataset versions."""
+    if not os.path.isdir(root):
+        return
+    for name in os.listdir(root):
+        if name != keep and "." not in name:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
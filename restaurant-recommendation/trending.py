@@ -0,0 +1,129 @@
+"""Context-aware trending scorer for /api/recommendations.
+
+Every rule ("rainy weather favours soup / tea / chai ...") is turned into a
+boolean feature column once, by matching its keywords against the
+lowercased Cuisines of every row. A request is then one weighted sum over
+those columns plus the rating / votes terms, and an ``argpartition``-style
+cut to the top ``k``; results are cached per context.
+
+Score for a restaurant with rating > 0::
+
+    sum(rule.weight for matching rules) + rating * rating_weight + votes / votes_per_point
+
+Without any context the list is simply rating, then votes, descending.
+Ties keep that trending order. Rules and weights can be overridden with a
+JSON file (see ``load_rules``).
+"""
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from store import column
+
+DEFAULT_RULES = [
+    {"context": "weather", "value": "rainy", "weight": 30,
+     "keywords": ["soup", "tea", "hot snack", "snack", "pakora", "chai"]},
+    {"context": "weather", "value": "sunny", "weight": 20,
+     "keywords": ["ice cream", "juice", "cold", "smoothie", "beverage"]},
+    {"context": "time", "value": "morning", "weight": 40,
+     "keywords": ["breakfast", "brunch", "pancake", "coffee"]},
+    {"context": "time", "value": "evening", "weight": 25,
+     "keywords": ["dinner", "snack", "street food"]},
+]
+RATING_WEIGHT = 2.0
+VOTES_PER_POINT = 100.0
+CACHE_CONTEXTS = 256
+
+
+def load_rules(path):
+    """Scorer settings from a JSON file, or {} if it is missing.
+
+    The file may hold a list of rules or ``{"rules": [...], "rating_weight": ..,
+    "votes_per_point": ..}``; each rule is ``{context, value, weight, keywords}``.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if isinstance(data, list):
+        return {"rules": data}
+    return {k: data[k] for k in ("rules", "rating_weight", "votes_per_point") if k in data}
+
+
+class TrendingScorer:
+    def __init__(self, restaurants, store, rules=DEFAULT_RULES, rating_weight=RATING_WEIGHT,
+                 votes_per_point=VOTES_PER_POINT):
+        self.store = store
+        self.rating_weight = float(rating_weight)
+        self.votes_per_point = float(votes_per_point)
+        self._text = np.array([str(v).lower() for v in column(restaurants, "Cuisines", "")], dtype=str)
+        self._features = {}  # keyword tuple -> bool column
+        self.rules = []
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        # only rated restaurants trend; keep them in (rating, votes) desc order
+        rated = np.flatnonzero(store.rating > 0)
+        self._rows = rated[np.lexsort((rated, -store.votes[rated], -store.rating[rated]))]
+        self._rating_term = store.rating[self._rows] * self.rating_weight
+        self._votes_term = store.votes[self._rows] / self.votes_per_point
+        for rule in rules:
+            self.add_rule(**rule)
+
+    @property
+    def contexts(self):
+        """Query parameters that rules react to (e.g. weather, time)."""
+        return sorted({r["context"] for r in self.rules})
+
+    def _feature(self, keywords):
+        key = tuple(sorted(k.lower() for k in keywords))
+        column = self._features.get(key)
+        if column is None:
+            column = np.zeros(len(self._text), dtype=bool)
+            for k in key:
+                column |= np.char.find(self._text, k) >= 0
+            self._features[key] = column
+        return column[self._rows]
+
+    def add_rule(self, context, value, weight, keywords):
+        """Register a rule; its feature column is computed once, here."""
+        with self._lock:
+            self.rules.append({"context": context, "value": str(value).lower(), "weight": float(weight),
+                               "keywords": list(keywords), "feature": self._feature(keywords)})
+            self._cache.clear()
+
+    def top(self, context=None, k=10):
+        """Row ids of the top ``k`` trending restaurants for ``{context: value}``."""
+        key = tuple(sorted((c, str(v).strip().lower()) for c, v in (context or {}).items()
+                           if str(v or "").strip()))
+        with self._lock:
+            cached = self._cache.get((key, k))
+            if cached is not None:
+                self._cache.move_to_end((key, k))
+                return cached
+            rows = self._top(dict(key), k)
+            self._cache[(key, k)] = rows
+            if len(self._cache) > CACHE_CONTEXTS:
+                self._cache.popitem(last=False)
+            return rows
+
+    def _top(self, context, k):
+        n = len(self._rows)
+        if not context:
+            return self._rows[:k]  # already in trending order
+        # context given (even one no rule knows): rank by score, ties in trending order
+        score = np.zeros(n)
+        for rule in self.rules:
+            if context.get(rule["context"]) == rule["value"]:
+                score += rule["weight"] * rule["feature"]
+        # same order of additions as the old per-row loop, so equal scores stay equal
+        score = score + self._rating_term + self._votes_term
+        if k < n:
+            cand = np.flatnonzero(score >= -np.partition(-score, k - 1)[k - 1])
+        else:
+            cand = np.arange(n)
+        order = np.lexsort((cand, -score[cand]))[:k]
+        return self._rows[cand[order]]